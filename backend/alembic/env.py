@@ -11,9 +11,14 @@ from app.db.base import Base
 # Import all models so Alembic can detect them
 from app.organizations.models import Organization, OrganizationMember  # noqa: F401
 from app.agents.models import Agent  # noqa: F401
-from app.executions.models import Execution, ExecutionStep  # noqa: F401
+from app.executions.models import Execution, ExecutionArchive, ExecutionStep  # noqa: F401
 from app.recipes.models import Recipe  # noqa: F401
-from app.usage.models import UsageDaily, ApiKey  # noqa: F401
+from app.usage.models import UsageDaily, UsageFlush, ApiKey  # noqa: F401
+from app.analytics.models import (  # noqa: F401
+    ExecutionRollupDaily,
+    ExecutionRollupHourly,
+    RollupWatermark,
+)
 from app.auth.models import User  # noqa: F401
 
 config = context.config
@@ -0,0 +1,43 @@
+"""Add offline (provider Batch API) mode to batch executions
+
+Revision ID: 009_batch_offline_mode
+Revises: 008_rag_pgvector
+Create Date: 2026-10-19 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers
+revision = "009_batch_offline_mode"
+down_revision = "008_rag_pgvector"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "batch_executions",
+        sa.Column("mode", sa.String(20), server_default=sa.text("'online'"), nullable=False),
+    )
+    op.add_column(
+        "batch_executions",
+        sa.Column("offline_step_index", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    op.add_column(
+        "batch_executions",
+        sa.Column("provider_batch_id", sa.String(255), nullable=True),
+    )
+    op.add_column(
+        "batch_items",
+        sa.Column("offline_state", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("batch_items", "offline_state")
+    op.drop_column("batch_executions", "provider_batch_id")
+    op.drop_column("batch_executions", "offline_step_index")
+    op.drop_column("batch_executions", "mode")
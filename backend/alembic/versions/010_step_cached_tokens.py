@@ -0,0 +1,27 @@
+"""Record provider prompt-cache hits on execution steps
+
+Revision ID: 010_step_cached_tokens
+Revises: 009_batch_offline_mode
+Create Date: 2026-10-19 12:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "010_step_cached_tokens"
+down_revision = "009_batch_offline_mode"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "execution_steps",
+        sa.Column("cached_input_tokens", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("execution_steps", "cached_input_tokens")
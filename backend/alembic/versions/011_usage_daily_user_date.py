@@ -0,0 +1,58 @@
+"""Unique (user_id, date) on usage_daily for single-statement upserts
+
+Revision ID: 011_usage_daily_user_date
+Revises: 010_step_cached_tokens
+Create Date: 2026-10-19 14:00:00.000000
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = "011_usage_daily_user_date"
+down_revision = "010_step_cached_tokens"
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    "total_executions",
+    "successful_executions",
+    "failed_executions",
+    "total_input_tokens",
+    "total_output_tokens",
+    "total_cost_cents",
+    "nano_calls",
+    "mini_calls",
+    "full_calls",
+    "cache_hits",
+)
+
+
+def upgrade() -> None:
+    # Concurrent read-modify-write updates may have created duplicate day rows:
+    # fold them into the oldest row of each (user_id, date) before adding the constraint.
+    sums = ", ".join(f"SUM({c}) AS {c}" for c in COUNTERS)
+    assignments = ", ".join(f"{c} = totals.{c}" for c in COUNTERS)
+    op.execute(
+        f"""
+        WITH totals AS (
+            SELECT (array_agg(id ORDER BY id))[1] AS keep_id, user_id, date, {sums}
+            FROM usage_daily
+            GROUP BY user_id, date
+            HAVING COUNT(*) > 1
+        ),
+        merged AS (
+            UPDATE usage_daily SET {assignments}
+            FROM totals
+            WHERE usage_daily.id = totals.keep_id
+            RETURNING usage_daily.id, usage_daily.user_id, usage_daily.date
+        )
+        DELETE FROM usage_daily u
+        USING merged
+        WHERE u.user_id = merged.user_id AND u.date = merged.date AND u.id <> merged.id
+        """
+    )
+    op.create_unique_constraint("uq_usage_daily_user_date", "usage_daily", ["user_id", "date"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_usage_daily_user_date", "usage_daily", type_="unique")
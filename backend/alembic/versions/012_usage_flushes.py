@@ -0,0 +1,31 @@
+"""Flush ids applied by the write-behind usage aggregation
+
+Revision ID: 012_usage_flushes
+Revises: 011_usage_daily_user_date
+Create Date: 2026-10-19 15:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "012_usage_flushes"
+down_revision = "011_usage_daily_user_date"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usage_flushes",
+        sa.Column("flush_id", sa.String(36), nullable=False),
+        sa.Column("applied_at", sa.DateTime(), server_default=sa.text("NOW()"), nullable=False),
+        sa.PrimaryKeyConstraint("flush_id", name=op.f("pk_usage_flushes")),
+    )
+    op.create_index(op.f("ix_usage_flushes_applied_at"), "usage_flushes", ["applied_at"])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_usage_flushes_applied_at"), table_name="usage_flushes")
+    op.drop_table("usage_flushes")
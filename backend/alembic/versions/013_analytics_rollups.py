@@ -0,0 +1,95 @@
+"""Hourly and daily execution rollups for analytics
+
+Revision ID: 013_analytics_rollups
+Revises: 012_usage_flushes
+Create Date: 2026-10-19 16:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "013_analytics_rollups"
+down_revision = "012_usage_flushes"
+branch_labels = None
+depends_on = None
+
+
+def _counters() -> list[sa.Column]:
+    return [
+        sa.Column("executions", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("successful", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("failed", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("cost_cents", sa.Numeric(14, 4), server_default=sa.text("0"), nullable=False),
+        sa.Column("input_tokens", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("output_tokens", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("cache_hits", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("duration_ms_sum", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("duration_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "execution_rollups_hourly",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("agent_id", sa.Uuid(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        *_counters(),
+        sa.PrimaryKeyConstraint(
+            "user_id", "agent_id", "bucket_start", name=op.f("pk_execution_rollups_hourly")
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name=op.f("fk_execution_rollups_hourly_user_id_users")
+        ),
+        sa.ForeignKeyConstraint(
+            ["agent_id"], ["agents.id"], name=op.f("fk_execution_rollups_hourly_agent_id_agents")
+        ),
+    )
+    op.create_index(
+        op.f("ix_execution_rollups_hourly_bucket_start"),
+        "execution_rollups_hourly",
+        ["bucket_start"],
+    )
+
+    op.create_table(
+        "execution_rollups_daily",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("agent_id", sa.Uuid(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *_counters(),
+        sa.PrimaryKeyConstraint(
+            "user_id", "agent_id", "day", name=op.f("pk_execution_rollups_daily")
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name=op.f("fk_execution_rollups_daily_user_id_users")
+        ),
+        sa.ForeignKeyConstraint(
+            ["agent_id"], ["agents.id"], name=op.f("fk_execution_rollups_daily_agent_id_agents")
+        ),
+    )
+    op.create_index(
+        op.f("ix_execution_rollups_daily_agent_id"), "execution_rollups_daily", ["agent_id"]
+    )
+
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("rolled_until", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name", name=op.f("pk_rollup_watermarks")),
+    )
+
+    # The refresh job rebuilds buckets by created_at range across all users
+    op.create_index(op.f("ix_executions_created_at"), "executions", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_executions_created_at"), table_name="executions")
+    op.drop_table("rollup_watermarks")
+    op.drop_index(op.f("ix_execution_rollups_daily_agent_id"), table_name="execution_rollups_daily")
+    op.drop_table("execution_rollups_daily")
+    op.drop_index(
+        op.f("ix_execution_rollups_hourly_bucket_start"), table_name="execution_rollups_hourly"
+    )
+    op.drop_table("execution_rollups_hourly")
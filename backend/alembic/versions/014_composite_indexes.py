@@ -0,0 +1,53 @@
+"""Composite (user|agent, created_at) indexes for listing and analytics queries
+
+Revision ID: 014_composite_indexes
+Revises: 013_analytics_rollups
+Create Date: 2026-10-19 17:00:00.000000
+
+The composite indexes replace the single-column user_id / agent_id indexes (their
+leading column serves the same lookups). They are built CONCURRENTLY so the
+executions table stays writable during the migration.
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = "014_composite_indexes"
+down_revision = "013_analytics_rollups"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) — columns may carry a sort order
+COMPOSITE_INDEXES = (
+    ("ix_executions_user_id_created_at", "executions", ["user_id", "created_at DESC"]),
+    ("ix_executions_agent_id_created_at", "executions", ["agent_id", "created_at"]),
+    (
+        "ix_batch_executions_user_id_created_at",
+        "batch_executions",
+        ["user_id", "created_at DESC"],
+    ),
+)
+
+SUPERSEDED_INDEXES = (
+    ("ix_executions_user_id", "executions", "user_id"),
+    ("ix_executions_agent_id", "executions", "agent_id"),
+    ("ix_batch_executions_user_id", "batch_executions", "user_id"),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in COMPOSITE_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+            )
+        for name, _, _ in SUPERSEDED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in SUPERSEDED_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column})")
+        for name, _, _ in COMPOSITE_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
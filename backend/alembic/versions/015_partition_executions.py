@@ -0,0 +1,240 @@
+"""Partition executions and execution_steps by month; add execution archives
+
+Revision ID: 015_partition_executions
+Revises: 014_composite_indexes
+Create Date: 2026-10-19 18:00:00.000000
+
+Both tables are rebuilt as RANGE (created_at) partitioned tables with one partition
+per month, from the oldest execution up to three months ahead (the daily maintenance
+cron keeps creating the following ones). A partitioned table's primary key must
+contain the partition key, so the keys become (id, created_at):
+
+* execution_steps gains created_at (its execution's) and references
+  executions (id, created_at);
+* batch_items.execution_id loses its foreign key.
+
+executions also gains archived_at, with a partial index on the unarchived rows'
+created_at for the archiving cron.
+
+The data is copied, so this migration takes the tables offline for its duration.
+"""
+
+from datetime import date, datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers
+revision = "015_partition_executions"
+down_revision = "014_composite_indexes"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+EXECUTION_FOREIGN_KEYS = (
+    ("fk_executions_agent_id_agents", "agent_id", "agents"),
+    ("fk_executions_organization_id_organizations", "organization_id", "organizations"),
+    ("fk_executions_user_id_users", "user_id", "users"),
+    ("fk_executions_triggered_by_user_id_users", "triggered_by_user_id", "users"),
+)
+
+EXECUTION_INDEXES = (
+    ("ix_executions_organization_id", "executions", ["organization_id"]),
+    ("ix_executions_created_at", "executions", ["created_at"]),
+    ("ix_executions_user_id_created_at", "executions", ["user_id", "created_at DESC"]),
+    ("ix_executions_agent_id_created_at", "executions", ["agent_id", "created_at"]),
+    ("ix_execution_steps_execution_id", "execution_steps", ["execution_id"]),
+)
+
+# Lets the archiving cron find unarchived executions without walking archived history
+UNARCHIVED_INDEX = "ix_executions_created_at_unarchived"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(table: str, first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+
+def _copy(
+    source: str, target: str, expressions: dict[str, str] | None = None, join: str = ""
+) -> None:
+    """Copy the rows of ``source`` into ``target`` by column name.
+
+    ``expressions`` gives the SELECT expression of target columns that are not a plain
+    copy of the source column of the same name.
+    """
+    expressions = expressions or {}
+    columns = op.get_bind().scalars(
+        sa.text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table "
+            "ORDER BY ordinal_position"
+        ),
+        {"table": target},
+    ).all()
+    selected = [expressions.get(column, f"src.{column}") for column in columns]
+    op.execute(
+        f"INSERT INTO {target} ({', '.join(columns)}) "
+        f"SELECT {', '.join(selected)} FROM {source} src {join}"
+    )
+
+
+def _create_indexes() -> None:
+    for name, table, columns in EXECUTION_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+
+
+def _drop_indexes() -> None:
+    for name, _, _ in EXECUTION_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_execution_foreign_keys() -> None:
+    for name, column, referred in EXECUTION_FOREIGN_KEYS:
+        op.create_foreign_key(name, "executions", referred, [column], ["id"])
+
+
+def upgrade() -> None:
+    op.rename_table("executions", "executions_legacy")
+    op.rename_table("execution_steps", "execution_steps_legacy")
+    op.execute(
+        "ALTER TABLE executions_legacy RENAME CONSTRAINT pk_executions TO pk_executions_legacy"
+    )
+    op.execute(
+        "ALTER TABLE execution_steps_legacy "
+        "RENAME CONSTRAINT pk_execution_steps TO pk_execution_steps_legacy"
+    )
+    _drop_indexes()
+
+    op.execute(
+        "CREATE TABLE executions (LIKE executions_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.alter_column("executions", "input_data", existing_type=postgresql.JSONB(), nullable=True)
+    op.add_column("executions", sa.Column("archived_at", sa.DateTime(), nullable=True))
+    op.execute("ALTER TABLE executions ALTER COLUMN created_at SET NOT NULL")
+
+    op.execute(
+        "CREATE TABLE execution_steps "
+        "(LIKE execution_steps_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS, "
+        "created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL) "
+        "PARTITION BY RANGE (created_at)"
+    )
+
+    oldest = op.get_bind().scalar(sa.text("SELECT MIN(created_at) FROM executions_legacy"))
+    # Timestamps are naive UTC, so months are UTC months
+    today = datetime.utcnow().date()
+    this_month = today.replace(day=1)
+    first = (oldest.date() if oldest else today).replace(day=1)
+    last = _add_months(this_month, MONTHS_AHEAD)
+    for table in ("executions", "execution_steps"):
+        _create_partitions(table, min(first, this_month), last)
+
+    _copy("executions_legacy", "executions", {"archived_at": "NULL"})
+    _copy(
+        "execution_steps_legacy",
+        "execution_steps",
+        {"created_at": "e.created_at"},
+        join="JOIN executions_legacy e ON e.id = src.execution_id",
+    )
+    # CASCADE drops the foreign keys pointing at the legacy tables (batch_items)
+    op.execute("DROP TABLE execution_steps_legacy")
+    op.execute("DROP TABLE executions_legacy CASCADE")
+
+    op.create_primary_key("pk_executions", "executions", ["id", "created_at"])
+    op.create_primary_key("pk_execution_steps", "execution_steps", ["id", "created_at"])
+    op.create_foreign_key(
+        "fk_execution_steps_execution_id_executions",
+        "execution_steps",
+        "executions",
+        ["execution_id", "created_at"],
+        ["id", "created_at"],
+        ondelete="CASCADE",
+    )
+    _create_execution_foreign_keys()
+    _create_indexes()
+    op.execute(
+        f"CREATE INDEX {UNARCHIVED_INDEX} ON executions (created_at) WHERE archived_at IS NULL"
+    )
+
+    op.create_table(
+        "execution_archives",
+        sa.Column("execution_id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), server_default=sa.text("NOW()"), nullable=False),
+        sa.PrimaryKeyConstraint("execution_id", "created_at", name=op.f("pk_execution_archives")),
+    )
+
+
+def downgrade() -> None:
+    # Archived payloads are not restored: those executions keep NULL payloads
+    op.drop_table("execution_archives")
+
+    op.rename_table("executions", "executions_partitioned")
+    op.rename_table("execution_steps", "execution_steps_partitioned")
+    op.execute(
+        "ALTER TABLE executions_partitioned "
+        "RENAME CONSTRAINT pk_executions TO pk_executions_partitioned"
+    )
+    op.execute(
+        "ALTER TABLE execution_steps_partitioned "
+        "RENAME CONSTRAINT pk_execution_steps TO pk_execution_steps_partitioned"
+    )
+    _drop_indexes()
+    op.execute(f"DROP INDEX IF EXISTS {UNARCHIVED_INDEX}")
+
+    op.execute(
+        "CREATE TABLE executions "
+        "(LIKE executions_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.drop_column("executions", "archived_at")
+    op.execute(
+        "CREATE TABLE execution_steps "
+        "(LIKE execution_steps_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.drop_column("execution_steps", "created_at")
+
+    _copy(
+        "executions_partitioned",
+        "executions",
+        {"input_data": "COALESCE(src.input_data, '{}'::jsonb)"},
+    )
+    op.alter_column("executions", "input_data", existing_type=postgresql.JSONB(), nullable=False)
+    _copy("execution_steps_partitioned", "execution_steps")
+    op.execute("DROP TABLE execution_steps_partitioned CASCADE")
+    op.execute("DROP TABLE executions_partitioned CASCADE")
+
+    op.create_primary_key("pk_executions", "executions", ["id"])
+    op.create_primary_key("pk_execution_steps", "execution_steps", ["id"])
+    op.create_foreign_key(
+        "fk_execution_steps_execution_id_executions",
+        "execution_steps",
+        "executions",
+        ["execution_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "fk_batch_items_execution_id_executions",
+        "batch_items",
+        "executions",
+        ["execution_id"],
+        ["id"],
+    )
+    _create_execution_foreign_keys()
+    _create_indexes()
@@ -6,8 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents import service
 from app.agents.schemas import AgentCreate, AgentResponse, AgentUpdate
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.db.engine import get_db
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/api/agents", tags=["agents"])
 @router.post("", response_model=AgentResponse, status_code=201)
 async def create_agent(
     body: AgentCreate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     try:
@@ -45,7 +45,7 @@ async def create_agent(
 
 @router.get("", response_model=list[AgentResponse])
 async def list_agents(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     agents = await service.list_agents(db, user.id)
@@ -67,7 +67,7 @@ async def list_agents(
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(
     agent_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     agent = await service.get_agent(db, agent_id, user.id)
@@ -89,7 +89,7 @@ async def get_agent(
 async def update_agent(
     agent_id: uuid.UUID,
     body: AgentUpdate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     agent = await service.get_agent(db, agent_id, user.id)
@@ -120,7 +120,7 @@ async def update_agent(
 @router.delete("/{agent_id}", status_code=204)
 async def delete_agent(
     agent_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     agent = await service.get_agent(db, agent_id, user.id)
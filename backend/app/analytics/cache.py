@@ -0,0 +1,64 @@
+"""Per-user Redis cache for analytics responses.
+
+Entries are keyed by a per-user version number: invalidating a user (an execution or a
+batch of theirs finished, once committed) bumps the version, so every cached response of
+that user is missed at once and the old keys simply expire. The short TTL bounds
+staleness for changes that do not invalidate (agents created or deleted, batches
+submitted).
+"""
+
+import json
+import uuid
+from collections.abc import Awaitable, Callable
+
+import structlog
+from redis.asyncio import Redis
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+KEY_PREFIX = "analytics"
+
+
+def _version_key(user_id: uuid.UUID | str) -> str:
+    return f"{KEY_PREFIX}:ver:{user_id}"
+
+
+async def invalidate_user_analytics(redis: Redis, user_id: uuid.UUID | str) -> None:
+    await redis.incr(_version_key(user_id))
+
+
+class AnalyticsCache:
+    """Read-through cache of one user's analytics responses."""
+
+    def __init__(self, redis: Redis, user_id: uuid.UUID):
+        self.redis = redis
+        self.user_id = user_id
+        self._version: str | None = None
+
+    async def _key(self, name: str) -> str:
+        if self._version is None:
+            self._version = await self.redis.get(_version_key(self.user_id)) or "0"
+            if isinstance(self._version, bytes):
+                self._version = self._version.decode()
+        return f"{KEY_PREFIX}:{self.user_id}:{self._version}:{name}"
+
+    async def get_or_set(self, name: str, compute: Callable[[], Awaitable]):
+        """Return the cached response ``name`` or compute, store and return it."""
+        try:
+            key = await self._key(name)
+            cached = await self.redis.get(key)
+        except Exception as e:
+            # Redis unavailable: serve from the database
+            logger.warning("analytics_cache_read_failed", name=name, error=str(e))
+            return await compute()
+        if cached is not None:
+            return json.loads(cached)
+
+        value = await compute()
+        try:
+            await self.redis.set(key, json.dumps(value), ex=settings.analytics_cache_ttl_seconds)
+        except Exception as e:
+            logger.warning("analytics_cache_write_failed", key=key, error=str(e))
+        return value
@@ -0,0 +1,56 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Integer, Numeric, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class _RollupCounters:
+    """Execution aggregates shared by the hourly and daily rollups."""
+
+    executions: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    successful: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    failed: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    cost_cents: Mapped[Decimal] = mapped_column(
+        Numeric(14, 4), default=0, server_default=text("0")
+    )
+    input_tokens: Mapped[int] = mapped_column(BigInteger, default=0, server_default=text("0"))
+    output_tokens: Mapped[int] = mapped_column(BigInteger, default=0, server_default=text("0"))
+    cache_hits: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    # avg(duration_ms) = duration_ms_sum / duration_count (executions with a duration)
+    duration_ms_sum: Mapped[int] = mapped_column(BigInteger, default=0, server_default=text("0"))
+    duration_count: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+
+
+class ExecutionRollupHourly(Base, _RollupCounters):
+    """Executions per user, agent and hour of ``created_at`` (UTC)."""
+
+    __tablename__ = "execution_rollups_hourly"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agents.id"), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True, index=True)
+
+
+class ExecutionRollupDaily(Base, _RollupCounters):
+    """Executions per user, agent and day of ``created_at`` (UTC), summed from the hourly rollup."""
+
+    __tablename__ = "execution_rollups_daily"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    agent_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("agents.id"), primary_key=True, index=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+
+class RollupWatermark(Base):
+    """Rollups hold every execution created before ``rolled_until``; later rows are read raw."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    rolled_until: Mapped[datetime] = mapped_column(nullable=False)
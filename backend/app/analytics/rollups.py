@@ -0,0 +1,180 @@
+"""Hourly and daily execution rollups behind the analytics endpoints.
+
+A cron job recomputes the last ``settings.analytics_rollup_lookback_hours`` closed hours
+from raw ``executions`` rows, re-sums the days they belong to, and then moves the
+watermark to the start of the current hour. Buckets are rebuilt, not incremented, so a
+run can be repeated safely. The lookback also picks up rows committed late, such as
+online batch chunks whose executions commit at the end of the chunk. Executions that
+finish after the lookback has moved past their hour (offline batches, long retries)
+are caught by their ``completed_at``: the hours they were created in are rebuilt as
+well, up to ``settings.analytics_rollup_late_days`` back. Readers combine
+rollups (before the watermark) with raw rows (from the watermark on): see
+``app.analytics.service``.
+"""
+
+from datetime import datetime, time, timedelta
+
+import structlog
+from sqlalchemy import and_, case, cast, delete, func, insert, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import Date, DateTime
+
+from app.analytics.models import ExecutionRollupDaily, ExecutionRollupHourly, RollupWatermark
+from app.config import settings
+from app.executions.models import Execution
+
+logger = structlog.get_logger()
+
+WATERMARK = "executions"
+
+# Serialises concurrent refreshes (pg_advisory_xact_lock key)
+ROLLUP_LOCK_ID = 0x726F6C6C
+
+COUNTER_COLUMNS = (
+    "executions",
+    "successful",
+    "failed",
+    "cost_cents",
+    "input_tokens",
+    "output_tokens",
+    "cache_hits",
+    "duration_ms_sum",
+    "duration_count",
+)
+
+
+def execution_aggregates() -> list:
+    """Rollup counters computed from raw ``executions`` rows, in COUNTER_COLUMNS order."""
+    return [
+        func.count(Execution.id).label("executions"),
+        func.count(case((Execution.status == "completed", 1))).label("successful"),
+        func.count(case((Execution.status == "failed", 1))).label("failed"),
+        func.coalesce(func.sum(Execution.total_cost_cents), 0).label("cost_cents"),
+        func.coalesce(func.sum(Execution.total_input_tokens), 0).label("input_tokens"),
+        func.coalesce(func.sum(Execution.total_output_tokens), 0).label("output_tokens"),
+        func.coalesce(func.sum(Execution.cache_hits), 0).label("cache_hits"),
+        func.coalesce(func.sum(Execution.duration_ms), 0).label("duration_ms_sum"),
+        func.count(Execution.duration_ms).label("duration_count"),
+    ]
+
+
+def watermark_subquery():
+    """Scalar subquery for the watermark, ``-infinity`` before the first refresh."""
+    return func.coalesce(
+        select(RollupWatermark.rolled_until)
+        .where(RollupWatermark.name == WATERMARK)
+        .scalar_subquery(),
+        cast(literal_column("'-infinity'"), DateTime),
+    )
+
+
+async def refresh_rollups(db: AsyncSession, now: datetime | None = None) -> dict:
+    """Rebuild recently closed hourly buckets and their days, then advance the watermark."""
+    end = (now or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+
+    await db.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK_ID)))
+    watermark = await db.scalar(
+        select(RollupWatermark.rolled_until).where(RollupWatermark.name == WATERMARK)
+    )
+    if watermark is None:
+        # First run: backfill the whole history
+        watermark = await db.scalar(select(func.min(Execution.created_at))) or end
+    start = min(
+        end - timedelta(hours=settings.analytics_rollup_lookback_hours),
+        watermark.replace(minute=0, second=0, microsecond=0),
+    )
+
+    hour = func.date_trunc("hour", Execution.created_at)
+    # Hours before the lookback whose executions finished since the last refresh
+    late_hours = (
+        await db.scalars(
+            select(hour)
+            .where(
+                Execution.created_at >= start - timedelta(days=settings.analytics_rollup_late_days),
+                Execution.created_at < start,
+                Execution.completed_at >= watermark,
+            )
+            .distinct()
+        )
+    ).all()
+    late_days = sorted({late_hour.date() for late_hour in late_hours})
+
+    await db.execute(
+        delete(ExecutionRollupHourly).where(
+            or_(
+                and_(
+                    ExecutionRollupHourly.bucket_start >= start,
+                    ExecutionRollupHourly.bucket_start < end,
+                ),
+                ExecutionRollupHourly.bucket_start.in_(late_hours),
+            )
+        )
+    )
+    await db.execute(
+        insert(ExecutionRollupHourly).from_select(
+            ["user_id", "agent_id", "bucket_start", *COUNTER_COLUMNS],
+            select(Execution.user_id, Execution.agent_id, hour, *execution_aggregates())
+            .where(
+                or_(
+                    and_(Execution.created_at >= start, Execution.created_at < end),
+                    hour.in_(late_hours),
+                )
+            )
+            .group_by(Execution.user_id, Execution.agent_id, hour),
+        )
+    )
+
+    # Re-sum every day touched by the rebuilt hours (the current day up to ``end``)
+    first_day = datetime.combine(start.date(), time.min)
+    day = cast(ExecutionRollupHourly.bucket_start, Date)
+    await db.execute(
+        delete(ExecutionRollupDaily).where(
+            or_(ExecutionRollupDaily.day >= start.date(), ExecutionRollupDaily.day.in_(late_days))
+        )
+    )
+    await db.execute(
+        insert(ExecutionRollupDaily).from_select(
+            ["user_id", "agent_id", "day", *COUNTER_COLUMNS],
+            select(
+                ExecutionRollupHourly.user_id,
+                ExecutionRollupHourly.agent_id,
+                day,
+                *(
+                    func.sum(getattr(ExecutionRollupHourly, column))
+                    for column in COUNTER_COLUMNS
+                ),
+            )
+            .where(
+                or_(
+                    and_(
+                        ExecutionRollupHourly.bucket_start >= first_day,
+                        ExecutionRollupHourly.bucket_start < end,
+                    ),
+                    day.in_(late_days),
+                )
+            )
+            .group_by(ExecutionRollupHourly.user_id, ExecutionRollupHourly.agent_id, day),
+        )
+    )
+
+    stmt = pg_insert(RollupWatermark).values(name=WATERMARK, rolled_until=end)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[RollupWatermark.name],
+            set_={"rolled_until": stmt.excluded.rolled_until},
+        )
+    )
+    await db.commit()
+
+    logger.info(
+        "analytics_rollups_refreshed",
+        start=start.isoformat(),
+        end=end.isoformat(),
+        late_hours=len(late_hours),
+    )
+    return {
+        "start": start.isoformat(),
+        "rolled_until": end.isoformat(),
+        "late_hours": len(late_hours),
+    }
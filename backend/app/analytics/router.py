@@ -1,64 +1,87 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.analytics import service
+from app.analytics.cache import AnalyticsCache
 from app.analytics.schemas import AgentStatsItem, DashboardStatsResponse, InsightItem, OverviewResponse, TimelineItem, TrendItem
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.db.engine import get_db
+from app.executions.router import get_redis
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
 @router.get("/dashboard", response_model=DashboardStatsResponse)
 async def get_dashboard_stats(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
 ):
-    return await service.get_dashboard_stats(db, user.id)
+    return await AnalyticsCache(redis, user.id).get_or_set(
+        "dashboard", lambda: service.get_dashboard_stats(db, user.id)
+    )
 
 
 @router.get("/overview", response_model=OverviewResponse)
 async def get_overview(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
 ):
-    return await service.get_overview(db, user.id)
+    return await AnalyticsCache(redis, user.id).get_or_set(
+        "overview", lambda: service.get_overview(db, user.id)
+    )
 
 
 @router.get("/trends", response_model=list[TrendItem])
 async def get_trends(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
     days: int = Query(30, ge=1, le=365),
 ):
     """Obtenir les tendances d'utilisation."""
-    return await service.get_trends(db, user.id, days=days)
+    return await AnalyticsCache(redis, user.id).get_or_set(
+        f"trends:{days}", lambda: service.get_trends(db, user.id, days=days)
+    )
 
 
 @router.get("/insights", response_model=list[InsightItem])
 async def get_insights(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
 ):
     """Obtenir des insights automatiques."""
-    return await service.get_insights(db, user.id)
+    cache = AnalyticsCache(redis, user.id)
+    overview = await cache.get_or_set("overview", lambda: service.get_overview(db, user.id))
+    return await cache.get_or_set(
+        "insights", lambda: service.get_insights(db, user.id, overview=overview)
+    )
 
 
 @router.get("/agents", response_model=list[AgentStatsItem])
 async def get_agent_stats(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
 ):
-    return await service.get_agent_stats(db, user.id)
+    return await AnalyticsCache(redis, user.id).get_or_set(
+        "agents", lambda: service.get_agent_stats(db, user.id)
+    )
 
 
 @router.get("/timeline", response_model=list[TimelineItem])
 async def get_timeline(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
     days: int = Query(default=30, ge=1, le=90),
 ):
-    return await service.get_timeline(db, user.id, days=days)
+    return await AnalyticsCache(redis, user.id).get_or_set(
+        f"timeline:{days}", lambda: service.get_timeline(db, user.id, days=days)
+    )
@@ -1,47 +1,90 @@
 import uuid
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
 
 import structlog
-from sqlalchemy import Date, case, cast, func, select
+from sqlalchemy import Date, cast, func, null, select, true, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.models import Agent
+from app.analytics.models import ExecutionRollupDaily
+from app.analytics.rollups import COUNTER_COLUMNS, execution_aggregates, watermark_subquery
 from app.batches.models import BatchExecution
 from app.executions.models import Execution
 
 logger = structlog.get_logger()
 
 
+def _usage(
+    user_id: uuid.UUID,
+    by: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+):
+    """A user's execution counters, grouped ``by`` "day", "agent" or not at all.
+
+    Only executions created in the half-open range of UTC days ``[start, end)`` count
+    (either bound may be omitted). Raw rows are filtered on the bare ``created_at`` so
+    the ``(user_id, created_at)`` index applies.
+
+    Daily rollups cover everything before the rollup watermark; only executions created
+    since the watermark (normally the current hour) are aggregated from raw rows.
+    """
+    if by == "day":
+        rollup_key, raw_key = ExecutionRollupDaily.day, cast(Execution.created_at, Date)
+    elif by == "agent":
+        rollup_key, raw_key = ExecutionRollupDaily.agent_id, Execution.agent_id
+    else:
+        rollup_key = raw_key = null()
+
+    rollups = select(
+        rollup_key.label("key"),
+        *(getattr(ExecutionRollupDaily, column) for column in COUNTER_COLUMNS),
+    ).where(ExecutionRollupDaily.user_id == user_id)
+    raw = select(
+        raw_key.label("key"),
+        *execution_aggregates(),
+    ).where(Execution.user_id == user_id, Execution.created_at >= watermark_subquery())
+    if by:
+        raw = raw.group_by(raw_key)
+    if start:
+        rollups = rollups.where(ExecutionRollupDaily.day >= start)
+        raw = raw.where(Execution.created_at >= datetime.combine(start, time.min))
+    if end:
+        rollups = rollups.where(ExecutionRollupDaily.day < end)
+        raw = raw.where(Execution.created_at < datetime.combine(end, time.min))
+
+    combined = union_all(rollups, raw).subquery()
+    return select(
+        combined.c.key,
+        *(
+            func.coalesce(func.sum(combined.c[column]), 0).label(column)
+            for column in COUNTER_COLUMNS
+        ),
+    ).group_by(combined.c.key)
+
+
+def _avg_duration(row) -> int:
+    return round(row.duration_ms_sum / row.duration_count) if row.duration_count else 0
+
+
 async def get_overview(db: AsyncSession, user_id: uuid.UUID) -> dict:
     """Global stats for the user."""
-    result = await db.execute(
-        select(
-            func.count(Execution.id).label("total_executions"),
-            func.count(case((Execution.status == "completed", 1))).label("successful"),
-            func.count(case((Execution.status == "failed", 1))).label("failed"),
-            func.coalesce(func.sum(Execution.total_cost_cents), 0).label("total_cost_cents"),
-            func.coalesce(func.sum(Execution.total_input_tokens), 0).label("total_input_tokens"),
-            func.coalesce(func.sum(Execution.total_output_tokens), 0).label("total_output_tokens"),
-            func.coalesce(func.sum(Execution.cache_hits), 0).label("total_cache_hits"),
-            func.coalesce(func.avg(Execution.duration_ms), 0).label("avg_duration_ms"),
-        ).where(Execution.user_id == user_id)
-    )
-    row = result.one()
+    row = (await db.execute(_usage(user_id))).one()
 
-    total = row.total_executions
-    successful = row.successful
+    total = int(row.executions)
+    successful = int(row.successful)
 
     return {
         "total_executions": total,
         "successful_executions": successful,
-        "failed_executions": row.failed,
+        "failed_executions": int(row.failed),
         "success_rate": round((successful / total * 100), 1) if total > 0 else 0.0,
-        "total_cost_cents": float(row.total_cost_cents),
-        "total_input_tokens": int(row.total_input_tokens),
-        "total_output_tokens": int(row.total_output_tokens),
-        "total_cache_hits": int(row.total_cache_hits),
-        "avg_duration_ms": round(float(row.avg_duration_ms)),
-        "avg_cost_cents": round(float(row.total_cost_cents) / total, 4) if total > 0 else 0.0,
+        "total_cost_cents": float(row.cost_cents),
+        "total_input_tokens": int(row.input_tokens),
+        "total_output_tokens": int(row.output_tokens),
+        "total_cache_hits": int(row.cache_hits),
+        "avg_duration_ms": _avg_duration(row),
+        "avg_cost_cents": round(float(row.cost_cents) / total, 4) if total > 0 else 0.0,
     }
 
 
@@ -56,42 +99,25 @@ async def get_trends(
     Returns:
         list[dict]: Tendances par jour avec métriques
     """
-    from datetime import date, timedelta
-    from sqlalchemy import func, Date, cast
-
-    end_date = date.today()
+    end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=days)
 
-    result = await db.execute(
-        select(
-            cast(Execution.created_at, Date).label("date"),
-            func.count(Execution.id).label("total_executions"),
-            func.count(func.case((Execution.status == "completed", 1))).label("successful"),
-            func.sum(Execution.total_cost_cents).label("total_cost_cents"),
-            func.avg(Execution.duration_ms).label("avg_duration_ms"),
-        )
-        .where(
-            Execution.user_id == user_id,
-            cast(Execution.created_at, Date) >= start_date,
-            cast(Execution.created_at, Date) <= end_date,
-        )
-        .group_by(cast(Execution.created_at, Date))
-        .order_by(cast(Execution.created_at, Date))
-    )
+    query = _usage(user_id, by="day", start=start_date, end=end_date + timedelta(days=1))
+    result = await db.execute(query.order_by(query.selected_columns.key))
 
     trends = []
     for row in result.all():
         trends.append({
-            "date": row.date.isoformat(),
-            "total_executions": row.total_executions,
-            "successful_executions": row.successful,
+            "date": row.key.isoformat(),
+            "total_executions": int(row.executions),
+            "successful_executions": int(row.successful),
             "success_rate": (
-                (row.successful / row.total_executions * 100)
-                if row.total_executions and row.total_executions > 0
+                (row.successful / row.executions * 100)
+                if row.executions and row.executions > 0
                 else 0
             ),
-            "total_cost_cents": float(row.total_cost_cents or 0),
-            "avg_duration_ms": round(float(row.avg_duration_ms or 0)),
+            "total_cost_cents": float(row.cost_cents or 0),
+            "avg_duration_ms": _avg_duration(row),
         })
 
     return trends
@@ -100,17 +126,21 @@ async def get_trends(
 async def get_insights(
     db: AsyncSession,
     user_id: uuid.UUID,
+    overview: dict | None = None,
 ) -> list[dict]:
     """
     Génère des insights automatiques basés sur l'utilisation.
 
+    ``overview`` permet de réutiliser des stats déjà calculées (cache analytics).
+
     Returns:
         list[dict]: Liste d'insights avec recommandations
     """
     insights = []
 
     # Get overview stats
-    overview = await get_overview(db, user_id)
+    if overview is None:
+        overview = await get_overview(db, user_id)
 
     # Insight: Low success rate
     if overview["success_rate"] < 70 and overview["total_executions"] > 10:
@@ -163,23 +193,24 @@ async def get_insights(
 
 async def get_agent_stats(db: AsyncSession, user_id: uuid.UUID) -> list[dict]:
     """Per-agent execution statistics."""
+    usage = _usage(user_id, by="agent").subquery()
+    executions = func.coalesce(usage.c.executions, 0)
     result = await db.execute(
         select(
             Agent.id,
             Agent.name,
             Agent.recipe_slug,
             Agent.status,
-            func.count(Execution.id).label("execution_count"),
-            func.count(case((Execution.status == "completed", 1))).label("successful"),
-            func.coalesce(func.sum(Execution.total_cost_cents), 0).label("total_cost_cents"),
-            func.coalesce(func.avg(Execution.total_cost_cents), 0).label("avg_cost_cents"),
-            func.coalesce(func.avg(Execution.duration_ms), 0).label("avg_duration_ms"),
-            func.coalesce(func.sum(Execution.cache_hits), 0).label("cache_hits"),
+            executions.label("execution_count"),
+            func.coalesce(usage.c.successful, 0).label("successful"),
+            func.coalesce(usage.c.cost_cents, 0).label("total_cost_cents"),
+            func.coalesce(usage.c.cache_hits, 0).label("cache_hits"),
+            func.coalesce(usage.c.duration_ms_sum, 0).label("duration_ms_sum"),
+            func.coalesce(usage.c.duration_count, 0).label("duration_count"),
         )
-        .outerjoin(Execution, Execution.agent_id == Agent.id)
+        .outerjoin(usage, usage.c.key == Agent.id)
         .where(Agent.created_by == user_id, Agent.deleted_at.is_(None))
-        .group_by(Agent.id)
-        .order_by(func.count(Execution.id).desc())
+        .order_by(executions.desc())
     )
 
     rows = result.all()
@@ -189,14 +220,16 @@ async def get_agent_stats(db: AsyncSession, user_id: uuid.UUID) -> list[dict]:
             "agent_name": row.name,
             "recipe_slug": row.recipe_slug,
             "agent_status": row.status,
-            "execution_count": row.execution_count,
-            "successful_executions": row.successful,
+            "execution_count": int(row.execution_count),
+            "successful_executions": int(row.successful),
             "success_rate": round((row.successful / row.execution_count * 100), 1)
             if row.execution_count > 0
             else 0.0,
             "total_cost_cents": float(row.total_cost_cents),
-            "avg_cost_cents": round(float(row.avg_cost_cents), 4),
-            "avg_duration_ms": round(float(row.avg_duration_ms)),
+            "avg_cost_cents": round(float(row.total_cost_cents) / row.execution_count, 4)
+            if row.execution_count > 0
+            else 0.0,
+            "avg_duration_ms": _avg_duration(row),
             "cache_hits": int(row.cache_hits),
         }
         for row in rows
@@ -205,38 +238,37 @@ async def get_agent_stats(db: AsyncSession, user_id: uuid.UUID) -> list[dict]:
 
 async def get_dashboard_stats(db: AsyncSession, user_id: uuid.UUID) -> dict:
     """Aggregate stats for the dashboard homepage."""
-    seven_days_ago = date.today() - timedelta(days=7)
+    seven_days_ago = datetime.utcnow().date() - timedelta(days=7)
 
-    agent_count = await db.scalar(
-        select(func.count(Agent.id)).where(
-            Agent.created_by == user_id, Agent.deleted_at.is_(None)
-        )
-    ) or 0
-
-    recent_exec_count = await db.scalar(
-        select(func.count(Execution.id)).where(
-            Execution.user_id == user_id,
-            cast(Execution.created_at, Date) >= seven_days_ago,
-        )
-    ) or 0
-
-    batch_count = await db.scalar(
-        select(func.count(BatchExecution.id)).where(
-            BatchExecution.user_id == user_id
-        )
-    ) or 0
-
-    total_cost = await db.scalar(
-        select(func.coalesce(func.sum(Execution.total_cost_cents), 0)).where(
-            Execution.user_id == user_id
-        )
+    # One round trip: each count is an independent scalar subquery
+    agent_count = (
+        select(func.count(Agent.id))
+        .where(Agent.created_by == user_id, Agent.deleted_at.is_(None))
+        .scalar_subquery()
     )
+    batch_count = (
+        select(func.count(BatchExecution.id))
+        .where(BatchExecution.user_id == user_id)
+        .scalar_subquery()
+    )
+    recent = _usage(user_id, start=seven_days_ago).subquery()
+    overall = _usage(user_id).subquery()
+    row = (
+        await db.execute(
+            select(
+                agent_count.label("agent_count"),
+                recent.c.executions.label("recent_execution_count"),
+                batch_count.label("batch_count"),
+                overall.c.cost_cents.label("total_cost"),
+            ).select_from(recent.join(overall, true()))
+        )
+    ).one()
 
     return {
-        "agent_count": agent_count,
-        "recent_execution_count": recent_exec_count,
-        "batch_count": batch_count,
-        "budget_consumed_cents": float(total_cost or 0),
+        "agent_count": row.agent_count or 0,
+        "recent_execution_count": int(row.recent_execution_count),
+        "batch_count": row.batch_count or 0,
+        "budget_consumed_cents": float(row.total_cost or 0),
     }
 
 
@@ -244,33 +276,18 @@ async def get_timeline(
     db: AsyncSession, user_id: uuid.UUID, days: int = 30
 ) -> list[dict]:
     """Daily execution and cost data for charts."""
-    since = date.today() - timedelta(days=days)
+    since = datetime.utcnow().date() - timedelta(days=days)
 
-    result = await db.execute(
-        select(
-            cast(Execution.created_at, Date).label("day"),
-            func.count(Execution.id).label("executions"),
-            func.count(case((Execution.status == "completed", 1))).label("successful"),
-            func.count(case((Execution.status == "failed", 1))).label("failed"),
-            func.coalesce(func.sum(Execution.total_cost_cents), 0).label("cost_cents"),
-            func.coalesce(func.sum(Execution.total_input_tokens), 0).label("input_tokens"),
-            func.coalesce(func.sum(Execution.total_output_tokens), 0).label("output_tokens"),
-        )
-        .where(
-            Execution.user_id == user_id,
-            cast(Execution.created_at, Date) >= since,
-        )
-        .group_by(cast(Execution.created_at, Date))
-        .order_by(cast(Execution.created_at, Date))
-    )
+    query = _usage(user_id, by="day", start=since)
+    result = await db.execute(query.order_by(query.selected_columns.key))
 
     rows = result.all()
     return [
         {
-            "date": row.day.isoformat(),
-            "executions": row.executions,
-            "successful": row.successful,
-            "failed": row.failed,
+            "date": row.key.isoformat(),
+            "executions": int(row.executions),
+            "successful": int(row.successful),
+            "failed": int(row.failed),
             "cost_cents": float(row.cost_cents),
             "input_tokens": int(row.input_tokens),
             "output_tokens": int(row.output_tokens),
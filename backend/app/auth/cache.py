@@ -0,0 +1,105 @@
+"""In-process cache of authenticated users, keyed by ``clerk_user_id``.
+
+get_current_user resolves the JWT subject to a ``CurrentUser`` (id and plan) without a
+database round-trip when the entry is cached. Each API worker holds its own bounded
+LRU with a short TTL; changes to a user are broadcast on a Redis channel so every
+worker evicts the entry, and the TTL bounds staleness if a message is missed.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+from redis.asyncio import Redis
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+INVALIDATION_CHANNEL = "auth:user-invalidate"
+RECONNECT_DELAY_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user as most routes need it; load ``User`` for the full row."""
+
+    id: uuid.UUID
+    clerk_user_id: str
+    # No plan column yet: every user is on the trial plan
+    plan: str = "trial"
+
+    @property
+    def is_admin(self) -> bool:
+        admins = {i.strip() for i in settings.admin_clerk_user_ids.split(",") if i.strip()}
+        return self.clerk_user_id in admins
+
+
+class TTLCache:
+    """Bounded in-process LRU whose entries expire after ``ttl_seconds`` (or their own TTL)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache = TTLCache(settings.user_cache_max_entries, settings.user_cache_ttl_seconds)
+
+
+async def invalidate_cached_user(redis: Redis, clerk_user_id: str) -> None:
+    """Evict a user from every worker's cache; call after updating or deleting a user."""
+    user_cache.evict(clerk_user_id)
+    await redis.publish(INVALIDATION_CHANNEL, clerk_user_id)
+
+
+async def listen_for_invalidations() -> None:
+    """Evict users announced on INVALIDATION_CHANNEL; runs for the worker's lifetime."""
+    while True:
+        redis = Redis.from_url(settings.redis_url, decode_responses=True)
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Entries cached while unsubscribed may have missed an invalidation
+                user_cache.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        user_cache.evict(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("user_cache_invalidation_listener_failed", error=str(e))
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+        finally:
+            await redis.aclose()
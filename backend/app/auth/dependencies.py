@@ -6,6 +6,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser, user_cache
 from app.auth.middleware import verify_clerk_token
 from app.auth.models import User
 from app.db.engine import get_db
@@ -17,18 +18,29 @@ logger = structlog.get_logger()
 security = HTTPBearer(auto_error=False)
 
 
+async def _resolve_user(db: AsyncSession, clerk_user_id: str) -> CurrentUser | None:
+    user = user_cache.get(clerk_user_id)
+    if user is None:
+        user_id = await db.scalar(select(User.id).where(User.clerk_user_id == clerk_user_id))
+        if user_id is None:
+            return None
+        user = CurrentUser(id=user_id, clerk_user_id=clerk_user_id)
+        user_cache.set(clerk_user_id, user)
+    return user
+
+
 async def get_current_user(
     payload: Annotated[dict, Depends(verify_clerk_token)],
     db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get or create user from Clerk JWT payload."""
+) -> CurrentUser:
+    """Get or create user from Clerk JWT payload (cached; see get_current_user_record)."""
     clerk_user_id = payload.get("sub")
     if not clerk_user_id:
         raise HTTPException(status_code=401, detail="Invalid token: missing sub")
 
-    user = await db.scalar(select(User).where(User.clerk_user_id == clerk_user_id))
+    current = await _resolve_user(db, clerk_user_id)
 
-    if not user:
+    if not current:
         # Auto-create user on first API call (webhook may not have fired yet)
         user = User(
             clerk_user_id=clerk_user_id,
@@ -38,7 +50,21 @@ async def get_current_user(
         db.add(user)
         await db.flush()
         logger.info("user_auto_created", clerk_user_id=clerk_user_id)
+        # Not cached until the request's transaction has committed the row
+        current = CurrentUser(id=user.id, clerk_user_id=clerk_user_id)
 
+    return current
+
+
+async def get_current_user_record(
+    current: Annotated[CurrentUser, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> User:
+    """The full ``User`` row, for the routes that need more than id and plan."""
+    user = await db.get(User, current.id)
+    if not user:
+        user_cache.evict(current.clerk_user_id)
+        raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
@@ -57,7 +83,7 @@ async def get_current_org(
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Security(security),
     db: Annotated[AsyncSession, Depends(get_db)] = None,
-) -> Optional[User]:
+) -> Optional[CurrentUser]:
     """Get current user if authenticated, otherwise return None."""
     if not credentials:
         return None
@@ -71,8 +97,7 @@ async def get_optional_user(
         if not clerk_user_id:
             return None
 
-        user = await db.scalar(select(User).where(User.clerk_user_id == clerk_user_id))
-        return user
+        return await _resolve_user(db, clerk_user_id)
     except HTTPException:
         return None
     except Exception as e:
@@ -1,30 +1,93 @@
+import asyncio
+import hashlib
 import json
+import time
 from typing import Annotated
 
-import httpx
 import jwt
 import structlog
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import PyJWKClient
+from jwt import PyJWK, PyJWKSet
 
+from app.auth.cache import TTLCache
 from app.config import settings
+from app.http_client import get_http_client
 
 logger = structlog.get_logger()
 
 security = HTTPBearer()
 
-# Lazy-initialized JWKS client (caches keys automatically)
-_jwk_client: PyJWKClient | None = None
+JWKS_FETCH_TIMEOUT_SECONDS = 5.0
 
 
-def _get_jwk_client() -> PyJWKClient:
-    global _jwk_client
-    if _jwk_client is None:
+class JWKSStore:
+    """Clerk's JWKS signing keys, fetched asynchronously with the shared httpx client.
+
+    Keys are refreshed in the background (``run_refresh_loop``); a token signed with an
+    unknown key id triggers one on-demand refresh, at most every
+    ``clerk_jwks_min_refresh_seconds``, shared by the requests waiting for it.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._keys: dict[str, PyJWK] = {}
+        self._lock = asyncio.Lock()
+        self._last_attempt = float("-inf")
+
+    async def refresh(self) -> None:
+        self._last_attempt = time.monotonic()
+        response = await get_http_client().get(self.url, timeout=JWKS_FETCH_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        keys = PyJWKSet.from_dict(response.json()).keys
+        self._keys = {
+            key.key_id: key
+            for key in keys
+            if key.key_id and key.public_key_use in ("sig", None)
+        }
+        logger.info("jwks_refreshed", url=self.url, keys=len(self._keys))
+
+    async def get_signing_key(self, kid: str | None) -> PyJWK:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        async with self._lock:
+            key = self._keys.get(kid)
+            elapsed = time.monotonic() - self._last_attempt
+            if key is None and elapsed >= settings.clerk_jwks_min_refresh_seconds:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    raise jwt.PyJWKClientError(f"Fail to fetch data from the url, err: {e}")
+                key = self._keys.get(kid)
+        if key is None:
+            raise jwt.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    async def run_refresh_loop(self) -> None:
+        """Refresh the keys every ``clerk_jwks_refresh_seconds``; runs for the API's lifetime."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("jwks_fetch_failed", url=self.url, error=str(e))
+            await asyncio.sleep(settings.clerk_jwks_refresh_seconds)
+
+
+# Lazy-initialized JWKS store
+_jwks_store: JWKSStore | None = None
+
+# Verified payloads by token hash: a token is verified once per worker, not per request
+_token_cache = TTLCache(settings.clerk_token_cache_max_entries, settings.clerk_token_cache_seconds)
+
+
+def get_jwks_store() -> JWKSStore:
+    global _jwks_store
+    if _jwks_store is None:
         jwks_url = f"https://{settings.clerk_domain}/.well-known/jwks.json"
-        _jwk_client = PyJWKClient(jwks_url, cache_keys=True, lifespan=3600)
-        logger.info("jwks_client_initialized", url=jwks_url)
-    return _jwk_client
+        _jwks_store = JWKSStore(jwks_url)
+        logger.info("jwks_store_initialized", url=jwks_url)
+    return _jwks_store
 
 
 async def verify_clerk_token(
@@ -52,9 +115,14 @@ async def verify_clerk_token(
             raise HTTPException(status_code=401, detail="Invalid token")
 
     # Production: full JWKS verification
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    payload = _token_cache.get(token_hash)
+    if payload is not None:
+        return payload
+
     try:
-        client = _get_jwk_client()
-        signing_key = client.get_signing_key_from_jwt(token)
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = await get_jwks_store().get_signing_key(kid)
 
         payload = jwt.decode(
             token,
@@ -69,6 +137,8 @@ async def verify_clerk_token(
         )
 
         logger.debug("token_verified", sub=payload.get("sub"), org_id=payload.get("org_id"))
+        if "exp" in payload:
+            _token_cache.set(token_hash, payload, ttl_seconds=payload["exp"] - time.time())
         return payload
 
     except jwt.ExpiredSignatureError:
@@ -0,0 +1,309 @@
+import csv
+import io
+import json
+import uuid
+from collections.abc import AsyncIterator
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.batches.models import BatchItem
+from app.db.engine import get_session_maker
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_COLUMNS = (
+    BatchItem.item_index,
+    BatchItem.status,
+    BatchItem.input_data,
+    BatchItem.output_data,
+    BatchItem.error_data,
+    BatchItem.cost_cents,
+    BatchItem.duration_ms,
+)
+
+
+def schema_properties(schema: dict | None) -> dict[str, dict]:
+    """Top-level properties (name -> JSON schema) of a recipe input/output schema."""
+    if not schema:
+        return {}
+    return dict(schema.get("properties") or {})
+
+
+async def discover_keys(db: AsyncSession, batch_id: uuid.UUID, column) -> list[str]:
+    """Distinct top-level keys of a JSONB column across a batch, computed in the database."""
+    key = func.jsonb_object_keys(column).label("key")
+    subquery = (
+        select(key)
+        .where(BatchItem.batch_id == batch_id, func.jsonb_typeof(column) == "object")
+        .subquery()
+    )
+    result = await db.scalars(select(subquery.c.key).distinct().order_by(subquery.c.key))
+    return list(result.all())
+
+
+async def iter_item_rows(batch_id: uuid.UUID) -> AsyncIterator[list]:
+    """Yield the batch's items in fixed-size chunks from a server-side cursor.
+
+    Uses its own session so the stream outlives the request-scoped one.
+    """
+    session_maker = get_session_maker()
+    async with session_maker() as db:
+        result = await db.stream(
+            select(*EXPORT_COLUMNS)
+            .where(BatchItem.batch_id == batch_id)
+            .order_by(BatchItem.item_index)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+
+def _item_dict(row) -> dict:
+    return {
+        "item_index": row.item_index,
+        "status": row.status,
+        "input_data": row.input_data,
+        "output_data": row.output_data,
+        "error_data": row.error_data,
+        "cost_cents": float(row.cost_cents),
+        "duration_ms": row.duration_ms,
+    }
+
+
+def _csv_value(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+async def stream_csv(
+    batch_id: uuid.UUID,
+    input_keys: list[str],
+    output_keys: list[str],
+) -> AsyncIterator[str]:
+    """Stream the batch as CSV, flattening input and output keys into columns."""
+    headers = (
+        ["item_index", "status"]
+        + [f"input_{k}" for k in input_keys]
+        + [f"output_{k}" for k in output_keys]
+        + ["cost_cents", "duration_ms"]
+    )
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=headers)
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    async for rows in iter_item_rows(batch_id):
+        for row in rows:
+            record: dict = {
+                "item_index": row.item_index,
+                "status": row.status,
+                "cost_cents": float(row.cost_cents),
+                "duration_ms": row.duration_ms,
+            }
+            input_data = row.input_data or {}
+            output_data = row.output_data if isinstance(row.output_data, dict) else {}
+            for k in input_keys:
+                record[f"input_{k}"] = _csv_value(input_data.get(k, ""))
+            for k in output_keys:
+                record[f"output_{k}"] = _csv_value(output_data.get(k, ""))
+            writer.writerow(record)
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+async def stream_jsonl(batch_id: uuid.UUID) -> AsyncIterator[str]:
+    """Stream the batch as JSON Lines (one item per line)."""
+    async for rows in iter_item_rows(batch_id):
+        yield "".join(json.dumps(_item_dict(row), default=str) + "\n" for row in rows)
+
+
+async def stream_json(batch_id: uuid.UUID) -> AsyncIterator[str]:
+    """Stream the batch as a single JSON array."""
+    yield "["
+    first = True
+    async for rows in iter_item_rows(batch_id):
+        parts = []
+        for row in rows:
+            parts.append(("\n" if first else ",\n") + json.dumps(_item_dict(row), default=str))
+            first = False
+        yield "".join(parts)
+    yield "\n]"
+
+
+# --- Columnar exports (Parquet / Arrow IPC) -------------------------------------
+
+
+def require_pyarrow() -> None:
+    """Raise ImportError early if the optional ``export`` extra is not installed."""
+    import pyarrow  # noqa: F401
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only sink that hands written bytes back in chunks.
+
+    Keeps a cumulative ``tell()`` so Parquet footer offsets stay correct even
+    though the buffered bytes are drained after every row group.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def arrow_type(schema: dict | None):
+    """Map a JSON schema fragment to an Arrow type (untyped values become JSON strings)."""
+    import pyarrow as pa
+
+    schema = schema or {}
+    json_type = schema.get("type")
+    if isinstance(json_type, list):
+        json_type = next((t for t in json_type if t != "null"), None)
+
+    if json_type == "integer":
+        return pa.int64()
+    if json_type == "number":
+        return pa.float64()
+    if json_type == "boolean":
+        return pa.bool_()
+    if json_type == "array" and schema.get("items"):
+        return pa.list_(arrow_type(schema["items"]))
+    if json_type == "object" and schema.get("properties"):
+        return pa.struct(
+            [pa.field(name, arrow_type(prop)) for name, prop in schema["properties"].items()]
+        )
+    return pa.string()
+
+
+def coerce_value(value, type_):
+    """Best-effort conversion of a JSON value to ``type_``; mismatches become null."""
+    import pyarrow as pa
+
+    if value is None:
+        return None
+    try:
+        if pa.types.is_string(type_):
+            return json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+        if pa.types.is_boolean(type_):
+            if isinstance(value, str):
+                return {"true": True, "false": False}.get(value.strip().lower())
+            return bool(value)
+        if pa.types.is_integer(type_):
+            return int(value)
+        if pa.types.is_floating(type_):
+            return float(value)
+        if pa.types.is_list(type_):
+            if not isinstance(value, list):
+                return None
+            return [coerce_value(v, type_.value_type) for v in value]
+        if pa.types.is_struct(type_):
+            if not isinstance(value, dict):
+                return None
+            return {f.name: coerce_value(value.get(f.name), f.type) for f in type_}
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def arrow_schema(input_fields: dict[str, dict], output_fields: dict[str, dict]):
+    """Arrow schema mirroring the CSV layout, with typed input/output columns."""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            pa.field("item_index", pa.int64()),
+            pa.field("status", pa.string()),
+            *[pa.field(f"input_{k}", arrow_type(v)) for k, v in input_fields.items()],
+            *[pa.field(f"output_{k}", arrow_type(v)) for k, v in output_fields.items()],
+            pa.field("error", pa.string()),
+            pa.field("cost_cents", pa.float64()),
+            pa.field("duration_ms", pa.int64()),
+        ]
+    )
+
+
+def _record_batch(rows, schema, input_fields: dict, output_fields: dict):
+    import pyarrow as pa
+
+    records = []
+    for row in rows:
+        input_data = row.input_data or {}
+        output_data = row.output_data if isinstance(row.output_data, dict) else {}
+        record = {
+            "item_index": row.item_index,
+            "status": row.status,
+            "error": json.dumps(row.error_data) if row.error_data else None,
+            "cost_cents": float(row.cost_cents),
+            "duration_ms": row.duration_ms,
+        }
+        for k in input_fields:
+            name = f"input_{k}"
+            record[name] = coerce_value(input_data.get(k), schema.field(name).type)
+        for k in output_fields:
+            name = f"output_{k}"
+            record[name] = coerce_value(output_data.get(k), schema.field(name).type)
+        records.append(record)
+    return pa.RecordBatch.from_pylist(records, schema=schema)
+
+
+async def stream_parquet(
+    batch_id: uuid.UUID,
+    input_fields: dict[str, dict],
+    output_fields: dict[str, dict],
+) -> AsyncIterator[bytes]:
+    """Stream the batch as a Parquet file, one row group per cursor partition."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(input_fields, output_fields)
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+    try:
+        async for rows in iter_item_rows(batch_id):
+            writer.write_batch(_record_batch(rows, schema, input_fields, output_fields))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+async def stream_arrow(
+    batch_id: uuid.UUID,
+    input_fields: dict[str, dict],
+    output_fields: dict[str, dict],
+) -> AsyncIterator[bytes]:
+    """Stream the batch in the Arrow IPC streaming format, one record batch per partition."""
+    import pyarrow as pa
+
+    schema = arrow_schema(input_fields, output_fields)
+    sink = _StreamSink()
+    writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        yield sink.drain()
+        async for rows in iter_item_rows(batch_id):
+            writer.write_batch(_record_batch(rows, schema, input_fields, output_fields))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import ForeignKey, Integer, Numeric, String, text
+from sqlalchemy import ForeignKey, Index, Integer, Numeric, String, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,9 +15,7 @@ class BatchExecution(Base, UUIDMixin, TimestampMixin):
     agent_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("agents.id"), nullable=False, index=True
     )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("users.id"), nullable=False, index=True
-    )
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     status: Mapped[str] = mapped_column(
         String(50), default="pending", server_default=text("'pending'")
@@ -25,6 +23,14 @@ class BatchExecution(Base, UUIDMixin, TimestampMixin):
     file_type: Mapped[str] = mapped_column(
         String(20), default="csv", server_default=text("'csv'")
     )
+    # "online" (one chat completion per item) or "offline" (provider Batch API)
+    mode: Mapped[str] = mapped_column(
+        String(20), default="online", server_default=text("'online'")
+    )
+    offline_step_index: Mapped[int] = mapped_column(
+        Integer, default=0, server_default=text("0")
+    )
+    provider_batch_id: Mapped[str | None] = mapped_column(String(255))
     total_items: Mapped[int] = mapped_column(Integer, nullable=False)
     completed_items: Mapped[int] = mapped_column(
         Integer, default=0, server_default=text("0")
@@ -46,6 +52,14 @@ class BatchExecution(Base, UUIDMixin, TimestampMixin):
     )
 
 
+# list_batches filters on the user and orders by newest first
+Index(
+    "ix_batch_executions_user_id_created_at",
+    BatchExecution.user_id,
+    BatchExecution.created_at.desc(),
+)
+
+
 class BatchItem(Base, UUIDMixin):
     __tablename__ = "batch_items"
 
@@ -61,9 +75,10 @@ class BatchItem(Base, UUIDMixin):
     input_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
     output_data: Mapped[dict | None] = mapped_column(JSONB)
     error_data: Mapped[dict | None] = mapped_column(JSONB)
-    execution_id: Mapped[uuid.UUID | None] = mapped_column(
-        ForeignKey("executions.id"), nullable=True
-    )
+    # Intermediate step outputs/usage while an offline batch moves stage by stage
+    offline_state: Mapped[dict | None] = mapped_column(JSONB)
+    # No foreign key: executions is partitioned and keyed by (id, created_at)
+    execution_id: Mapped[uuid.UUID | None] = mapped_column(nullable=True)
     cost_cents: Mapped[Decimal] = mapped_column(
         Numeric(10, 6), default=0, server_default=text("0")
     )
@@ -0,0 +1,510 @@
+"""Offline batch execution through the provider's asynchronous Batch API.
+
+An offline batch advances one recipe step at a time for all of its items:
+``transform`` steps are computed locally, ``llm_call`` steps are compiled into a
+JSONL file, submitted, polled until the provider finishes, and their results are
+stored in each item's ``offline_state`` before the next step is prepared. Once the
+last step is done, every surviving item gets a regular ``Execution`` record. Items
+are processed and committed in pages, so a large batch spans several jobs.
+"""
+
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime
+from decimal import Decimal
+
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.batches.models import BatchExecution, BatchItem
+from app.config import settings
+from app.db.hooks import commit
+from app.executions import service as execution_service
+from app.orchestrator.batch_api import PENDING_STATUSES, BatchRequest, OpenAIBatchClient
+from app.orchestrator.budget import BudgetMonitor
+from app.orchestrator.engine import ExecutionResult, OrchestrationEngine
+
+logger = structlog.get_logger()
+
+OFFLINE_STEP_TYPES = {"llm_call", "transform"}
+
+# Provider limit on requests per batch file
+MAX_OFFLINE_BATCH_SIZE = 50_000
+
+
+def unsupported_offline_steps(recipe: dict) -> list[str]:
+    """Names of recipe steps that cannot run through the Batch API."""
+    return [
+        step.get("name", step["id"])
+        for step in recipe.get("steps", [])
+        if step.get("type", "llm_call") not in OFFLINE_STEP_TYPES or step.get("vision")
+    ]
+
+
+def _new_state() -> dict:
+    return {
+        "steps": {},
+        "records": [],
+        "cost_usd": 0.0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_hits": 0,
+        "models_used": [],
+        "reserved_usd": 0.0,
+    }
+
+
+def _variables(item: BatchItem) -> dict:
+    return {**item.input_data, "steps": item.offline_state["steps"]}
+
+
+def _record_step(item: BatchItem, index: int, step: dict, output, **fields) -> None:
+    """Store a step output and its step record in the item's offline state."""
+    state = dict(item.offline_state)
+    state["steps"] = {**state["steps"], step["id"]: {"output": output}}
+    state["records"] = state["records"] + [
+        {
+            "step_index": index,
+            "step_name": step.get("name", f"step_{index}"),
+            "step_type": step.get("type", "llm_call"),
+            "status": "completed",
+            "output_data": output,
+            **fields,
+        }
+    ]
+    # Reassign so SQLAlchemy sees the JSONB change
+    item.offline_state = state
+
+
+def _fail_item(item: BatchItem, error: str, error_type: str = "OfflineBatchError") -> None:
+    item.status = "failed"
+    item.error_data = {"error": error, "type": error_type}
+    item.completed_at = datetime.utcnow()
+
+
+async def advance_offline_batch(
+    db: AsyncSession,
+    redis: Redis,
+    batch_id: uuid.UUID,
+    batch_client: OpenAIBatchClient | None = None,
+) -> int | None:
+    """Move an offline batch as far forward as possible without waiting.
+
+    Items are handled in pages of ``batch_offline_page_size`` and each page is
+    committed, leaving its progress in the items' ``offline_state``. Once the job has
+    spent ``batch_offline_job_seconds`` it stops between two pages and returns 0 so the
+    task re-enqueues itself and the next job resumes with the items left; a retried
+    job does not redo committed pages either.
+
+    Returns the number of seconds after which it should be polled again, or None
+    once the batch is finished.
+    """
+    batch = await db.scalar(
+        select(BatchExecution)
+        .options(selectinload(BatchExecution.agent))
+        .where(BatchExecution.id == batch_id)
+    )
+    if not batch:
+        raise ValueError(f"Batch {batch_id} not found")
+    if batch.completed_at is not None:
+        return None
+
+    recipe = await execution_service.resolve_recipe(db, batch.agent, batch.user_id)
+    steps = recipe.get("steps", [])
+    engine = OrchestrationEngine(redis)
+    batch_client = batch_client or OpenAIBatchClient()
+    deadline = time.monotonic() + settings.batch_offline_job_seconds
+
+    if batch.status == "pending":
+        batch.status = "processing"
+    await db.execute(
+        update(BatchItem)
+        .where(BatchItem.batch_id == batch_id, BatchItem.status == "pending")
+        .values(status="processing", offline_state=_new_state())
+        .execution_options(synchronize_session=False)
+    )
+    await commit(db)
+
+    while batch.offline_step_index < len(steps):
+        index = batch.offline_step_index
+        step = steps[index]
+        step_type = step.get("type", "llm_call")
+        remaining = (
+            BatchItem.status == "processing",
+            ~BatchItem.offline_state["steps"].has_key(step["id"]),
+        )
+
+        if step_type == "transform":
+
+            async def transform(page: list[BatchItem]) -> None:
+                for item in page:
+                    output = engine._execute_transform_step(step, _variables(item))
+                    _record_step(item, index, step, output, model_used=None, cost_cents=0)
+
+            if not await _each_page(db, batch.id, remaining, transform, deadline):
+                return 0
+            batch.offline_step_index += 1
+            await commit(db)
+            continue
+
+        if step_type not in OFFLINE_STEP_TYPES or step.get("vision"):
+
+            async def unsupported(page: list[BatchItem]) -> None:
+                for item in page:
+                    _fail_item(item, f"Step '{step['id']}' cannot run in offline mode")
+                await _count_failed(db, redis, batch, page)
+
+            if not await _each_page(db, batch.id, remaining, unsupported, deadline):
+                return 0
+            break
+
+        submitted = BatchItem.offline_state["submitted_step"].astext == step["id"]
+
+        if not batch.provider_batch_id:
+
+            async def prepare(page: list[BatchItem]) -> None:
+                await _prepare_llm_step(engine, batch_client, batch, page, index, step)
+
+            unprepared = (
+                *remaining,
+                BatchItem.offline_state["submitted_step"].astext.is_distinct_from(step["id"]),
+            )
+            if not await _each_page(db, batch.id, unprepared, prepare, deadline):
+                return 0
+
+            items_result = await db.scalars(
+                select(BatchItem)
+                .where(BatchItem.batch_id == batch.id, *remaining, submitted)
+                .order_by(BatchItem.item_index)
+            )
+            if await _submit_llm_step(engine, batch_client, batch, items_result.all(), step):
+                await commit(db)
+                return settings.batch_offline_poll_interval
+            batch.offline_step_index += 1
+            await commit(db)
+            continue
+
+        provider_batch = await batch_client.retrieve(batch.provider_batch_id)
+        if provider_batch.status in PENDING_STATUSES:
+            return settings.batch_offline_poll_interval
+
+        results = None
+        if provider_batch.status == "completed":
+            results = await batch_client.fetch_results(provider_batch)
+        else:
+            logger.error(
+                "provider_batch_failed",
+                provider_batch_id=provider_batch.id,
+                status=provider_batch.status,
+            )
+
+        async def collect(page: list[BatchItem]) -> None:
+            await _collect_llm_step(
+                engine, batch_client, batch, provider_batch, results, page, index, step
+            )
+            await _count_failed(db, redis, batch, page)
+
+        if not await _each_page(db, batch.id, (*remaining, submitted), collect, deadline):
+            return 0
+        batch.provider_batch_id = None
+        batch.offline_step_index += 1
+        await commit(db)
+
+    async def finalize(page: list[BatchItem]) -> None:
+        await _finalize(db, redis, engine, batch, recipe, page)
+
+    processing = (BatchItem.status == "processing",)
+    if not await _each_page(db, batch.id, processing, finalize, deadline):
+        return 0
+    return None
+
+
+async def fail_offline_batch(
+    db: AsyncSession,
+    redis: Redis,
+    batch_id: uuid.UUID,
+    error: str,
+    batch_client: OpenAIBatchClient | None = None,
+) -> None:
+    """Give up on an offline batch: cancel its provider batch and fail unfinished items.
+
+    Used once advancing the batch has failed too many times, so it does not stay
+    "processing" forever with an orphaned provider batch.
+    """
+    from app.batches.service import _update_batch_progress
+
+    batch = await db.get(BatchExecution, batch_id)
+    if not batch or batch.completed_at is not None:
+        return
+
+    items_result = await db.scalars(
+        select(BatchItem).where(
+            BatchItem.batch_id == batch_id,
+            BatchItem.status.in_(("pending", "processing")),
+        )
+    )
+    items = list(items_result.all())
+
+    if batch.provider_batch_id:
+        try:
+            await (batch_client or OpenAIBatchClient()).cancel(batch.provider_batch_id)
+        except Exception as e:
+            logger.warning(
+                "provider_batch_cancel_failed",
+                provider_batch_id=batch.provider_batch_id,
+                error=str(e),
+            )
+        # Release the budget reserved for the requests of the current step
+        in_flight = [
+            item
+            for item in items
+            if item.status == "processing"
+            and item.offline_state
+            and not any(
+                record["step_index"] == batch.offline_step_index
+                for record in item.offline_state["records"]
+            )
+        ]
+        reserved = sum(item.offline_state.get("reserved_usd", 0.0) for item in in_flight)
+        await BudgetMonitor(redis).record_actual(reserved, 0.0)
+        batch.provider_batch_id = None
+
+    for item in items:
+        _fail_item(item, error)
+
+    await db.flush()
+    await _update_batch_progress(db, redis, batch.id, failed=len(items))
+    logger.error("offline_batch_failed", batch_id=str(batch_id), error=error)
+
+
+async def _each_page(
+    db: AsyncSession,
+    batch_id: uuid.UUID,
+    conditions: tuple,
+    handle: Callable[[list[BatchItem]], Awaitable[None]],
+    deadline: float,
+) -> bool:
+    """Call ``handle`` on the matching items page by page, committing each page.
+
+    Pages are read by keyset on ``item_index``. Returns False if the deadline passed
+    before every page was handled.
+    """
+    after = -1
+    while time.monotonic() < deadline:
+        items_result = await db.scalars(
+            select(BatchItem)
+            .where(BatchItem.batch_id == batch_id, BatchItem.item_index > after, *conditions)
+            .order_by(BatchItem.item_index)
+            .limit(settings.batch_offline_page_size)
+        )
+        page = list(items_result.all())
+        if not page:
+            return True
+        await handle(page)
+        await commit(db)
+        after = page[-1].item_index
+    return False
+
+
+async def _count_failed(
+    db: AsyncSession, redis: Redis, batch: BatchExecution, page: list[BatchItem]
+) -> None:
+    """Add the page's failed items to the batch counters."""
+    from app.batches.service import _update_batch_progress
+
+    failed = sum(1 for item in page if item.status == "failed")
+    if failed:
+        await db.flush()
+        await _update_batch_progress(db, redis, batch.id, failed=failed)
+
+
+async def _prepare_llm_step(
+    engine: OrchestrationEngine,
+    batch_client: OpenAIBatchClient,
+    batch: BatchExecution,
+    items: list[BatchItem],
+    index: int,
+    step: dict,
+) -> None:
+    """Answer what we can from the cache and mark the rest for submission."""
+    for item in items:
+        # "trial" matches the default plan used by run_execution
+        messages, model, input_tokens = engine.prepare_llm_request(step, _variables(item), "trial")
+
+        if step.get("cacheable", True):
+            cached = await engine.cache.get(
+                model=model,
+                messages=messages,
+                recipe_id=batch.agent.recipe_slug,
+                step_id=step["id"],
+                input_text=messages[-1]["content"] if messages else None,
+            )
+            if cached.hit:
+                _record_step(
+                    item, index, step, cached.data, model_used=model, cost_cents=0, cache_hit=True
+                )
+                item.offline_state = {
+                    **item.offline_state,
+                    "cache_hits": item.offline_state["cache_hits"] + 1,
+                }
+                continue
+
+        estimated = batch_client.calculate_cost(model, input_tokens, step.get("max_tokens", 500))
+        item.offline_state = {
+            **item.offline_state,
+            "reserved_usd": estimated,
+            "model": model,
+            "submitted_step": step["id"],
+        }
+
+
+async def _submit_llm_step(
+    engine: OrchestrationEngine,
+    batch_client: OpenAIBatchClient,
+    batch: BatchExecution,
+    items: Sequence[BatchItem],
+    step: dict,
+) -> bool:
+    """Submit the items prepared for ``step``. Returns True if anything was submitted."""
+    if not items:
+        return False
+
+    requests: list[BatchRequest] = []
+    for item in items:
+        messages, model, _ = engine.prepare_llm_request(step, _variables(item), "trial")
+        body: dict = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": step.get("max_tokens", 500),
+            "temperature": step.get("temperature", 0.2),
+        }
+        if step.get("response_format") == "json_object":
+            body["response_format"] = {"type": "json_object"}
+        requests.append(BatchRequest(custom_id=str(item.id), body=body))
+
+    await engine.budget.check_and_reserve(sum(item.offline_state["reserved_usd"] for item in items))
+    batch.provider_batch_id = await batch_client.submit(
+        requests,
+        metadata={"batch_id": str(batch.id), "step_id": step["id"]},
+    )
+    return True
+
+
+async def _collect_llm_step(
+    engine: OrchestrationEngine,
+    batch_client: OpenAIBatchClient,
+    batch: BatchExecution,
+    provider_batch,
+    results: dict | None,
+    items: list[BatchItem],
+    index: int,
+    step: dict,
+) -> None:
+    """Apply a finished provider batch's results to a page of the items in flight.
+
+    ``results`` is None when the provider batch did not complete: the items fail.
+    """
+    reserved = sum(item.offline_state.get("reserved_usd", 0.0) for item in items)
+
+    if results is None:
+        await engine.budget.record_actual(reserved, 0.0)
+        for item in items:
+            _fail_item(item, f"Provider batch {provider_batch.id} {provider_batch.status}")
+        return
+
+    actual_total = 0.0
+
+    for item in items:
+        result = results.get(str(item.id))
+        if result is None or result.error is not None:
+            _fail_item(item, result.error if result else "Missing result in provider batch")
+            continue
+
+        model = item.offline_state["model"]
+        cost = batch_client.calculate_cost(
+            model, result.input_tokens, result.output_tokens, result.cached_tokens
+        )
+        actual_total += cost
+        output = engine.parse_llm_output(step, result.content)
+
+        if step.get("cacheable", True):
+            messages, _, _ = engine.prepare_llm_request(step, _variables(item), "trial")
+            await engine.cache.set(
+                model=model,
+                messages=messages,
+                response_data=output,
+                recipe_id=batch.agent.recipe_slug,
+                step_id=step["id"],
+                input_text=messages[-1]["content"] if messages else None,
+            )
+
+        _record_step(
+            item,
+            index,
+            step,
+            output,
+            model_used=model,
+            input_tokens=result.input_tokens,
+            output_tokens=result.output_tokens,
+            cached_tokens=result.cached_tokens,
+            cost_cents=round(cost * 100, 6),
+            cache_hit=False,
+        )
+        state = item.offline_state
+        item.offline_state = {
+            **state,
+            "cost_usd": state["cost_usd"] + cost,
+            "input_tokens": state["input_tokens"] + result.input_tokens,
+            "output_tokens": state["output_tokens"] + result.output_tokens,
+            "models_used": sorted(set(state["models_used"]) | {model}),
+        }
+
+    await engine.budget.record_actual(reserved, actual_total)
+
+
+async def _finalize(
+    db: AsyncSession,
+    redis: Redis,
+    engine: OrchestrationEngine,
+    batch: BatchExecution,
+    recipe: dict,
+    items: list[BatchItem],
+) -> None:
+    """Turn a page of surviving items into executions; the last page closes the batch."""
+    from app.batches.service import _update_batch_progress
+
+    cost_cents = Decimal(0)
+
+    for item in items:
+        state = item.offline_state
+        result = ExecutionResult()
+        result.steps = state["records"]
+        result.output = engine.build_output(recipe, _variables(item))
+        result.total_cost_usd = state["cost_usd"]
+        result.total_input_tokens = state["input_tokens"]
+        result.total_output_tokens = state["output_tokens"]
+        result.cache_hits = state["cache_hits"]
+        result.models_used = state["models_used"]
+
+        execution = await execution_service.create_execution(
+            db=db,
+            agent_id=batch.agent_id,
+            user_id=batch.user_id,
+            input_data=item.input_data,
+            triggered_by="batch",
+        )
+        await execution_service.record_execution_result(db, redis, execution, result)
+
+        item.status = "completed"
+        item.output_data = execution.output_data
+        item.execution_id = execution.id
+        item.cost_cents = execution.total_cost_cents
+        item.completed_at = datetime.utcnow()
+        cost_cents += execution.total_cost_cents
+
+    await db.flush()
+    await _update_batch_progress(db, redis, batch.id, completed=len(items), cost_cents=cost_cents)
@@ -2,13 +2,13 @@ import uuid
 from typing import Annotated
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.batches import service
 from app.batches.schemas import (
     BatchCreate,
@@ -17,6 +17,7 @@ from app.batches.schemas import (
     BatchResponse,
 )
 from app.db.engine import get_db
+from app.db.pagination import InvalidCursorError
 
 logger = structlog.get_logger()
 
@@ -36,7 +37,7 @@ async def get_redis() -> Redis:
 @router.post("", response_model=BatchResponse, status_code=201)
 async def create_batch(
     body: BatchCreate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     redis: Annotated[Redis, Depends(get_redis)],
 ):
@@ -48,6 +49,7 @@ async def create_batch(
             name=body.name,
             items=body.items,
             file_type=body.file_type,
+            mode=body.mode,
         )
         await db.commit()
 
@@ -55,8 +57,11 @@ async def create_batch(
         batch = await service.get_batch(db, batch.id, user.id)
 
         # Enqueue items for processing
-        item_ids = [item.id for item in batch.items]
-        await service.enqueue_batch(redis, batch.id, item_ids)
+        if batch.mode == "offline":
+            await service.enqueue_offline_batch(redis, batch.id)
+        else:
+            item_ids = [item.id for item in batch.items]
+            await service.enqueue_batch(redis, batch.id, batch.user_id, item_ids)
 
         return _to_response(batch)
     except ValueError as e:
@@ -65,17 +70,27 @@ async def create_batch(
 
 @router.get("", response_model=list[BatchResponse])
 async def list_batches(
-    user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
 ):
-    batches = await service.list_batches(db, user.id)
+    """List batches, newest first. The next page's cursor is in the X-Next-Cursor header."""
+    try:
+        batches, next_cursor = await service.list_batches(db, user.id, limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [_to_response(b) for b in batches]
 
 
 @router.get("/{batch_id}", response_model=BatchDetailResponse)
 async def get_batch(
     batch_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
@@ -86,28 +101,38 @@ async def get_batch(
     return _to_detail_response(batch)
 
 
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
 @router.get("/{batch_id}/export")
 async def export_batch(
     batch_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
-    format: str = Query("csv", pattern="^(csv|json)$"),
+    format: str = Query("csv", pattern="^(csv|json|jsonl|parquet|arrow)$"),
 ):
     try:
         content = await service.export_batch(db, batch_id, user.id, fmt=format)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
-
-    if format == "json":
-        return PlainTextResponse(
-            content,
-            media_type="application/json",
-            headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.json"'},
+    except ImportError:
+        raise HTTPException(
+            status_code=501,
+            detail=f"{format} export requires the 'export' extra (pyarrow)",
         )
-    return PlainTextResponse(
+
+    return StreamingResponse(
         content,
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.csv"'},
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="batch-{batch_id}.{format}"'
+        },
     )
 
 
@@ -123,6 +148,7 @@ def _to_response(batch) -> BatchResponse:
         name=batch.name,
         status=batch.status,
         file_type=batch.file_type,
+        mode=batch.mode,
         total_items=batch.total_items,
         completed_items=batch.completed_items,
         failed_items=batch.failed_items,
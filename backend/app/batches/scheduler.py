@@ -0,0 +1,233 @@
+"""Per-user fair-share scheduling of batch work.
+
+Work units are not handed to ARQ in submission order. Each batch keeps its own
+queue of units in Redis and the batch queue only receives anonymous "slot" jobs,
+one per unit. Whenever a slot runs it asks the scheduler for the next unit, which
+is picked round-robin across users with active batches, then round-robin across
+that user's batches. A 10k-row batch therefore shares the batch workers with
+everyone else instead of starving them.
+
+A popped unit is not gone: it moves atomically into an in-flight lease that the slot
+acknowledges once its work is committed. A failed slot requeues its unit, and leases
+of crashed workers are reaped once they expire (see ``expired_leases``).
+
+All keys share the ``{fair}`` hash tag and every script receives the keys it touches
+in KEYS, so the scheduler also runs on Redis Cluster.
+"""
+
+import json
+import time
+import uuid
+from dataclasses import dataclass
+
+from redis.asyncio import Redis
+
+KEY_PREFIX = "{fair}"
+
+# Unit meaning "claim the next chunk of pending items" (chunked batch mode)
+CHUNK_UNIT = "chunk"
+
+# Queued units carry their retry count after this separator ("<unit>|<attempt>")
+_ATTEMPT_SEPARATOR = "|"
+
+# KEYS: users ring, users set, user's batch ring, user's batch set, batch units
+# ARGV: user_id, batch_id, units...
+_PUSH_SCRIPT = """
+redis.call("RPUSH", KEYS[5], unpack(ARGV, 3))
+if redis.call("SADD", KEYS[4], ARGV[2]) == 1 then
+    redis.call("RPUSH", KEYS[3], ARGV[2])
+end
+if redis.call("SADD", KEYS[2], ARGV[1]) == 1 then
+    redis.call("RPUSH", KEYS[1], ARGV[1])
+end
+return redis.call("LLEN", KEYS[5])
+"""
+
+# KEYS: users ring, users set, user's batch ring, user's batch set, batch units,
+#       in-flight hash, lease deadlines
+# ARGV: user_id, batch_id, lease_id, lease deadline
+# Moves the batch's next unit into an in-flight lease and unlinks the batch (and the
+# user) from the rings once they have nothing left. Returns the unit or nil.
+_CLAIM_SCRIPT = """
+local unit = redis.call("LPOP", KEYS[5])
+if redis.call("LLEN", KEYS[5]) == 0 then
+    redis.call("LREM", KEYS[3], 0, ARGV[2])
+    redis.call("SREM", KEYS[4], ARGV[2])
+    if redis.call("LLEN", KEYS[3]) == 0 then
+        redis.call("LREM", KEYS[1], 0, ARGV[1])
+        redis.call("SREM", KEYS[2], ARGV[1])
+    end
+end
+if not unit then
+    return nil
+end
+redis.call("HSET", KEYS[6], ARGV[3], cjson.encode({ARGV[1], ARGV[2], unit}))
+redis.call("ZADD", KEYS[7], ARGV[4], ARGV[3])
+return unit
+"""
+
+# KEYS: users ring, users set, user's batch ring   ARGV: user_id
+_DROP_USER_SCRIPT = """
+if redis.call("LLEN", KEYS[3]) == 0 then
+    redis.call("LREM", KEYS[1], 0, ARGV[1])
+    redis.call("SREM", KEYS[2], ARGV[1])
+end
+return 0
+"""
+
+# KEYS: in-flight hash, lease deadlines   ARGV: lease_id
+_ACK_SCRIPT = """
+redis.call("ZREM", KEYS[2], ARGV[1])
+return redis.call("HDEL", KEYS[1], ARGV[1])
+"""
+
+# KEYS: users ring, users set, user's batch ring, user's batch set, batch units,
+#       in-flight hash, lease deadlines
+# ARGV: user_id, batch_id, lease_id, queued unit
+# Puts a leased unit back at the front of its batch queue, unless the lease is gone
+# (already acknowledged or requeued). Returns 1 if requeued.
+_REQUEUE_SCRIPT = """
+if redis.call("HDEL", KEYS[6], ARGV[3]) == 0 then
+    return 0
+end
+redis.call("ZREM", KEYS[7], ARGV[3])
+redis.call("LPUSH", KEYS[5], ARGV[4])
+if redis.call("SADD", KEYS[4], ARGV[2]) == 1 then
+    redis.call("RPUSH", KEYS[3], ARGV[2])
+end
+if redis.call("SADD", KEYS[2], ARGV[1]) == 1 then
+    redis.call("RPUSH", KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _parse_unit(queued: str) -> tuple[str, int]:
+    unit, _, attempt = queued.partition(_ATTEMPT_SEPARATOR)
+    return unit, int(attempt or 0)
+
+
+@dataclass
+class Lease:
+    """A work unit taken by a slot, kept in flight until acknowledged or requeued."""
+
+    id: str
+    user_id: str
+    batch_id: str
+    unit: str
+    # Number of earlier attempts that failed or were reaped
+    attempt: int = 0
+
+
+class FairBatchScheduler:
+    """Redis-backed round-robin of batch work units across users and batches."""
+
+    def __init__(self, redis: Redis, prefix: str = KEY_PREFIX):
+        self.redis = redis
+        self.prefix = prefix
+        self.users_key = f"{prefix}:users"
+        self.users_set_key = f"{prefix}:users_set"
+        self.inflight_key = f"{prefix}:inflight"
+        self.leases_key = f"{prefix}:leases"
+
+    def _user_ring_key(self, user_id: str) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    def _keys(self, user_id: str, batch_id: str) -> list[str]:
+        return [
+            self.users_key,
+            self.users_set_key,
+            self._user_ring_key(user_id),
+            f"{self.prefix}:user_batches:{user_id}",
+            f"{self.prefix}:batch:{batch_id}",
+        ]
+
+    def _lease_keys(self, user_id: str, batch_id: str) -> list[str]:
+        return self._keys(user_id, batch_id) + [self.inflight_key, self.leases_key]
+
+    async def push(self, user_id: str, batch_id: str, units: list[str]) -> int:
+        """Queue work units for a batch. Returns the batch's queue length."""
+        if not units:
+            return 0
+        keys = self._keys(user_id, batch_id)
+        return await self.redis.eval(_PUSH_SCRIPT, len(keys), *keys, user_id, batch_id, *units)
+
+    async def pop(self, lease_seconds: float) -> Lease | None:
+        """Lease the next unit in fair order; it must be acknowledged within ``lease_seconds``.
+
+        Rotating the rings and claiming the unit are separate steps (a script only
+        touches the keys it is given), so concurrent pops may find a batch already
+        drained; the claim script then just unlinks it.
+        """
+        for _ in range(await self.redis.llen(self.users_key)):
+            user_id = await self.redis.rpoplpush(self.users_key, self.users_key)
+            if user_id is None:
+                return None
+            user_id = _decode(user_id)
+            ring = self._user_ring_key(user_id)
+
+            for _ in range(await self.redis.llen(ring)):
+                batch_id = await self.redis.rpoplpush(ring, ring)
+                if batch_id is None:
+                    break
+                batch_id = _decode(batch_id)
+                lease_id = uuid.uuid4().hex
+                keys = self._lease_keys(user_id, batch_id)
+                queued = await self.redis.eval(
+                    _CLAIM_SCRIPT,
+                    len(keys),
+                    *keys,
+                    user_id,
+                    batch_id,
+                    lease_id,
+                    time.time() + lease_seconds,
+                )
+                if queued is not None:
+                    unit, attempt = _parse_unit(_decode(queued))
+                    return Lease(lease_id, user_id, batch_id, unit, attempt)
+
+            await self.redis.eval(
+                _DROP_USER_SCRIPT, 3, self.users_key, self.users_set_key, ring, user_id
+            )
+        return None
+
+    async def ack(self, lease: Lease) -> None:
+        """The unit's work is committed: forget the lease."""
+        await self.redis.eval(_ACK_SCRIPT, 2, self.inflight_key, self.leases_key, lease.id)
+
+    async def requeue(self, lease: Lease) -> bool:
+        """Put a leased unit back in its batch queue, counting one more attempt.
+
+        Returns False if the lease was already acknowledged or requeued.
+        """
+        keys = self._lease_keys(lease.user_id, lease.batch_id)
+        queued = f"{lease.unit}{_ATTEMPT_SEPARATOR}{lease.attempt + 1}"
+        requeued = await self.redis.eval(
+            _REQUEUE_SCRIPT, len(keys), *keys, lease.user_id, lease.batch_id, lease.id, queued
+        )
+        return bool(requeued)
+
+    async def expired_leases(self, now: float | None = None) -> list[Lease]:
+        """Leases past their deadline: their slot's worker died or hung."""
+        now = time.time() if now is None else now
+        lease_ids = [
+            _decode(lease_id)
+            for lease_id in await self.redis.zrangebyscore(self.leases_key, "-inf", now)
+        ]
+        if not lease_ids:
+            return []
+        payloads = await self.redis.hmget(self.inflight_key, lease_ids)
+        leases = []
+        for lease_id, payload in zip(lease_ids, payloads, strict=True):
+            if payload is None:
+                # Acknowledged between the two reads; drop the stale deadline
+                await self.redis.zrem(self.leases_key, lease_id)
+                continue
+            user_id, batch_id, queued = json.loads(payload)
+            unit, attempt = _parse_unit(queued)
+            leases.append(Lease(lease_id, user_id, batch_id, unit, attempt))
+        return leases
@@ -8,6 +8,7 @@ class BatchCreate(BaseModel):
     name: str
     items: list[dict]
     file_type: str = "csv"
+    mode: str = "online"  # "online" or "offline" (provider Batch API, ~50% cheaper)
 
 
 class BatchItemResponse(BaseModel):
@@ -32,6 +33,7 @@ class BatchResponse(BaseModel):
     name: str
     status: str
     file_type: str
+    mode: str = "online"
     total_items: int
     completed_items: int
     failed_items: int
@@ -1,19 +1,29 @@
-import csv
-import io
-import json
+import asyncio
+import math
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 import structlog
 from redis.asyncio import Redis
-from sqlalchemy import select, func, update
+from sqlalchemy import case, select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.agents.models import Agent
+from app.analytics.cache import invalidate_user_analytics
+from app.batches import export, offline
 from app.batches.models import BatchExecution, BatchItem
+from app.batches.scheduler import CHUNK_UNIT, FairBatchScheduler
+from app.config import settings
+from app.db.hooks import after_commit
+from app.db.pagination import keyset_page, split_page
 from app.executions import service as execution_service
+from app.orchestrator.engine import OrchestrationEngine
+from app.orchestrator.llm_client import get_llm_client
+from app.orchestrator.packing import PromptPacker
+from app.worker.queues import BATCH_QUEUE
 
 logger = structlog.get_logger()
 
@@ -27,12 +37,16 @@ async def create_batch(
     name: str,
     items: list[dict],
     file_type: str = "csv",
+    mode: str = "online",
 ) -> BatchExecution:
     """Create a batch execution with all items."""
+    if mode not in ("online", "offline"):
+        raise ValueError(f"Unknown batch mode: {mode}")
+    max_size = offline.MAX_OFFLINE_BATCH_SIZE if mode == "offline" else MAX_BATCH_SIZE
     if len(items) == 0:
         raise ValueError("Batch must contain at least 1 item")
-    if len(items) > MAX_BATCH_SIZE:
-        raise ValueError(f"Batch exceeds maximum of {MAX_BATCH_SIZE} items")
+    if len(items) > max_size:
+        raise ValueError(f"Batch exceeds maximum of {max_size} items")
 
     # Verify agent belongs to user
     agent = await db.scalar(
@@ -41,12 +55,21 @@ async def create_batch(
     if not agent:
         raise ValueError("Agent not found")
 
+    if mode == "offline":
+        recipe = await execution_service.resolve_recipe(db, agent, user_id)
+        unsupported = offline.unsupported_offline_steps(recipe)
+        if unsupported:
+            raise ValueError(
+                f"Offline mode does not support these steps: {', '.join(unsupported)}"
+            )
+
     batch = BatchExecution(
         agent_id=agent_id,
         user_id=user_id,
         name=name,
         status="pending",
         file_type=file_type,
+        mode=mode,
         total_items=len(items),
     )
     db.add(batch)
@@ -68,29 +91,56 @@ async def create_batch(
         batch_id=str(batch.id),
         total_items=len(items),
         agent_id=str(agent_id),
+        mode=mode,
     )
     return batch
 
 
-async def enqueue_batch(redis: Redis, batch_id: uuid.UUID, item_ids: list[uuid.UUID]) -> None:
-    """Enqueue all batch items as ARQ jobs."""
+async def enqueue_batch(
+    redis: Redis,
+    batch_id: uuid.UUID,
+    user_id: uuid.UUID,
+    item_ids: list[uuid.UUID],
+) -> None:
+    """Queue batch work for fair-share scheduling on the batch queue.
+
+    Work units go to the user's fair-share ring (see ``app.batches.scheduler``) and
+    one ``run_batch_slot_task`` job per unit is enqueued on ``BATCH_QUEUE``. With
+    ``settings.batch_chunk_size > 1`` a unit is a chunk that claims its own pending
+    items when it runs; otherwise it is a single item id.
+    """
     from arq.connections import ArqRedis
 
-    arq_redis = ArqRedis(redis)
-    for item_id in item_ids:
-        await arq_redis.enqueue_job(
-            "process_batch_item_task",
-            str(batch_id),
-            str(item_id),
-        )
+    arq_redis = ArqRedis(redis.connection_pool)
+    chunk_size = settings.batch_chunk_size
+    if chunk_size > 1:
+        units = [CHUNK_UNIT] * math.ceil(len(item_ids) / chunk_size)
+    else:
+        units = [str(item_id) for item_id in item_ids]
+
+    await FairBatchScheduler(redis).push(str(user_id), str(batch_id), units)
+    for _ in units:
+        await arq_redis.enqueue_job("run_batch_slot_task", _queue_name=BATCH_QUEUE)
 
     logger.info(
         "batch_enqueued",
         batch_id=str(batch_id),
-        jobs=len(item_ids),
+        items=len(item_ids),
+        jobs=len(units),
     )
 
 
+async def enqueue_offline_batch(redis: Redis, batch_id: uuid.UUID) -> None:
+    """Start an offline batch: its job re-enqueues itself until the batch is done."""
+    from arq.connections import ArqRedis
+
+    arq_redis = ArqRedis(redis.connection_pool)
+    await arq_redis.enqueue_job(
+        "advance_offline_batch_task", str(batch_id), _queue_name=BATCH_QUEUE
+    )
+    logger.info("batch_enqueued", batch_id=str(batch_id), mode="offline")
+
+
 async def process_batch_item(
     db: AsyncSession,
     redis: Redis,
@@ -109,21 +159,15 @@ async def process_batch_item(
         logger.info("batch_item_already_processed", item_id=str(item_id))
         return
 
-    # Lock batch row to prevent concurrent counter updates
+    # No row lock here: counters are updated atomically once the item is done
     batch = await db.scalar(
         select(BatchExecution)
-        .with_for_update()
         .options(selectinload(BatchExecution.agent))
         .where(BatchExecution.id == batch_id)
     )
     if not batch:
         raise ValueError(f"Batch {batch_id} not found")
 
-    # Mark batch as processing if still pending
-    if batch.status == "pending":
-        batch.status = "processing"
-        await db.flush()
-
     # Mark item as processing
     item.status = "processing"
     await db.flush()
@@ -148,14 +192,10 @@ async def process_batch_item(
         item.duration_ms = execution.duration_ms
         item.completed_at = datetime.utcnow()
 
-        batch.completed_items += 1
-        batch.total_cost_cents += execution.total_cost_cents
-
     except Exception as e:
         item.status = "failed"
         item.error_data = {"error": str(e), "type": type(e).__name__}
         item.completed_at = datetime.utcnow()
-        batch.failed_items += 1
 
         logger.error(
             "batch_item_failed",
@@ -164,49 +204,283 @@ async def process_batch_item(
             error=str(e),
         )
 
-    # Check if batch is complete
-    processed = batch.completed_items + batch.failed_items
-    if processed >= batch.total_items:
-        if batch.failed_items == 0:
-            batch.status = "completed"
-        elif batch.completed_items == 0:
-            batch.status = "failed"
-        else:
-            batch.status = "partial_failure"
-        batch.completed_at = datetime.utcnow()
-
-        logger.info(
-            "batch_completed",
-            batch_id=str(batch_id),
-            status=batch.status,
-            completed=batch.completed_items,
-            failed=batch.failed_items,
+    await db.flush()
+
+    # Send webhook if configured
+    if item.status in ("completed", "failed"):
+        await _send_item_webhook(batch, item)
+
+    # Last statement before commit, so the batch row lock is held only briefly
+    if item.status == "completed":
+        await _update_batch_progress(
+            db, redis, batch_id, completed=1, cost_cents=item.cost_cents
         )
+    else:
+        await _update_batch_progress(db, redis, batch_id, failed=1)
 
+
+async def fail_batch_unit(
+    db: AsyncSession,
+    redis: Redis,
+    batch_id: uuid.UUID,
+    unit: str,
+    error: str,
+) -> int:
+    """Fail the items of a work unit whose every attempt failed, so the batch can close.
+
+    A chunk unit fails the next ``batch_chunk_size`` pending items, as it would have
+    claimed them. Returns the number of items failed.
+    """
+    query = select(BatchItem).where(
+        BatchItem.batch_id == batch_id, BatchItem.status.in_(("pending", "processing"))
+    )
+    if unit == CHUNK_UNIT:
+        query = (
+            query.order_by(BatchItem.item_index)
+            .limit(settings.batch_chunk_size)
+            .with_for_update(skip_locked=True)
+        )
+    else:
+        query = query.where(BatchItem.id == uuid.UUID(unit))
+    items = list((await db.scalars(query)).all())
+    if not items:
+        return 0
+
+    for item in items:
+        item.status = "failed"
+        item.error_data = {"error": error, "type": "BatchUnitError"}
+        item.completed_at = datetime.utcnow()
     await db.flush()
+    await _update_batch_progress(db, redis, batch_id, failed=len(items))
+    logger.error("batch_unit_failed", batch_id=str(batch_id), unit=unit, items=len(items))
+    return len(items)
 
-    # Send webhook if configured
-    if batch.agent and batch.agent.webhook_url and item.status in ("completed", "failed"):
-        try:
-            from app.webhooks.sender import send_webhook
-
-            await send_webhook(
-                webhook_url=batch.agent.webhook_url,
-                payload={
-                    "event": "batch_item.completed",
-                    "agent_id": str(batch.agent_id),
-                    "batch_id": str(batch_id),
-                    "item_index": item.item_index,
-                    "execution_id": str(item.execution_id) if item.execution_id else None,
-                    "status": item.status,
-                    "output_data": item.output_data,
-                    "cost_cents": float(item.cost_cents),
-                    "duration_ms": item.duration_ms,
-                    "timestamp": datetime.utcnow().isoformat(),
-                },
+
+async def process_batch_chunk(
+    db: AsyncSession,
+    redis: Redis,
+    batch_id: uuid.UUID,
+    chunk_size: int | None = None,
+) -> int:
+    """Claim up to ``chunk_size`` pending items of a batch and process them together.
+
+    Items are claimed with ``FOR UPDATE SKIP LOCKED`` so concurrent chunk jobs never
+    pick the same rows. The agent and recipe are resolved once per chunk, items run
+    concurrently through the engine (bounded by ``settings.batch_chunk_concurrency``)
+    and all results are written in the caller's transaction.
+
+    Returns the number of items processed (0 when nothing was left to claim).
+    """
+    chunk_size = chunk_size or settings.batch_chunk_size
+
+    batch = await db.scalar(
+        select(BatchExecution)
+        .options(selectinload(BatchExecution.agent))
+        .where(BatchExecution.id == batch_id)
+    )
+    if not batch:
+        raise ValueError(f"Batch {batch_id} not found")
+
+    items_result = await db.scalars(
+        select(BatchItem)
+        .where(BatchItem.batch_id == batch_id, BatchItem.status == "pending")
+        .order_by(BatchItem.item_index)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+    )
+    items = list(items_result.all())
+    if not items:
+        return 0
+
+    for item in items:
+        item.status = "processing"
+    await db.flush()
+
+    try:
+        recipe = await execution_service.resolve_recipe(db, batch.agent, batch.user_id)
+    except ValueError as e:
+        for item in items:
+            item.status = "failed"
+            item.error_data = {"error": str(e), "type": type(e).__name__}
+            item.completed_at = datetime.utcnow()
+        await _update_batch_progress(db, redis, batch_id, failed=len(items))
+        logger.error("batch_chunk_failed", batch_id=str(batch_id), error=str(e))
+        return len(items)
+
+    executions = []
+    for item in items:
+        execution = await execution_service.create_execution(
+            db=db,
+            agent_id=batch.agent_id,
+            user_id=batch.user_id,
+            input_data=item.input_data,
+            triggered_by="batch",
+        )
+        execution.status = "running"
+        execution.started_at = datetime.utcnow()
+        executions.append(execution)
+    await db.flush()
+
+    # Engine runs touch Redis and OpenAI only, so they can share the chunk concurrently;
+    # the session is used again only once every item has finished.
+    packer = None
+    concurrency = settings.batch_chunk_concurrency
+    if settings.batch_pack_size > 1:
+        packer = PromptPacker(
+            get_llm_client(), settings.batch_pack_size, settings.batch_pack_linger_ms / 1000
+        )
+        # Enough items in flight at once to fill a pack
+        concurrency = max(concurrency, settings.batch_pack_size)
+    engine = OrchestrationEngine(redis, packer=packer)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(item: BatchItem):
+        async with semaphore:
+            return await engine.execute(
+                recipe_config=recipe,
+                input_data=item.input_data,
+                user_id=str(batch.user_id),
+                user_plan="trial",
+                recipe_id=batch.agent.recipe_slug,
             )
-        except Exception as e:
-            logger.warning("webhook_failed", error=str(e))
+
+    outcomes = await asyncio.gather(*(_run(item) for item in items), return_exceptions=True)
+
+    completed = failed = 0
+    cost_cents = Decimal(0)
+    for item, execution, outcome in zip(items, executions, outcomes, strict=True):
+        item.execution_id = execution.id
+        item.completed_at = datetime.utcnow()
+        if isinstance(outcome, BaseException):
+            await execution_service.record_execution_failure(db, redis, execution, outcome)
+            item.status = "failed"
+            item.error_data = {"error": str(outcome), "type": type(outcome).__name__}
+            failed += 1
+            logger.error(
+                "batch_item_failed",
+                batch_id=str(batch_id),
+                item_id=str(item.id),
+                error=str(outcome),
+            )
+            continue
+
+        await execution_service.record_execution_result(db, redis, execution, outcome)
+        item.status = "completed"
+        item.output_data = execution.output_data
+        item.cost_cents = execution.total_cost_cents
+        item.duration_ms = execution.duration_ms
+        completed += 1
+        cost_cents += execution.total_cost_cents
+
+    await db.flush()
+    await asyncio.gather(*(_send_item_webhook(batch, item) for item in items))
+
+    # Last statement before commit, so the batch row lock is held only briefly
+    await _update_batch_progress(
+        db, redis, batch_id, completed=completed, failed=failed, cost_cents=cost_cents
+    )
+
+    logger.info(
+        "batch_chunk_processed",
+        batch_id=str(batch_id),
+        items=len(items),
+        completed=completed,
+        failed=failed,
+    )
+    return len(items)
+
+
+async def _update_batch_progress(
+    db: AsyncSession,
+    redis: Redis,
+    batch_id: uuid.UUID,
+    completed: int = 0,
+    failed: int = 0,
+    cost_cents: Decimal = Decimal(0),
+) -> None:
+    """Add results to the batch counters and close the batch once every item is done.
+
+    The counters are bumped with a single ``UPDATE ... RETURNING`` so concurrent
+    workers only contend on the row for the duration of that statement. Completion
+    is detected from the returned counts; the final status update is guarded by
+    ``completed_at IS NULL`` so it is applied once even if several workers see it, and
+    the owner's analytics are invalidated once that update is committed.
+    """
+    result = await db.execute(
+        update(BatchExecution)
+        .where(BatchExecution.id == batch_id)
+        .values(
+            completed_items=BatchExecution.completed_items + completed,
+            failed_items=BatchExecution.failed_items + failed,
+            total_cost_cents=BatchExecution.total_cost_cents + cost_cents,
+            status=case(
+                (BatchExecution.status == "pending", "processing"),
+                else_=BatchExecution.status,
+            ),
+        )
+        .returning(
+            BatchExecution.completed_items,
+            BatchExecution.failed_items,
+            BatchExecution.total_items,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    counts = result.one()
+
+    if counts.completed_items + counts.failed_items < counts.total_items:
+        return
+
+    if counts.failed_items == 0:
+        status = "completed"
+    elif counts.completed_items == 0:
+        status = "failed"
+    else:
+        status = "partial_failure"
+
+    user_id = await db.scalar(
+        update(BatchExecution)
+        .where(BatchExecution.id == batch_id, BatchExecution.completed_at.is_(None))
+        .values(status=status, completed_at=datetime.utcnow())
+        .returning(BatchExecution.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    if user_id is not None:
+        after_commit(db, invalidate_user_analytics, redis, user_id)
+
+    logger.info(
+        "batch_completed",
+        batch_id=str(batch_id),
+        status=status,
+        completed=counts.completed_items,
+        failed=counts.failed_items,
+    )
+
+
+async def _send_item_webhook(batch: BatchExecution, item: BatchItem) -> None:
+    """Notify the agent's webhook (if any) that a batch item finished."""
+    if not (batch.agent and batch.agent.webhook_url):
+        return
+
+    try:
+        from app.webhooks.sender import send_webhook
+
+        await send_webhook(
+            webhook_url=batch.agent.webhook_url,
+            payload={
+                "event": "batch_item.completed",
+                "agent_id": str(batch.agent_id),
+                "batch_id": str(batch.id),
+                "item_index": item.item_index,
+                "execution_id": str(item.execution_id) if item.execution_id else None,
+                "status": item.status,
+                "output_data": item.output_data,
+                "cost_cents": float(item.cost_cents),
+                "duration_ms": item.duration_ms,
+                "timestamp": datetime.utcnow().isoformat(),
+            },
+        )
+    except Exception as e:
+        logger.warning("webhook_failed", error=str(e))
 
 
 async def get_batch(
@@ -244,16 +518,16 @@ async def list_batches(
     db: AsyncSession,
     user_id: uuid.UUID,
     limit: int = 50,
-) -> list[BatchExecution]:
-    """List batches for a user (without items)."""
-    result = await db.scalars(
+    cursor: str | None = None,
+) -> tuple[list[BatchExecution], str | None]:
+    """One page of a user's batches (without items), newest first, and the next cursor."""
+    query = (
         select(BatchExecution)
-        .options(selectinload(BatchExecution.agent))
+        .options(joinedload(BatchExecution.agent).load_only(Agent.recipe_slug))
         .where(BatchExecution.user_id == user_id)
-        .order_by(BatchExecution.created_at.desc())
-        .limit(limit)
     )
-    return list(result.all())
+    result = await db.scalars(keyset_page(query, BatchExecution, limit, cursor))
+    return split_page(list(result.all()), limit)
 
 
 async def export_batch(
@@ -261,10 +535,16 @@ async def export_batch(
     batch_id: uuid.UUID,
     user_id: uuid.UUID,
     fmt: str = "csv",
-) -> str:
-    """Export batch results as CSV or JSON."""
+) -> AsyncIterator[str | bytes]:
+    """Export batch results as a stream of CSV, JSON, JSON Lines, Parquet or Arrow chunks.
+
+    Ownership and CSV columns are resolved up front; rows are then streamed from a
+    server-side cursor so memory stays constant regardless of batch size.
+    """
     batch = await db.scalar(
-        select(BatchExecution).where(
+        select(BatchExecution)
+        .options(selectinload(BatchExecution.agent))
+        .where(
             BatchExecution.id == batch_id,
             BatchExecution.user_id == user_id,
         )
@@ -272,74 +552,47 @@ async def export_batch(
     if not batch:
         raise ValueError("Batch not found")
 
-    items_result = await db.scalars(
-        select(BatchItem)
-        .where(BatchItem.batch_id == batch_id)
-        .order_by(BatchItem.item_index)
-    )
-    items = list(items_result.all())
-
     if fmt == "json":
-        return json.dumps(
-            [
-                {
-                    "item_index": item.item_index,
-                    "status": item.status,
-                    "input_data": item.input_data,
-                    "output_data": item.output_data,
-                    "error_data": item.error_data,
-                    "cost_cents": float(item.cost_cents),
-                    "duration_ms": item.duration_ms,
-                }
-                for item in items
-            ],
-            indent=2,
-            default=str,
-        )
-
-    # CSV export: flatten input + output
-    output = io.StringIO()
-    if not items:
-        return ""
+        return export.stream_json(batch_id)
+    if fmt == "jsonl":
+        return export.stream_jsonl(batch_id)
+
+    if fmt in ("parquet", "arrow"):
+        export.require_pyarrow()
+
+    input_fields, output_fields = await _export_fields(db, batch)
+    if fmt == "parquet":
+        return export.stream_parquet(batch_id, input_fields, output_fields)
+    if fmt == "arrow":
+        return export.stream_arrow(batch_id, input_fields, output_fields)
+    return export.stream_csv(batch_id, list(input_fields), list(output_fields))
+
+
+async def _export_fields(
+    db: AsyncSession, batch: BatchExecution
+) -> tuple[dict[str, dict], dict[str, dict]]:
+    """Export columns (name -> JSON schema) from the recipe schemas.
+
+    Falls back to key discovery in the database (untyped columns) when the recipe
+    is gone or declares no properties.
+    """
+    recipe: dict = {}
+    try:
+        recipe = await execution_service.resolve_recipe(db, batch.agent, batch.user_id)
+    except ValueError:
+        logger.info("export_recipe_not_found", batch_id=str(batch.id))
 
-    # Collect all possible keys from inputs and outputs
-    input_keys: set[str] = set()
-    output_keys: set[str] = set()
-    for item in items:
-        if item.input_data:
-            input_keys.update(item.input_data.keys())
-        if item.output_data:
-            output_keys.update(item.output_data.keys())
-
-    sorted_input_keys = sorted(input_keys)
-    sorted_output_keys = sorted(output_keys)
-
-    headers = (
-        ["item_index", "status"]
-        + [f"input_{k}" for k in sorted_input_keys]
-        + [f"output_{k}" for k in sorted_output_keys]
-        + ["cost_cents", "duration_ms"]
-    )
+    input_fields = export.schema_properties(recipe.get("input_schema"))
+    if not input_fields:
+        keys = await export.discover_keys(db, batch.id, BatchItem.input_data)
+        input_fields = {k: {} for k in keys}
 
-    writer = csv.DictWriter(output, fieldnames=headers)
-    writer.writeheader()
+    output_fields = export.schema_properties(recipe.get("output_schema"))
+    if not output_fields:
+        keys = await export.discover_keys(db, batch.id, BatchItem.output_data)
+        output_fields = {k: {} for k in keys}
 
-    for item in items:
-        row: dict = {
-            "item_index": item.item_index,
-            "status": item.status,
-            "cost_cents": float(item.cost_cents),
-            "duration_ms": item.duration_ms,
-        }
-        for k in sorted_input_keys:
-            val = (item.input_data or {}).get(k, "")
-            row[f"input_{k}"] = json.dumps(val) if isinstance(val, (dict, list)) else val
-        for k in sorted_output_keys:
-            val = (item.output_data or {}).get(k, "")
-            row[f"output_{k}"] = json.dumps(val) if isinstance(val, (dict, list)) else val
-        writer.writerow(row)
-
-    return output.getvalue()
+    return input_fields, output_fields
 
 
 async def cleanup_stuck_items(db: AsyncSession, timeout_minutes: int = 10) -> int:
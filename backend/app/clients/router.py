@@ -4,8 +4,8 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.clients import service
 from app.db.engine import get_db
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api/clients", tags=["clients"])
 @router.get("/{client_id}/overview")
 async def get_client_overview(
     client_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Vue complète d'un client (organisation)."""
@@ -13,11 +13,119 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = ""
     openai_budget_limit: float = 15.0
+    # Optional override (e.g. a local stub of the Batch API protocol)
+    openai_base_url: str = ""
+    # Model routing: rolling health window shared by all workers (app.orchestrator.model_health).
+    # A model with enough calls whose error rate or mean latency (s) exceeds these
+    # limits is skipped in favour of the next allowed model in its fallback chain.
+    model_health_window_minutes: int = 5
+    model_health_min_calls: int = 20
+    model_health_refresh_seconds: float = 10.0
+    model_max_error_rate: float = 0.2
+    model_latency_slo: dict[str, float] = {
+        "gpt-4.1-nano": 10.0,
+        "gpt-4.1-mini": 20.0,
+        "gpt-4.1": 40.0,
+    }
+    model_fallback_chain: dict[str, list[str]] = {
+        "gpt-4.1": ["gpt-4.1-mini", "gpt-4.1-nano"],
+        "gpt-4.1-mini": ["gpt-4.1-nano"],
+        "gpt-4.1-nano": ["gpt-4.1-mini"],
+    }
+    # Semantic cache layer (steps with `semantic_cache: true`): minimum cosine similarity
+    # between rendered user prompts, entries kept per recipe/step/model, embedding size
+    llm_semantic_cache_threshold: float = 0.92
+    llm_semantic_cache_max_entries: int = 500
+    llm_semantic_cache_dimensions: int = 256
+    # Cached LLM responses larger than this (bytes, msgpack) are zstd/zlib-compressed
+    llm_cache_compress_threshold: int = 512
+    # Message layout for LLM steps without `prompt_layout` ("default" or "prefix_cache":
+    # the system prompt's variable-free prefix in its own message so the provider's
+    # prompt cache can reuse it)
+    prompt_layout_default: str = "default"
+    # Shared HTTP client for all OpenAI traffic (see app.http_client)
+    openai_http2: bool = True
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry: float = 30.0
+    # Adaptive (AIMD) per-model limit on concurrent LLM calls, per worker process
+    llm_concurrency_initial: int = 4
+    llm_concurrency_min: int = 1
+    llm_concurrency_max: int = 64
+    # Completion policy: total timeout per attempt (per model), retries with
+    # exponential backoff + full jitter, optional hedge after the model's p95 latency
+    llm_timeouts: dict[str, float] = {
+        "gpt-4.1-nano": 30.0,
+        "gpt-4.1-mini": 60.0,
+        "gpt-4.1": 120.0,
+    }
+    llm_timeout_default: float = 60.0
+    llm_max_retries: int = 3
+    llm_backoff_base: float = 0.5
+    llm_backoff_max: float = 8.0
+    llm_hedge_enabled: bool = False
+
+    # Batches (batch_chunk_size = 1 -> one ARQ job per item)
+    batch_chunk_size: int = 10
+    batch_chunk_concurrency: int = 5
+    # Fair-share work units: a slot's lease outlives the batch job timeout; a unit whose
+    # slot fails (or whose lease expires) is retried with backoff, then its items fail
+    batch_unit_lease_seconds: int = 600
+    batch_unit_max_tries: int = 3
+    batch_unit_retry_base_seconds: int = 10
+    # Steps marked `pack: true` send up to batch_pack_size items per request (1 disables)
+    batch_pack_size: int = 8
+    batch_pack_linger_ms: int = 50
+    # Offline batches: seconds between provider Batch API status polls
+    batch_offline_poll_interval: int = 60
+    # Offline batch items are handled and committed in pages; a job stops between pages
+    # after batch_offline_job_seconds (well under the batch queue's job_timeout) and
+    # re-enqueues itself to continue
+    batch_offline_page_size: int = 500
+    batch_offline_job_seconds: int = 120
+    # Attempts of one offline batch advance (exponential backoff from the base delay)
+    # before the batch is marked failed and its provider batch cancelled
+    batch_offline_max_tries: int = 5
+    batch_offline_retry_base_seconds: int = 30
+
+    # Worker concurrency per ARQ queue (see app.worker.queues)
+    worker_interactive_max_jobs: int = 10
+    worker_batch_max_jobs: int = 10
+
+    # Write-behind usage: seconds between flushes of Redis usage counters to usage_daily
+    usage_flush_interval_seconds: int = 30
+
+    # Analytics rollups: refresh period and closed hours rebuilt on each refresh
+    analytics_rollup_interval_minutes: int = 5
+    analytics_rollup_lookback_hours: int = 3
+    # Older hours are rebuilt too when one of their executions finished since the last
+    # refresh (e.g. offline batches), looking back this many days for such executions
+    analytics_rollup_late_days: int = 7
+    # Per-user analytics responses (also invalidated when one of the user's executions ends)
+    analytics_cache_ttl_seconds: int = 60
+
+    # executions / execution_steps monthly partitions and payload archival
+    execution_partition_months_ahead: int = 3
+    execution_archive_after_days: int = 180
+    execution_archive_batch_size: int = 500
+
+    # In-process clerk_user_id -> user cache of get_current_user (per API worker)
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_entries: int = 10000
 
     # Clerk
     clerk_secret_key: str = ""
     clerk_domain: str = ""
     clerk_webhook_secret: str = ""
+    # JWKS signing keys: background refresh period, and minimum interval between the
+    # on-demand refreshes triggered by an unknown key id
+    clerk_jwks_refresh_seconds: int = 3600
+    clerk_jwks_min_refresh_seconds: int = 30
+    # Verified token payloads (keyed by token hash, never kept past the token's exp)
+    clerk_token_cache_seconds: int = 300
+    clerk_token_cache_max_entries: int = 10000
+    # Platform admins (Clerk user ids, comma-separated), e.g. to warm built-in recipe caches
+    admin_clerk_user_ids: str = ""
 
     # Server
     backend_port: int = 8000
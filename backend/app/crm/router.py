@@ -4,8 +4,8 @@ from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.crm import service
 from app.crm.schemas import (
     InteractionCreate,
@@ -23,7 +23,7 @@ router = APIRouter(prefix="/api/crm", tags=["crm"])
 @router.post("/leads", response_model=LeadResponse, status_code=201)
 async def create_lead(
     body: LeadCreate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Créer un nouveau lead."""
@@ -56,7 +56,7 @@ async def create_lead(
 
 @router.get("/leads", response_model=list[LeadResponse])
 async def list_leads(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     status: Optional[str] = None,
 ):
@@ -89,7 +89,7 @@ async def list_leads(
 @router.get("/leads/{lead_id}", response_model=LeadDetailResponse)
 async def get_lead(
     lead_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Récupérer un lead avec ses interactions."""
@@ -133,7 +133,7 @@ async def get_lead(
 async def update_lead(
     lead_id: uuid.UUID,
     body: LeadUpdate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Mettre à jour un lead."""
@@ -168,7 +168,7 @@ async def update_lead(
 async def add_interaction(
     lead_id: uuid.UUID,
     body: InteractionCreate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Ajouter une interaction avec un lead."""
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
+from app.db.hooks import commit
 
 _engine = None
 _async_session = None
@@ -32,7 +33,7 @@ async def get_db():
     async with session_maker() as session:
         try:
             yield session
-            await session.commit()
+            await commit(session)
         except Exception:
             await session.rollback()
             raise
@@ -0,0 +1,43 @@
+"""Side effects deferred until the session's transaction is committed.
+
+Redis counters and cache invalidations live outside the database transaction. Run
+before the commit, they survive a rollback (usage counted for an execution that was
+never saved, counted again when the job is retried) and a concurrent reader can cache
+the pre-commit rows again. Services register them with ``after_commit``; whoever owns
+the transaction commits with ``commit`` (``get_db`` does for requests), which runs
+them once the commit succeeded. A rollback discards them.
+"""
+
+from collections.abc import Awaitable, Callable
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = structlog.get_logger()
+
+_CALLBACKS_KEY = "after_commit"
+
+
+def after_commit(db: AsyncSession, callback: Callable[..., Awaitable], *args) -> None:
+    """Run ``await callback(*args)`` once the current transaction of ``db`` commits."""
+    db.info.setdefault(_CALLBACKS_KEY, []).append((callback, args))
+
+
+async def commit(db: AsyncSession) -> None:
+    """Commit ``db``, then run its ``after_commit`` callbacks in registration order.
+
+    A failing callback is logged and does not stop the others: the data is committed.
+    """
+    await db.commit()
+    for callback, args in db.info.pop(_CALLBACKS_KEY, []):
+        try:
+            await callback(*args)
+        except Exception as e:
+            logger.error("after_commit_callback_failed", callback=callback.__name__, error=str(e))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_callbacks(session: Session) -> None:
+    session.info.pop(_CALLBACKS_KEY, None)
@@ -0,0 +1,49 @@
+"""Keyset pagination on (created_at, id), newest first.
+
+A cursor is the opaque, URL-safe encoding of the last row's (created_at, id). The next
+page is everything strictly before it in (created_at DESC, id DESC) order, which the
+(user_id, created_at DESC) indexes serve without an OFFSET scan however deep the page.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Select, tuple_
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except ValueError as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def keyset_page(query: Select, model, limit: int, cursor: str | None = None) -> Select:
+    """Order ``query`` newest first and restrict it to the page after ``cursor``.
+
+    One extra row is fetched so ``split_page`` can tell whether another page follows.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: list, limit: int) -> tuple[list, str | None]:
+    """Return the page rows and the cursor of the next page (None on the last page)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
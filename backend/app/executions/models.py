@@ -2,32 +2,52 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Boolean, ForeignKey, Integer, Numeric, String, text
+from sqlalchemy import (
+    Boolean,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    LargeBinary,
+    Numeric,
+    String,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
-from app.db.base import Base, UUIDMixin
+from app.db.base import Base
 
 
-class Execution(Base, UUIDMixin):
+class Execution(Base):
+    """One agent run. Range-partitioned by month on ``created_at`` (see executions.partitions).
+
+    The table's primary key is (id, created_at) as partitioning requires; ``id`` alone
+    stays unique in practice and is the ORM identity.
+    """
+
     __tablename__ = "executions"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agents.id"), nullable=False, index=True)
+    id: Mapped[uuid.UUID] = mapped_column(
+        primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()")
+    )
+
+    agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agents.id"), nullable=False)
     organization_id: Mapped[uuid.UUID | None] = mapped_column(
         ForeignKey("organizations.id"), nullable=True, index=True
     )
-    user_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("users.id"), nullable=False, index=True
-    )
+    user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False)
 
     status: Mapped[str] = mapped_column(
         String(50), default="pending", server_default=text("'pending'")
     )
 
-    # Input/Output
-    input_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # Input/Output (moved to execution_archives once archived_at is set)
+    input_data: Mapped[dict | None] = mapped_column(JSONB)
     output_data: Mapped[dict | None] = mapped_column(JSONB)
     error_data: Mapped[dict | None] = mapped_column(JSONB)
+    archived_at: Mapped[datetime | None] = mapped_column()
 
     # Performance
     started_at: Mapped[datetime | None] = mapped_column()
@@ -49,7 +69,7 @@ class Execution(Base, UUIDMixin):
     triggered_by_user_id: Mapped[uuid.UUID | None] = mapped_column(ForeignKey("users.id"))
 
     created_at: Mapped[datetime] = mapped_column(
-        default=datetime.utcnow, server_default=text("NOW()")
+        default=datetime.utcnow, server_default=text("NOW()"), primary_key=True, index=True
     )
 
     # Relationships
@@ -58,13 +78,41 @@ class Execution(Base, UUIDMixin):
     )
     agent: Mapped["Agent"] = relationship(lazy="joined", foreign_keys="[Execution.agent_id]")
 
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:  # noqa: N805
+        return {"primary_key": [cls.__table__.c.id]}
+
+
+# Listing and analytics filter on user/agent and order or range on created_at
+Index("ix_executions_user_id_created_at", Execution.user_id, Execution.created_at.desc())
+Index("ix_executions_agent_id_created_at", Execution.agent_id, Execution.created_at)
+# The archiving cron scans unarchived executions oldest first
+Index(
+    "ix_executions_created_at_unarchived",
+    Execution.created_at,
+    postgresql_where=Execution.archived_at.is_(None),
+)
+
+
+class ExecutionStep(Base):
+    """One step of an execution, partitioned like ``executions`` on the parent's created_at."""
 
-class ExecutionStep(Base, UUIDMixin):
     __tablename__ = "execution_steps"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["execution_id", "created_at"],
+            ["executions.id", "executions.created_at"],
+            ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    execution_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("executions.id", ondelete="CASCADE"), nullable=False, index=True
+    id: Mapped[uuid.UUID] = mapped_column(
+        primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()")
     )
+    execution_id: Mapped[uuid.UUID] = mapped_column(nullable=False, index=True)
+    # Always the parent execution's created_at, so a step lives in its execution's partition
+    created_at: Mapped[datetime] = mapped_column(primary_key=True)
 
     step_index: Mapped[int] = mapped_column(Integer, nullable=False)
     step_name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -75,6 +123,10 @@ class ExecutionStep(Base, UUIDMixin):
     prompt_hash: Mapped[str | None] = mapped_column(String(64))
     input_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
     output_tokens: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    # Prompt tokens served from the provider's prompt cache (subset of input_tokens)
+    cached_input_tokens: Mapped[int] = mapped_column(
+        Integer, default=0, server_default=text("0")
+    )
     cost_cents: Mapped[Decimal] = mapped_column(
         Numeric(10, 6), default=0, server_default=text("0")
     )
@@ -94,3 +146,20 @@ class ExecutionStep(Base, UUIDMixin):
 
     # Relationships
     execution: Mapped["Execution"] = relationship(back_populates="steps")
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:  # noqa: N805
+        return {"primary_key": [cls.__table__.c.id]}
+
+
+class ExecutionArchive(Base):
+    """Compressed JSONB payloads of an archived execution and its steps (cache_codec format)."""
+
+    __tablename__ = "execution_archives"
+
+    execution_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(primary_key=True)
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow, server_default=text("NOW()")
+    )
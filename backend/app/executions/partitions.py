@@ -0,0 +1,200 @@
+"""Monthly partitions of ``executions`` / ``execution_steps`` and payload archival.
+
+Both tables are range-partitioned on ``created_at`` (a step carries its execution's
+``created_at``, so an execution and its steps always share a month). A daily cron
+creates the partitions for the coming months and archives old executions. Archiving
+moves the JSONB payloads (``input_data``/``output_data``/``error_data``) of an
+execution and its steps into one compressed ``execution_archives`` row and clears
+them in place. The numeric columns used by analytics stay untouched.
+"""
+
+from datetime import date, datetime, timedelta
+
+import structlog
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
+from app.executions.models import Execution, ExecutionArchive, ExecutionStep
+from app.orchestrator import cache_codec
+
+logger = structlog.get_logger()
+
+PARTITIONED_TABLES = ("executions", "execution_steps")
+PAYLOAD_FIELDS = ("input_data", "output_data", "error_data")
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+async def ensure_partitions(
+    db: AsyncSession,
+    months_ahead: int | None = None,
+    start: date | None = None,
+) -> list[str]:
+    """Create the missing monthly partitions from ``start`` (default: this month) onwards."""
+    if months_ahead is None:
+        months_ahead = settings.execution_partition_months_ahead
+    first = month_start(start or datetime.utcnow())
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+
+    existing = set(
+        (
+            await db.execute(
+                text(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = ANY(:tables)"
+                ),
+                {"tables": list(PARTITIONED_TABLES)},
+            )
+        ).scalars()
+    )
+
+    created = []
+    month = first
+    while month <= last:
+        upper = add_months(month, 1)
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            await db.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+            )
+            created.append(name)
+        month = upper
+
+    if created:
+        logger.info("execution_partitions_created", partitions=created)
+    return created
+
+
+async def archive_executions(
+    db: AsyncSession,
+    before: datetime,
+    batch_size: int | None = None,
+) -> int:
+    """Archive the payloads of one batch of executions created before ``before``.
+
+    Returns the number of executions archived (0 once everything is archived).
+    """
+    batch_size = batch_size or settings.execution_archive_batch_size
+    executions = (
+        await db.execute(
+            select(
+                Execution.id,
+                Execution.created_at,
+                *(getattr(Execution, f) for f in PAYLOAD_FIELDS),
+            )
+            .where(Execution.created_at < before, Execution.archived_at.is_(None))
+            .order_by(Execution.created_at)
+            .limit(batch_size)
+        )
+    ).all()
+    if not executions:
+        return 0
+
+    ids = [row.id for row in executions]
+    oldest, newest = executions[0].created_at, executions[-1].created_at
+    steps = (
+        await db.execute(
+            select(
+                ExecutionStep.id,
+                ExecutionStep.execution_id,
+                *(getattr(ExecutionStep, f) for f in PAYLOAD_FIELDS),
+            ).where(
+                ExecutionStep.execution_id.in_(ids),
+                # Partition pruning: steps share their execution's created_at
+                ExecutionStep.created_at.between(oldest, newest),
+            )
+        )
+    ).all()
+
+    steps_by_execution: dict = {}
+    for step in steps:
+        steps_by_execution.setdefault(step.execution_id, {})[str(step.id)] = {
+            f: getattr(step, f) for f in PAYLOAD_FIELDS
+        }
+
+    archives = [
+        {
+            "execution_id": row.id,
+            "created_at": row.created_at,
+            "payload": cache_codec.encode(
+                {
+                    **{f: getattr(row, f) for f in PAYLOAD_FIELDS},
+                    "steps": steps_by_execution.get(row.id, {}),
+                }
+            ),
+        }
+        for row in executions
+    ]
+    await db.execute(pg_insert(ExecutionArchive).values(archives).on_conflict_do_nothing())
+
+    cleared = {f: None for f in PAYLOAD_FIELDS}
+    await db.execute(
+        update(ExecutionStep)
+        .where(
+            ExecutionStep.execution_id.in_(ids),
+            ExecutionStep.created_at.between(oldest, newest),
+        )
+        .values(**cleared)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(Execution)
+        .where(Execution.id.in_(ids), Execution.created_at.between(oldest, newest))
+        .values(**cleared, archived_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    logger.info("executions_archived", count=len(ids), oldest=oldest.isoformat())
+    return len(ids)
+
+
+async def archive_old_executions(db: AsyncSession) -> int:
+    """Archive every execution older than ``settings.execution_archive_after_days``."""
+    before = datetime.utcnow() - timedelta(days=settings.execution_archive_after_days)
+    total = 0
+    while archived := await archive_executions(db, before):
+        total += archived
+    return total
+
+
+async def restore_archived_payloads(db: AsyncSession, execution: Execution) -> None:
+    """Load an archived execution's payloads back onto it (and its loaded steps), read-only.
+
+    Values are set as committed state, so nothing is written back on flush.
+    """
+    archive = await db.scalar(
+        select(ExecutionArchive.payload).where(ExecutionArchive.execution_id == execution.id)
+    )
+    if archive is None:
+        return
+
+    payload = cache_codec.decode(archive)
+    for field in PAYLOAD_FIELDS:
+        set_committed_value(execution, field, payload.get(field))
+
+    step_payloads = payload.get("steps", {})
+    for step in execution.__dict__.get("steps", []):
+        for field, value in step_payloads.get(str(step.id), {}).items():
+            set_committed_value(step, field, value)
@@ -2,16 +2,23 @@ import uuid
 from typing import Annotated
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents import service as agent_service
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.db.engine import get_db
+from app.db.pagination import InvalidCursorError
 from app.executions import service
-from app.executions.schemas import ExecutionCreate, ExecutionResponse, ExecutionStepResponse
+from app.executions.partitions import PAYLOAD_FIELDS
+from app.executions.schemas import (
+    ExecutionCreate,
+    ExecutionListResponse,
+    ExecutionResponse,
+    ExecutionStepResponse,
+)
 
 logger = structlog.get_logger()
 
@@ -31,7 +38,7 @@ async def get_redis() -> Redis:
 @router.post("", response_model=ExecutionResponse, status_code=201)
 async def create_and_run_execution(
     body: ExecutionCreate,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     redis: Annotated[Redis, Depends(get_redis)],
 ):
@@ -63,19 +70,39 @@ async def create_and_run_execution(
     return _to_response(execution)
 
 
-@router.get("", response_model=list[ExecutionResponse])
+@router.get("", response_model=list[ExecutionListResponse], response_model_exclude_unset=True)
 async def list_executions(
-    user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
+    fields: str | None = Query(
+        None, description="Comma-separated payloads to include: input_data, output_data, error_data"
+    ),
 ):
-    executions = await service.list_executions(db, user.id)
-    return [_to_response(e) for e in executions]
+    """List executions, newest first. The next page's cursor is in the X-Next-Cursor header."""
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip()) if fields else ()
+    unknown = set(requested) - set(PAYLOAD_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    try:
+        executions, next_cursor = await service.list_executions(
+            db, user.id, limit=limit, cursor=cursor, fields=requested
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_to_list_response(e, requested) for e in executions]
 
 
 @router.get("/{execution_id}", response_model=ExecutionResponse)
 async def get_execution(
     execution_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     execution = await service.get_execution(db, execution_id, user.id)
@@ -95,6 +122,7 @@ def _to_response(execution) -> ExecutionResponse:
                 model_used=s.model_used,
                 input_tokens=s.input_tokens,
                 output_tokens=s.output_tokens,
+                cached_input_tokens=s.cached_input_tokens,
                 cost_cents=float(s.cost_cents),
                 cache_hit=s.cache_hit,
                 status=s.status,
@@ -127,3 +155,22 @@ def _to_response(execution) -> ExecutionResponse:
         created_at=execution.created_at,
         steps=steps,
     )
+
+
+def _to_list_response(execution, fields: tuple[str, ...]) -> ExecutionListResponse:
+    # Payloads not in ``fields`` are deferred: reading them would lazy-load per row
+    return ExecutionListResponse(
+        id=str(execution.id),
+        agent_id=str(execution.agent_id),
+        recipe_slug=execution.agent.recipe_slug if execution.agent else None,
+        status=execution.status,
+        total_input_tokens=execution.total_input_tokens,
+        total_output_tokens=execution.total_output_tokens,
+        total_cost_cents=float(execution.total_cost_cents),
+        cache_hits=execution.cache_hits,
+        models_used=execution.models_used or [],
+        duration_ms=execution.duration_ms,
+        triggered_by=execution.triggered_by,
+        created_at=execution.created_at,
+        **{field: getattr(execution, field) for field in fields},
+    )
@@ -17,6 +17,7 @@ class ExecutionStepResponse(BaseModel):
     model_used: str | None
     input_tokens: int
     output_tokens: int
+    cached_input_tokens: int = 0
     cost_cents: float
     cache_hit: bool
     status: str
@@ -29,7 +30,7 @@ class ExecutionResponse(BaseModel):
     agent_id: str
     recipe_slug: str | None = None
     status: str
-    input_data: dict
+    input_data: dict | None  # None once archived, unless restored
     output_data: dict | None
     error_data: dict | None
     total_input_tokens: int
@@ -43,3 +44,24 @@ class ExecutionResponse(BaseModel):
     steps: list[ExecutionStepResponse] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ExecutionListResponse(BaseModel):
+    """A row of the executions list: summary columns, payloads only when requested."""
+
+    id: str
+    agent_id: str
+    recipe_slug: str | None = None
+    status: str
+    total_input_tokens: int
+    total_output_tokens: int
+    total_cost_cents: float
+    cache_hits: int
+    models_used: list[str]
+    duration_ms: int | None
+    triggered_by: str
+    created_at: datetime
+    # Present only when named in the ``fields`` query parameter
+    input_data: dict | None = None
+    output_data: dict | None = None
+    error_data: dict | None = None
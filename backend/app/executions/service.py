@@ -4,15 +4,20 @@ from decimal import Decimal
 
 import structlog
 from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer, joinedload, selectinload
 
 from app.agents.models import Agent
+from app.analytics.cache import invalidate_user_analytics
+from app.db.hooks import after_commit
+from app.db.pagination import keyset_page, split_page
 from app.executions.models import Execution, ExecutionStep
-from app.orchestrator.engine import OrchestrationEngine
+from app.executions.partitions import PAYLOAD_FIELDS, restore_archived_payloads
+from app.orchestrator.engine import ExecutionResult, OrchestrationEngine
 from app.recipes import registry
 from app.recipes import service as recipe_service
+from app.usage.service import record_execution_usage
 
 logger = structlog.get_logger()
 
@@ -54,6 +59,36 @@ async def run_execution(
     if not agent:
         raise ValueError(f"Agent {execution.agent_id} not found")
 
+    recipe = await resolve_recipe(db, agent, execution.user_id)
+
+    # Default plan for user-scoped execution
+    user_plan = "trial"
+
+    # Mark as running
+    execution.status = "running"
+    execution.started_at = datetime.utcnow()
+    await db.flush()
+
+    # Execute
+    engine = OrchestrationEngine(redis)
+    try:
+        result = await engine.execute(
+            recipe_config=recipe,
+            input_data=execution.input_data,
+            user_id=str(execution.user_id),
+            user_plan=user_plan,
+            recipe_id=agent.recipe_slug,
+        )
+    except Exception as e:
+        await record_execution_failure(db, redis, execution, e)
+        raise
+
+    await record_execution_result(db, redis, execution, result)
+    return execution
+
+
+async def resolve_recipe(db: AsyncSession, agent: Agent, user_id: uuid.UUID) -> dict:
+    """Resolve the recipe config for an agent (public registry first, then custom)."""
     # Get recipe config from the agent's recipe_slug field
     recipe_slug = agent.recipe_slug
     if not recipe_slug:
@@ -67,7 +102,7 @@ async def run_execution(
         recipe_db = await recipe_service.get_custom_recipe_by_slug(
             db=db,
             slug=recipe_slug,
-            user_id=execution.user_id,
+            user_id=user_id,
         )
         if recipe_db:
             # Convert database recipe to dict format
@@ -75,146 +110,112 @@ async def run_execution(
         else:
             raise ValueError(f"Recipe '{recipe_slug}' not found")
 
-    # Default plan for user-scoped execution
-    user_plan = "trial"
+    return recipe
 
-    # Mark as running
-    execution.status = "running"
-    execution.started_at = datetime.utcnow()
-    await db.flush()
 
-    # Execute
-    engine = OrchestrationEngine(redis)
-    try:
-        result = await engine.execute(
-            recipe_config=recipe,
-            input_data=execution.input_data,
-            user_id=str(execution.user_id),
-            user_plan=user_plan,
-            recipe_id=recipe_slug,
+async def record_execution_result(
+    db: AsyncSession,
+    redis: Redis,
+    execution: Execution,
+    result: ExecutionResult,
+) -> None:
+    """Persist a successful engine result onto the execution and its step records."""
+    execution.status = "completed"
+    execution.output_data = result.output
+    execution.total_input_tokens = result.total_input_tokens
+    execution.total_output_tokens = result.total_output_tokens
+    execution.total_cost_cents = Decimal(str(round(result.total_cost_usd * 100, 4)))
+    execution.cache_hits = result.cache_hits
+    models_used = result.models_used
+    execution.models_used = list(models_used) if isinstance(models_used, set) else models_used
+    execution.completed_at = datetime.utcnow()
+    execution.duration_ms = result.duration_ms
+
+    # Create step records (one multi-row INSERT)
+    if result.steps:
+        await db.execute(
+            insert(ExecutionStep),
+            [
+                {
+                    "execution_id": execution.id,
+                    "created_at": execution.created_at,
+                    "step_index": step_data["step_index"],
+                    "step_name": step_data["step_name"],
+                    "step_type": step_data["step_type"],
+                    "model_used": step_data.get("model_used"),
+                    "prompt_hash": step_data.get("prompt_hash"),
+                    "input_tokens": step_data.get("input_tokens", 0),
+                    "output_tokens": step_data.get("output_tokens", 0),
+                    "cached_input_tokens": step_data.get("cached_tokens", 0),
+                    "cost_cents": step_data.get("cost_cents", 0),
+                    "cache_hit": step_data.get("cache_hit", False),
+                    "input_data": step_data.get("input_data"),
+                    "output_data": step_data.get("output_data"),
+                    "status": step_data["status"],
+                    "duration_ms": step_data.get("duration_ms"),
+                }
+                for step_data in result.steps
+            ],
         )
 
-        # Update execution
-        execution.status = "completed"
-        execution.output_data = result.output
-        execution.total_input_tokens = result.total_input_tokens
-        execution.total_output_tokens = result.total_output_tokens
-        execution.total_cost_cents = Decimal(str(round(result.total_cost_usd * 100, 4)))
-        execution.cache_hits = result.cache_hits
-        execution.models_used = list(result.models_used) if isinstance(result.models_used, set) else result.models_used
-        execution.completed_at = datetime.utcnow()
-        execution.duration_ms = result.duration_ms
-
-        # Create step records
-        for step_data in result.steps:
-            step = ExecutionStep(
-                execution_id=execution.id,
-                step_index=step_data["step_index"],
-                step_name=step_data["step_name"],
-                step_type=step_data["step_type"],
-                model_used=step_data.get("model_used"),
-                prompt_hash=step_data.get("prompt_hash"),
-                input_tokens=step_data.get("input_tokens", 0),
-                output_tokens=step_data.get("output_tokens", 0),
-                cost_cents=step_data.get("cost_cents", 0),
-                cache_hit=step_data.get("cache_hit", False),
-                input_data=step_data.get("input_data"),
-                output_data=step_data.get("output_data"),
-                status=step_data["status"],
-                duration_ms=step_data.get("duration_ms"),
-            )
-            db.add(step)
-
-        await db.flush()
-        await _update_usage_daily(db, execution)
-        logger.info(
-            "execution_completed",
-            execution_id=str(execution.id),
-            cost=f"${result.total_cost_usd:.6f}",
-        )
+    await db.flush()
+    after_commit(db, record_execution_usage, redis, execution)
+    after_commit(db, invalidate_user_analytics, redis, execution.user_id)
+    logger.info(
+        "execution_completed",
+        execution_id=str(execution.id),
+        cost=f"${result.total_cost_usd:.6f}",
+    )
 
-    except Exception as e:
-        execution.status = "failed"
-        execution.error_data = {"error": str(e), "type": type(e).__name__}
-        execution.completed_at = datetime.utcnow()
-        await db.flush()
-        await _update_usage_daily(db, execution)
-        logger.error("execution_failed", execution_id=str(execution.id), error=str(e))
-        raise
 
-    return execution
+async def record_execution_failure(
+    db: AsyncSession,
+    redis: Redis,
+    execution: Execution,
+    error: Exception,
+) -> None:
+    """Mark an execution as failed and account for it in daily usage."""
+    execution.status = "failed"
+    execution.error_data = {"error": str(error), "type": type(error).__name__}
+    execution.completed_at = datetime.utcnow()
+    await db.flush()
+    after_commit(db, record_execution_usage, redis, execution)
+    after_commit(db, invalidate_user_analytics, redis, execution.user_id)
+    logger.error("execution_failed", execution_id=str(execution.id), error=str(error))
 
 
 async def get_execution(
     db: AsyncSession, execution_id: uuid.UUID, user_id: uuid.UUID
 ) -> Execution | None:
-    return await db.scalar(
+    execution = await db.scalar(
         select(Execution)
         .options(selectinload(Execution.steps), selectinload(Execution.agent))
         .where(Execution.id == execution_id, Execution.user_id == user_id)
     )
+    if execution and execution.archived_at:
+        await restore_archived_payloads(db, execution)
+    return execution
 
 
 async def list_executions(
-    db: AsyncSession, user_id: uuid.UUID, limit: int = 50
-) -> list[Execution]:
-    result = await db.scalars(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int = 50,
+    cursor: str | None = None,
+    fields: tuple[str, ...] = (),
+) -> tuple[list[Execution], str | None]:
+    """One page of a user's executions, newest first, and the next page's cursor.
+
+    Only the summary columns are loaded: the JSONB payloads (``PAYLOAD_FIELDS``) are
+    deferred unless named in ``fields`` and must not be accessed otherwise.
+    """
+    query = (
         select(Execution)
-        .options(selectinload(Execution.agent))
-        .where(Execution.user_id == user_id)
-        .order_by(Execution.created_at.desc())
-        .limit(limit)
-    )
-    return list(result.all())
-
-
-async def _update_usage_daily(db: AsyncSession, execution: Execution) -> None:
-    """Upsert usage_daily record for this execution's user + date."""
-    from app.usage.models import UsageDaily
-
-    exec_date = (execution.completed_at or execution.created_at).date()
-    is_success = execution.status == "completed"
-    is_failed = execution.status == "failed"
-
-    # Determine model tier counts from models_used
-    models = execution.models_used or []
-    nano = sum(1 for m in models if "nano" in m)
-    mini = sum(1 for m in models if "mini" in m)
-    full = sum(1 for m in models if m == "gpt-4.1")
-
-    existing = await db.scalar(
-        select(UsageDaily).where(
-            UsageDaily.user_id == execution.user_id,
-            UsageDaily.date == exec_date,
+        .options(
+            joinedload(Execution.agent).load_only(Agent.recipe_slug),
+            *(defer(getattr(Execution, f)) for f in PAYLOAD_FIELDS if f not in fields),
         )
+        .where(Execution.user_id == user_id)
     )
-
-    if existing:
-        existing.total_executions += 1
-        existing.successful_executions += int(is_success)
-        existing.failed_executions += int(is_failed)
-        existing.total_input_tokens += execution.total_input_tokens
-        existing.total_output_tokens += execution.total_output_tokens
-        existing.total_cost_cents += execution.total_cost_cents
-        existing.nano_calls += nano
-        existing.mini_calls += mini
-        existing.full_calls += full
-        existing.cache_hits += execution.cache_hits
-    else:
-        record = UsageDaily(
-            user_id=execution.user_id,
-            date=exec_date,
-            total_executions=1,
-            successful_executions=int(is_success),
-            failed_executions=int(is_failed),
-            total_input_tokens=execution.total_input_tokens,
-            total_output_tokens=execution.total_output_tokens,
-            total_cost_cents=execution.total_cost_cents,
-            nano_calls=nano,
-            mini_calls=mini,
-            full_calls=full,
-            cache_hits=execution.cache_hits,
-        )
-        db.add(record)
-
-    await db.flush()
+    result = await db.scalars(keyset_page(query, Execution, limit, cursor))
+    return split_page(list(result.all()), limit)
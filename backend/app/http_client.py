@@ -0,0 +1,55 @@
+"""Shared pooled HTTP client for all OpenAI traffic (chat, vision, audio, embeddings, RAG)
+and the Clerk JWKS fetches.
+
+Created on startup of the API and of each worker and closed on shutdown, so every
+SDK client reuses the same keep-alive (and, when ``h2`` is installed, HTTP/2)
+connections instead of opening its own pool.
+"""
+
+import httpx
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        http2 = settings.openai_http2 and _http2_available()
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_keepalive_connections,
+                keepalive_expiry=settings.openai_keepalive_expiry,
+            ),
+            # Default for calls that set no timeout of their own; chat completions pass
+            # their model's RetryPolicy timeout per request
+            timeout=httpx.Timeout(settings.llm_timeout_default, connect=10.0),
+        )
+        logger.info(
+            "http_client_created",
+            http2=http2,
+            max_connections=settings.openai_max_connections,
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("http_client_closed")
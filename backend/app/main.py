@@ -1,10 +1,15 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 import structlog
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.auth.cache import listen_for_invalidations
+from app.auth.middleware import get_jwks_store
 from app.config import settings
+from app.http_client import close_http_client, get_http_client
 from app.recipes import registry
 
 logger = structlog.get_logger()
@@ -15,9 +20,18 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("starting_praxia", version="0.1.0")
     registry.load_recipes()
+    get_http_client()
+    background_tasks = [asyncio.create_task(listen_for_invalidations())]
+    if settings.clerk_domain:
+        background_tasks.append(asyncio.create_task(get_jwks_store().run_refresh_loop()))
     yield
     # Shutdown
     logger.info("shutting_down_praxia")
+    for task in background_tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await close_http_client()
 
 
 def create_app() -> FastAPI:
@@ -46,6 +60,8 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Keyset pagination cursor of the list endpoints
+        expose_headers=["X-Next-Cursor"],
     )
 
     # Health check
@@ -0,0 +1,130 @@
+import json
+from dataclasses import dataclass
+
+import structlog
+from openai import AsyncOpenAI
+
+from app.orchestrator.llm_client import LLMClient, get_llm_client
+
+logger = structlog.get_logger()
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# The asynchronous Batch API is billed at half the synchronous price
+BATCH_PRICE_DISCOUNT = 0.5
+
+PENDING_STATUSES = {"validating", "in_progress", "finalizing", "cancelling"}
+
+
+@dataclass
+class BatchRequest:
+    custom_id: str
+    body: dict
+
+
+@dataclass
+class BatchResult:
+    custom_id: str
+    content: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    error: str | None = None
+
+
+class OpenAIBatchClient:
+    """Thin wrapper around the provider's file upload / batch / poll protocol."""
+
+    def __init__(self, client: AsyncOpenAI | None = None):
+        self.client = client or get_llm_client().client
+
+    @staticmethod
+    def build_jsonl(requests: list[BatchRequest]) -> bytes:
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": r.custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": r.body,
+                }
+            )
+            for r in requests
+        ]
+        return ("\n".join(lines) + "\n").encode()
+
+    async def submit(self, requests: list[BatchRequest], metadata: dict | None = None) -> str:
+        """Upload the requests as a JSONL file and start a batch. Returns the batch id."""
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", self.build_jsonl(requests), "application/jsonl"),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+            metadata=metadata,
+        )
+        logger.info(
+            "provider_batch_submitted",
+            provider_batch_id=batch.id,
+            requests=len(requests),
+        )
+        return batch.id
+
+    async def retrieve(self, provider_batch_id: str):
+        return await self.client.batches.retrieve(provider_batch_id)
+
+    async def cancel(self, provider_batch_id: str):
+        return await self.client.batches.cancel(provider_batch_id)
+
+    async def fetch_results(self, batch) -> dict[str, BatchResult]:
+        """Download and parse the output and error files of a finished batch."""
+        results: dict[str, BatchResult] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for result in self.parse_results(content.text):
+                results[result.custom_id] = result
+        return results
+
+    @staticmethod
+    def parse_results(text: str) -> list[BatchResult]:
+        results = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            custom_id = record["custom_id"]
+            response = record.get("response") or {}
+            body = response.get("body") or {}
+
+            if record.get("error") or response.get("status_code", 200) >= 400:
+                error = record.get("error") or body.get("error") or {}
+                results.append(
+                    BatchResult(custom_id=custom_id, error=error.get("message") or str(error))
+                )
+                continue
+
+            usage = body.get("usage") or {}
+            details = usage.get("prompt_tokens_details") or {}
+            choices = body.get("choices") or [{}]
+            results.append(
+                BatchResult(
+                    custom_id=custom_id,
+                    content=(choices[0].get("message") or {}).get("content") or "",
+                    input_tokens=usage.get("prompt_tokens", 0),
+                    output_tokens=usage.get("completion_tokens", 0),
+                    cached_tokens=details.get("cached_tokens") or 0,
+                )
+            )
+        return results
+
+    @staticmethod
+    def calculate_cost(
+        model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0
+    ) -> float:
+        cost = LLMClient.calculate_cost(model, input_tokens, output_tokens, cached_tokens)
+        return cost * BATCH_PRICE_DISCOUNT
@@ -1,39 +1,248 @@
+import asyncio
+import contextlib
 import hashlib
 import json
+import math
+import random
+import time
+import uuid
+from array import array
 from dataclasses import dataclass
 
 import structlog
 from redis.asyncio import Redis
 
+from app.config import settings
+from app.orchestrator import cache_codec
+from app.orchestrator.retry_policy import RetryPolicy
+
 logger = structlog.get_logger()
 
+# Cache values are binary envelopes; request-scoped clients decode responses as text
+_binary_redis: Redis | None = None
+
+
+def get_binary_redis(redis: Redis) -> Redis:
+    """``redis`` itself if it returns raw bytes, else a shared bytes-returning client."""
+    global _binary_redis
+    if not redis.connection_pool.connection_kwargs.get("decode_responses"):
+        return redis
+    if _binary_redis is None:
+        _binary_redis = Redis.from_url(settings.redis_url)
+    return _binary_redis
+
 
 @dataclass
 class CacheResult:
     hit: bool
-    layer: str = ""  # "exact" or "template"
+    layer: str = ""  # "exact", "template", "semantic" or "coalesced"
     data: dict | None = None
+    # Prompt embedding computed by a semantic lookup, reused by set() on a miss
+    embedding: list[float] | None = None
+
+
+def _similarity(a: list[float], b) -> float | None:
+    """Cosine similarity of two unit-length vectors; None if their dimensions differ."""
+    if len(a) != len(b):
+        return None
+    return math.sumprod(a, b)
+
+
+def _nearest(embedding: list[float], entries: list[bytes]) -> tuple[float, object]:
+    """Best (similarity, data) among encoded semantic entries, skipping any whose
+    embedding has another dimension (written before a dimensions change)."""
+    best_score, best_data = 0.0, None
+    for raw in entries:
+        entry = cache_codec.decode(raw)
+        score = _similarity(embedding, _unpack_embedding(entry["e"]))
+        if score is not None and score > best_score:
+            best_score, best_data = score, entry["d"]
+    return best_score, best_data
+
+
+def _unpack_embedding(value) -> array | list[float]:
+    if isinstance(value, bytes):
+        return array("f", value)
+    return value
 
 
 class LLMCache:
-    """Redis cache with 2 layers: exact match and template match."""
+    """Redis cache with 3 layers: exact match, template match and (opt-in) semantic match."""
 
     EXACT_TTL = 86400  # 24 hours
     TEMPLATE_TTL = 43200  # 12 hours
+    SEMANTIC_TTL = 43200  # 12 hours, refreshed on every insert
+
+    # Per-recipe memory accounting: hourly buckets of bytes written per layer; a layer's
+    # live footprint is what was written within its TTL
+    MEMORY_BUCKET_SECONDS = 3600
+    LAYER_TTLS = {"exact": EXACT_TTL, "template": TEMPLATE_TTL, "semantic": SEMANTIC_TTL}
+
+    # Per-recipe/step hit, miss and byte counters (kept while the recipe is in use)
+    STATS_TTL = 7 * 86400
+
+    # Single-flight: one worker computes a missing key, the others wait for it. The
+    # owner extends the lock while its call runs (a call can outlast any fixed TTL: see
+    # RetryPolicy.worst_case_seconds), so the TTL only bounds how long a dead owner
+    # blocks the waiters.
+    FLIGHT_TTL = 30  # seconds
+    FLIGHT_HEARTBEAT = 10.0
+    FLIGHT_POLL_INITIAL = 0.05
+    FLIGHT_POLL_MAX = 1.0
+
+    # Delete the flight lock only if we still own it
+    _RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    # Extend the flight lock only if we still own it
+    _EXTEND_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("expire", KEYS[1], ARGV[2])
+    end
+    return 0
+    """
 
-    def __init__(self, redis: Redis):
+    def __init__(self, redis: Redis, record_stats: bool = True):
         self.redis = redis
+        self.store = get_binary_redis(redis)
+        # Disabled for synthetic traffic such as cache warming
+        self.record_stats = record_stats
 
     @staticmethod
     def _exact_key(model: str, messages: list[dict]) -> str:
         payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
         return f"llm:exact:{hashlib.sha256(payload.encode()).hexdigest()}"
 
+    @staticmethod
+    def _flight_key(exact_key: str) -> str:
+        return f"llm:flight:{exact_key.removeprefix('llm:exact:')}"
+
     @staticmethod
     def _template_key(recipe_id: str, step_id: str, normalized_input: str) -> str:
         payload = f"{recipe_id}:{step_id}:{normalized_input.lower().strip()}"
         return f"llm:tpl:{hashlib.sha256(payload.encode()).hexdigest()}"
 
+    @staticmethod
+    def _semantic_key(recipe_id: str, step_id: str, model: str) -> str:
+        dimensions = settings.llm_semantic_cache_dimensions
+        return f"llm:sem:{recipe_id}:{step_id}:{model}:{dimensions}"
+
+    async def _semantic_get(
+        self, model: str, recipe_id: str, step_id: str, input_text: str, threshold: float
+    ) -> CacheResult:
+        """Nearest previous prompt for the same recipe/step/model, by embedding similarity.
+
+        Entries live in a capped Redis list per recipe/step/model/dimensions and are
+        scanned linearly in a worker thread, keeping the event loop free while a full
+        list is decoded and scored.
+        """
+        from app.orchestrator.llm_client import get_llm_client
+
+        try:
+            embedding = await get_llm_client().embed(input_text)
+        except Exception as e:
+            # The semantic layer is an optimisation: fall through to the LLM call
+            logger.warning("semantic_cache_embed_failed", error=str(e))
+            return CacheResult(hit=False)
+        entries = await self.store.lrange(self._semantic_key(recipe_id, step_id, model), 0, -1)
+
+        best_score, best_data = await asyncio.to_thread(_nearest, embedding, entries)
+
+        if best_data is not None and best_score >= threshold:
+            logger.debug("cache_hit", layer="semantic", similarity=round(best_score, 4))
+            return CacheResult(hit=True, layer="semantic", data=best_data)
+        return CacheResult(hit=False, embedding=embedding)
+
+    async def _semantic_set(
+        self, model: str, recipe_id: str, step_id: str, embedding: list[float], data
+    ) -> None:
+        key = self._semantic_key(recipe_id, step_id, model)
+        # float32 is plenty for a similarity threshold and a quarter of the JSON size
+        entry = cache_codec.encode({"e": array("f", embedding).tobytes(), "d": data})
+        pipe = self.store.pipeline(transaction=False)
+        pipe.lpush(key, entry)
+        pipe.ltrim(key, 0, settings.llm_semantic_cache_max_entries - 1)
+        pipe.expire(key, self.SEMANTIC_TTL)
+        await pipe.execute()
+        await self._account(recipe_id, "semantic", len(entry), step_id)
+
+    @staticmethod
+    def _memory_key(recipe_id: str, bucket: int) -> str:
+        return f"llm:mem:{recipe_id}:{bucket}"
+
+    @staticmethod
+    def _stats_key(recipe_id: str) -> str:
+        return f"llm:stats:{recipe_id}"
+
+    async def _account(
+        self, recipe_id: str | None, layer: str, nbytes: int, step_id: str | None = None
+    ) -> None:
+        bucket = int(time.time() // self.MEMORY_BUCKET_SECONDS)
+        key = self._memory_key(recipe_id or "_none", bucket)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(key, f"{layer}_bytes", nbytes)
+        pipe.hincrby(key, f"{layer}_entries", 1)
+        pipe.expire(key, self.EXACT_TTL + self.MEMORY_BUCKET_SECONDS)
+        if recipe_id and step_id and self.record_stats:
+            stats_key = self._stats_key(recipe_id)
+            pipe.hincrby(stats_key, f"{step_id}:bytes", nbytes)
+            pipe.expire(stats_key, self.STATS_TTL)
+        await pipe.execute()
+
+    async def _record_lookup(self, recipe_id: str, step_id: str, result: CacheResult) -> None:
+        key = self._stats_key(recipe_id)
+        pipe = self.redis.pipeline(transaction=False)
+        if result.hit:
+            pipe.hincrby(key, f"{step_id}:hits", 1)
+            pipe.hincrby(key, f"{step_id}:hits_{result.layer}", 1)
+        else:
+            pipe.hincrby(key, f"{step_id}:misses", 1)
+        pipe.expire(key, self.STATS_TTL)
+        await pipe.execute()
+
+    async def stats(self, recipe_id: str) -> dict[str, dict]:
+        """Hit/miss/byte counters per step of a recipe, with per-layer hit counts."""
+        raw = await self.redis.hgetall(self._stats_key(recipe_id))
+        steps: dict[str, dict] = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            step_id, _, metric = field.rpartition(":")
+            step = steps.setdefault(step_id, {"hits": 0, "misses": 0, "bytes": 0, "layers": {}})
+            if metric.startswith("hits_"):
+                step["layers"][metric.removeprefix("hits_")] = int(value)
+            else:
+                step[metric] = int(value)
+
+        for step in steps.values():
+            lookups = step["hits"] + step["misses"]
+            step["hit_rate"] = round(step["hits"] / lookups, 4) if lookups else 0.0
+        return steps
+
+    async def memory_usage(self, recipe_id: str) -> dict[str, dict[str, int]]:
+        """Approximate live bytes and entries per cache layer written for a recipe.
+
+        Counts values written within each layer's TTL; overwrites and evictions are
+        not subtracted, so this is an upper bound.
+        """
+        now = int(time.time() // self.MEMORY_BUCKET_SECONDS)
+        usage = {}
+        for layer, ttl in self.LAYER_TTLS.items():
+            buckets = range(now - ttl // self.MEMORY_BUCKET_SECONDS, now + 1)
+            pipe = self.redis.pipeline(transaction=False)
+            for bucket in buckets:
+                key = self._memory_key(recipe_id, bucket)
+                pipe.hmget(key, f"{layer}_bytes", f"{layer}_entries")
+            rows = await pipe.execute()
+            usage[layer] = {
+                "bytes": sum(int(b or 0) for b, _ in rows),
+                "entries": sum(int(e or 0) for _, e in rows),
+            }
+        return usage
+
     async def get(
         self,
         model: str,
@@ -41,21 +250,46 @@ class LLMCache:
         recipe_id: str | None = None,
         step_id: str | None = None,
         input_text: str | None = None,
+        semantic_threshold: float | None = None,
+    ) -> CacheResult:
+        """Look up a cached response. The semantic layer only runs when
+        ``semantic_threshold`` is given (steps with ``semantic_cache: true``)."""
+        result = await self._lookup(
+            model, messages, recipe_id, step_id, input_text, semantic_threshold
+        )
+        if recipe_id and step_id and self.record_stats:
+            await self._record_lookup(recipe_id, step_id, result)
+        return result
+
+    async def _lookup(
+        self,
+        model: str,
+        messages: list[dict],
+        recipe_id: str | None,
+        step_id: str | None,
+        input_text: str | None,
+        semantic_threshold: float | None,
     ) -> CacheResult:
         # Layer 1: exact match
         key1 = self._exact_key(model, messages)
-        cached = await self.redis.get(key1)
+        cached = await self.store.get(key1)
         if cached:
             logger.debug("cache_hit", layer="exact")
-            return CacheResult(hit=True, layer="exact", data=json.loads(cached))
+            return CacheResult(hit=True, layer="exact", data=cache_codec.decode(cached))
 
         # Layer 2: template match
         if recipe_id and step_id and input_text:
             key2 = self._template_key(recipe_id, step_id, input_text)
-            cached = await self.redis.get(key2)
+            cached = await self.store.get(key2)
             if cached:
                 logger.debug("cache_hit", layer="template")
-                return CacheResult(hit=True, layer="template", data=json.loads(cached))
+                return CacheResult(hit=True, layer="template", data=cache_codec.decode(cached))
+
+            # Layer 3: semantic match
+            if semantic_threshold is not None:
+                return await self._semantic_get(
+                    model, recipe_id, step_id, input_text, semantic_threshold
+                )
 
         return CacheResult(hit=False)
 
@@ -67,14 +301,87 @@ class LLMCache:
         recipe_id: str | None = None,
         step_id: str | None = None,
         input_text: str | None = None,
+        embedding: list[float] | None = None,
     ) -> None:
-        data = json.dumps(response_data)
+        data = cache_codec.encode(response_data)
 
         # Layer 1: exact match
         key1 = self._exact_key(model, messages)
-        await self.redis.setex(key1, self.EXACT_TTL, data)
+        await self.store.setex(key1, self.EXACT_TTL, data)
+        await self._account(recipe_id, "exact", len(data), step_id)
 
         # Layer 2: template match
         if recipe_id and step_id and input_text:
             key2 = self._template_key(recipe_id, step_id, input_text)
-            await self.redis.setex(key2, self.TEMPLATE_TTL, data)
+            await self.store.setex(key2, self.TEMPLATE_TTL, data)
+            await self._account(recipe_id, "template", len(data), step_id)
+
+            # Layer 3: semantic match (only when the lookup computed an embedding)
+            if embedding is not None:
+                await self._semantic_set(model, recipe_id, step_id, embedding, response_data)
+
+    async def acquire_flight(self, model: str, messages: list[dict]) -> str | None:
+        """Try to become the single worker computing this exact key.
+
+        Returns an ownership token, or None if another worker already holds the flight.
+        """
+        token = uuid.uuid4().hex
+        key = self._flight_key(self._exact_key(model, messages))
+        acquired = await self.redis.set(key, token, nx=True, ex=self.FLIGHT_TTL)
+        return token if acquired else None
+
+    async def release_flight(self, model: str, messages: list[dict], token: str) -> None:
+        key = self._flight_key(self._exact_key(model, messages))
+        await self.redis.eval(self._RELEASE_SCRIPT, 1, key, token)
+
+    @contextlib.asynccontextmanager
+    async def hold_flight(self, model: str, messages: list[dict], token: str):
+        """Keep an acquired flight alive while the owner computes, then release it."""
+        key = self._flight_key(self._exact_key(model, messages))
+
+        async def heartbeat() -> None:
+            while True:
+                await asyncio.sleep(self.FLIGHT_HEARTBEAT)
+                try:
+                    extended = await self.redis.eval(
+                        self._EXTEND_SCRIPT, 1, key, token, self.FLIGHT_TTL
+                    )
+                except Exception as e:
+                    logger.warning("flight_heartbeat_failed", error=str(e))
+                    continue
+                if not extended:
+                    return  # lost the lock: the waiters have moved on
+
+        task = asyncio.create_task(heartbeat())
+        try:
+            yield
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            await self.release_flight(model, messages, token)
+
+    async def wait_for_flight(self, model: str, messages: list[dict]) -> CacheResult:
+        """Wait for the flight owner's result, polling with exponential backoff and jitter.
+
+        Gives up (miss) as soon as the owner releases the flight without having cached
+        anything (e.g. its LLM call failed) or stops extending it (it died), and at the
+        latest after the model's worst-case call duration.
+        """
+        key1 = self._exact_key(model, messages)
+        flight_key = self._flight_key(key1)
+        timeout = RetryPolicy.for_model(model).worst_case_seconds() + self.FLIGHT_TTL
+        deadline = time.monotonic() + timeout
+        delay = self.FLIGHT_POLL_INITIAL
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            cached = await self.store.get(key1)
+            if cached:
+                logger.debug("cache_hit", layer="coalesced")
+                return CacheResult(hit=True, layer="coalesced", data=cache_codec.decode(cached))
+            if not await self.redis.exists(flight_key):
+                break
+            delay = min(delay * 2, self.FLIGHT_POLL_MAX)
+
+        return CacheResult(hit=False)
@@ -0,0 +1,58 @@
+"""Binary envelope for cached LLM responses.
+
+Layout: ``[version][codec][payload]`` where the payload is msgpack, compressed
+with zstd (or zlib when ``zstandard`` is not installed) once it exceeds
+``settings.llm_cache_compress_threshold`` bytes. Values written before the
+envelope existed are plain JSON text and are still readable.
+"""
+
+import json
+import zlib
+
+import msgpack
+
+from app.config import settings
+
+VERSION = 1
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+try:
+    import zstandard
+except ImportError:  # optional: fall back to zlib
+    zstandard = None
+
+
+def encode(data) -> bytes:
+    payload = msgpack.packb(data, use_bin_type=True)
+    codec = CODEC_NONE
+    if len(payload) > settings.llm_cache_compress_threshold:
+        if zstandard is not None:
+            payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+            codec = CODEC_ZSTD
+        else:
+            payload = zlib.compress(payload, ZLIB_LEVEL)
+            codec = CODEC_ZLIB
+    return bytes((VERSION, codec)) + payload
+
+
+def decode(value: bytes | str):
+    if isinstance(value, str) or not value or value[0] != VERSION:
+        # Legacy JSON value (a JSON document never starts with byte 0x01)
+        return json.loads(value)
+
+    codec, payload = value[1], value[2:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Cached value is zstd-compressed but zstandard is not installed")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    elif codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec != CODEC_NONE:
+        raise ValueError(f"Unknown cache codec {codec}")
+    return msgpack.unpackb(payload, raw=False)
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+import structlog
+from openai import APIStatusError
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Multiplicative decrease applied to a model's limit on 429 / 5xx
+BACKOFF_FACTOR = 0.5
+# A call slower than this multiple of the model's average latency counts as congestion
+LATENCY_TOLERANCE = 2.0
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.1
+# Ignore further overload signals for this long after a decrease (one burst = one backoff)
+DECREASE_COOLDOWN = 1.0
+# Pause used on 429 when the provider sends no Retry-After
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """True for provider responses that mean "send less": 429 and 5xx."""
+    return isinstance(error, APIStatusError) and (
+        error.status_code == 429 or error.status_code >= 500
+    )
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """Seconds requested by ``Retry-After`` / ``retry-after-ms`` on an API error, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+
+    if value := headers.get("retry-after-ms"):
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    if value := headers.get("retry-after"):
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+@dataclass
+class _ModelLimit:
+    limit: float
+    in_flight: int = 0
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+    latency_avg: float | None = None
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Per-model AIMD limit on concurrent in-flight LLM calls.
+
+    Each healthy completion that used the full window grows the limit by
+    ``1 / limit`` (about +1 per round trip); a 429 or 5xx halves it and, when the
+    provider sends ``Retry-After``, holds new calls for that model until it expires.
+    Calls much slower than the model's running average stop further growth.
+    """
+
+    def __init__(
+        self,
+        initial: int | None = None,
+        minimum: int | None = None,
+        maximum: int | None = None,
+    ):
+        self.initial = initial or settings.llm_concurrency_initial
+        self.minimum = minimum or settings.llm_concurrency_min
+        self.maximum = maximum or settings.llm_concurrency_max
+        self._models: dict[str, _ModelLimit] = {}
+
+    def _state(self, model: str) -> _ModelLimit:
+        if model not in self._models:
+            self._models[model] = _ModelLimit(limit=float(self.initial))
+        return self._models[model]
+
+    def limit(self, model: str) -> int:
+        return int(self._state(model).limit)
+
+    def in_flight(self, model: str) -> int:
+        return self._state(model).in_flight
+
+    async def acquire(self, model: str) -> None:
+        state = self._state(model)
+        async with state.condition:
+            while True:
+                delay = state.blocked_until - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(state.condition.wait(), delay)
+                    except TimeoutError:
+                        pass
+                    continue
+                if state.in_flight < int(state.limit):
+                    break
+                await state.condition.wait()
+            state.in_flight += 1
+
+    async def release(self, model: str) -> None:
+        state = self._state(model)
+        async with state.condition:
+            state.in_flight -= 1
+            state.condition.notify_all()
+
+    def on_success(self, model: str, latency: float) -> None:
+        state = self._state(model)
+        average = state.latency_avg if state.latency_avg is not None else latency
+        healthy = latency <= average * LATENCY_TOLERANCE
+        state.latency_avg = average + LATENCY_EWMA_ALPHA * (latency - average)
+
+        # Only grow when the window was actually full, otherwise the limit drifts up unused
+        if healthy and state.in_flight >= int(state.limit):
+            state.limit = min(float(self.maximum), state.limit + 1 / state.limit)
+
+    def on_overload(self, model: str, retry_after: float | None = None) -> None:
+        state = self._state(model)
+        now = time.monotonic()
+
+        if retry_after is not None:
+            state.blocked_until = max(state.blocked_until, now + retry_after)
+
+        if now - state.last_decrease >= DECREASE_COOLDOWN:
+            previous = state.limit
+            state.limit = max(float(self.minimum), state.limit * BACKOFF_FACTOR)
+            state.last_decrease = now
+            logger.warning(
+                "llm_concurrency_backoff",
+                model=model,
+                limit=int(state.limit),
+                previous_limit=int(previous),
+                retry_after=retry_after,
+            )
+
+    @asynccontextmanager
+    async def slot(self, model: str):
+        """Hold one concurrency slot for ``model`` and feed the outcome back into its limit."""
+        await self.acquire(model)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            if is_overload_error(e):
+                retry_after = retry_after_seconds(e)
+                if retry_after is None and e.status_code == 429:
+                    retry_after = DEFAULT_RETRY_AFTER
+                self.on_overload(model, retry_after)
+            raise
+        else:
+            self.on_success(model, time.monotonic() - started)
+        finally:
+            await self.release(model)
@@ -1,3 +1,4 @@
+import contextlib
 import json
 import time
 from datetime import datetime
@@ -6,9 +7,12 @@ import structlog
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.orchestrator.budget import BudgetMonitor
 from app.orchestrator.cache import LLMCache
 from app.orchestrator.llm_client import get_llm_client
+from app.orchestrator.model_health import ModelHealthStore
+from app.orchestrator.packing import PackingError, PromptPacker, is_packable
 from app.orchestrator.prompt_builder import prompt_builder
 from app.orchestrator.rate_limiter import RateLimiter
 from app.orchestrator.router_model import model_router
@@ -52,9 +56,16 @@ class ExecutionResult:
 class OrchestrationEngine:
     """Core engine that executes agent workflows step by step."""
 
-    def __init__(self, redis: Redis):
-        self.cache = LLMCache(redis)
+    def __init__(
+        self, redis: Redis, synthetic: bool = False, packer: PromptPacker | None = None
+    ):
+        # Synthetic runs (cache warming) are left out of the cache statistics
+        self.synthetic = synthetic
+        # Batch chunks share a packer so packable steps of concurrent items go out together
+        self.packer = packer
+        self.cache = LLMCache(redis, record_stats=not synthetic)
         self.budget = BudgetMonitor(redis)
+        self.model_health = ModelHealthStore(redis)
         self.rate_limiter = RateLimiter(redis)
 
     async def execute(
@@ -136,15 +147,7 @@ class OrchestrationEngine:
                 step_result["duration_ms"] = int((time.time() - step_start) * 1000)
                 result.steps.append(step_result)
 
-        # Build final output from last step or explicit output mapping
-        output_mapping = recipe_config.get("output_mapping")
-        if output_mapping:
-            result.output = {}
-            for key, template in output_mapping.items():
-                result.output[key] = prompt_builder.render_value(template, variables)
-        elif steps:
-            last_step_id = steps[-1]["id"]
-            result.output = step_outputs.get(last_step_id, {}).get("output", {})
+        result.output = self.build_output(recipe_config, variables)
 
         result.duration_ms = int((time.time() - start_time) * 1000)
         result.models_used = list(result.models_used)
@@ -205,38 +208,38 @@ class OrchestrationEngine:
         
         # Note: Audio steps are handled separately in the main loop
         # This is just for LLM steps that might process audio transcripts
-        
-        # Build messages
-        messages = prompt_builder.build_messages(
-            system_prompt=step["system_prompt"],
-            user_prompt=step["user_prompt"],
-            variables=variables,
-        )
 
-        # Select model
-        complexity = step.get("complexity", "generate_short")
-        client = get_llm_client()
-        input_tokens = client.count_messages_tokens(messages)
-        model = model_router.select(
-            complexity=complexity,
-            org_plan=user_plan,
-            input_tokens=input_tokens,
-            force_model=step.get("force_model"),
-        )
+        if model_router.health_is_stale():
+            model_router.update_health(await self.model_health.snapshot())
+        messages, model, input_tokens = self.prepare_llm_request(step, variables, user_plan)
 
         # Rate limit check
         await self.rate_limiter.check(user_id, user_plan)
 
         # Check cache
         cacheable = step.get("cacheable", True)
+        flight_token = None
+        embedding = None
         if cacheable:
+            semantic_threshold = None
+            if step.get("semantic_cache"):
+                semantic_threshold = step.get(
+                    "semantic_threshold", settings.llm_semantic_cache_threshold
+                )
             cache_result = await self.cache.get(
                 model=model,
                 messages=messages,
                 recipe_id=recipe_id,
                 step_id=step["id"],
                 input_text=messages[-1]["content"] if messages else None,
+                semantic_threshold=semantic_threshold,
             )
+            embedding = cache_result.embedding
+            if not cache_result.hit:
+                # Coalesce identical concurrent calls (e.g. duplicate batch rows)
+                flight_token = await self.cache.acquire_flight(model, messages)
+                if flight_token is None:
+                    cache_result = await self.cache.wait_for_flight(model, messages)
             if cache_result.hit:
                 result.cache_hits += 1
                 step_result["cache_hit"] = True
@@ -244,6 +247,41 @@ class OrchestrationEngine:
                 step_result["cost_cents"] = 0
                 return cache_result.data
 
+        flight = (
+            self.cache.hold_flight(model, messages, flight_token)
+            if flight_token
+            else contextlib.nullcontext()
+        )
+        async with flight:
+            return await self._call_llm(
+                step=step,
+                model=model,
+                messages=messages,
+                input_tokens=input_tokens,
+                recipe_id=recipe_id,
+                result=result,
+                step_result=step_result,
+                embedding=embedding,
+            )
+
+    async def _call_llm(
+        self,
+        step: dict,
+        model: str,
+        messages: list[dict],
+        input_tokens: int,
+        recipe_id: str | None,
+        result: ExecutionResult,
+        step_result: dict,
+        embedding: list[float] | None = None,
+    ) -> dict | str:
+        """Call the LLM for a step (cache miss), track cost and populate the cache.
+
+        ``embedding`` is the prompt embedding from a semantic cache miss, if any.
+        """
+        client = get_llm_client()
+        cacheable = step.get("cacheable", True)
+
         # Budget check
         max_tokens = step.get("max_tokens", 500)
         estimated_cost = self.budget.estimate_cost(model, input_tokens, max_tokens)
@@ -254,13 +292,26 @@ class OrchestrationEngine:
         if step.get("response_format") == "json_object":
             response_format = {"type": "json_object"}
 
-        llm_response = await client.complete(
-            model=model,
-            messages=messages,
-            max_tokens=max_tokens,
-            temperature=step.get("temperature", 0.2),
-            response_format=response_format,
-        )
+        started = time.monotonic()
+        try:
+            llm_response = None
+            if self.packer and is_packable(step):
+                try:
+                    llm_response = await self.packer.submit(step, model, messages)
+                except PackingError as e:
+                    logger.debug("packing_fallback", step=step["id"], reason=str(e))
+            if llm_response is None:
+                llm_response = await client.complete(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=step.get("temperature", 0.2),
+                    response_format=response_format,
+                )
+        except Exception:
+            await self.model_health.record(model, time.monotonic() - started, ok=False)
+            raise
+        await self.model_health.record(model, time.monotonic() - started, ok=True)
 
         # Record actual cost
         await self.budget.record_actual(estimated_cost, llm_response.cost_usd)
@@ -275,17 +326,12 @@ class OrchestrationEngine:
         step_result["model_used"] = model
         step_result["input_tokens"] = llm_response.input_tokens
         step_result["output_tokens"] = llm_response.output_tokens
+        step_result["cached_tokens"] = llm_response.cached_tokens
         step_result["cost_cents"] = round(llm_response.cost_usd * 100, 6)
         step_result["prompt_hash"] = llm_response.prompt_hash
         step_result["cache_hit"] = False
 
-        # Parse output
-        output = llm_response.content
-        if step.get("response_format") == "json_object":
-            try:
-                output = json.loads(output)
-            except json.JSONDecodeError:
-                logger.warning("json_parse_failed", content=output[:200])
+        output = self.parse_llm_output(step, llm_response.content)
 
         # Cache the result
         if cacheable:
@@ -296,6 +342,7 @@ class OrchestrationEngine:
                 recipe_id=recipe_id,
                 step_id=step["id"],
                 input_text=messages[-1]["content"] if messages else None,
+                embedding=embedding,
             )
 
         return output
@@ -421,6 +468,59 @@ class OrchestrationEngine:
         # Return transcript text
         return transcription_result["text"]
 
+    def prepare_llm_request(
+        self,
+        step: dict,
+        variables: dict,
+        user_plan: str,
+    ) -> tuple[list[dict], str, int]:
+        """Render an LLM step's messages and pick its model.
+
+        Returns ``(messages, model, estimated_input_tokens)``.
+        """
+        messages = prompt_builder.build_messages(
+            system_prompt=step["system_prompt"],
+            user_prompt=step["user_prompt"],
+            variables=variables,
+            layout=step.get("prompt_layout", settings.prompt_layout_default),
+        )
+
+        # Select model
+        complexity = step.get("complexity", "generate_short")
+        input_tokens = get_llm_client().count_messages_tokens(messages)
+        model = model_router.select(
+            complexity=complexity,
+            org_plan=user_plan,
+            input_tokens=input_tokens,
+            force_model=step.get("force_model"),
+        )
+        return messages, model, input_tokens
+
+    @staticmethod
+    def parse_llm_output(step: dict, content: str) -> dict | str:
+        """Decode the raw completion text according to the step's response format."""
+        output = content
+        if step.get("response_format") == "json_object":
+            try:
+                output = json.loads(content)
+            except json.JSONDecodeError:
+                logger.warning("json_parse_failed", content=content[:200])
+        return output
+
+    @staticmethod
+    def build_output(recipe_config: dict, variables: dict) -> dict:
+        """Build the final output from the explicit output mapping or the last step."""
+        output_mapping = recipe_config.get("output_mapping")
+        if output_mapping:
+            return {
+                key: prompt_builder.render_value(template, variables)
+                for key, template in output_mapping.items()
+            }
+        steps = recipe_config.get("steps", [])
+        if steps:
+            return variables.get("steps", {}).get(steps[-1]["id"], {}).get("output", {})
+        return {}
+
     def _execute_transform_step(self, step: dict, variables: dict) -> dict:
         """Execute a data transform step (no LLM call)."""
         mapping = step.get("mapping", {})
@@ -1,20 +1,35 @@
+import asyncio
 import hashlib
 import json
+import time
 from dataclasses import dataclass
+from typing import Any
 
+import httpx
 import structlog
 import tiktoken
 from openai import AsyncOpenAI
 
 from app.config import settings
+from app.http_client import get_http_client
+from app.orchestrator.concurrency import AdaptiveConcurrencyLimiter
+from app.orchestrator.retry_policy import (
+    LatencyTracker,
+    RetryPolicy,
+    is_retryable_error,
+    run_hedged,
+)
 
 logger = structlog.get_logger()
 
-# Pricing per 1M tokens (USD)
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Pricing per 1M tokens (USD); "cached_input" applies to prompt tokens served from
+# the provider's prompt cache
 MODEL_PRICING = {
-    "gpt-4.1-nano": {"input": 0.10, "output": 0.40},
-    "gpt-4.1-mini": {"input": 0.40, "output": 1.60},
-    "gpt-4.1": {"input": 2.00, "output": 8.00},
+    "gpt-4.1-nano": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
 }
 
 
@@ -26,15 +41,36 @@ class LLMResponse:
     output_tokens: int
     cost_usd: float
     prompt_hash: str
+    cached_tokens: int = 0
 
 
 class LLMClient:
-    """Async OpenAI client with retry and cost tracking."""
+    """Async OpenAI client with retry, adaptive concurrency and cost tracking."""
 
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self.latencies = LatencyTracker()
+        self._client: AsyncOpenAI | None = None
+        self._http_client: httpx.AsyncClient | None = None
         self._encoder: tiktoken.Encoding | None = None
 
+    @property
+    def client(self) -> AsyncOpenAI:
+        """SDK client bound to the current shared HTTP client.
+
+        Rebuilt whenever the shared client was closed and recreated (worker or API
+        restart within the process, tests), so it never holds a closed pool.
+        """
+        http_client = get_http_client()
+        if self._client is None or self._http_client is not http_client:
+            self._client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                http_client=http_client,
+            )
+            self._http_client = http_client
+        return self._client
+
     @property
     def encoder(self) -> tiktoken.Encoding:
         if self._encoder is None:
@@ -53,9 +89,16 @@ class LLMClient:
         return total
 
     @staticmethod
-    def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    def calculate_cost(
+        model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0
+    ) -> float:
+        """Cost in USD; ``cached_tokens`` (part of ``input_tokens``) use the cached rate."""
         pricing = MODEL_PRICING.get(model, MODEL_PRICING["gpt-4.1-mini"])
-        return (input_tokens * pricing["input"] + output_tokens * pricing["output"]) / 1_000_000
+        return (
+            (input_tokens - cached_tokens) * pricing["input"]
+            + cached_tokens * pricing.get("cached_input", pricing["input"])
+            + output_tokens * pricing["output"]
+        ) / 1_000_000
 
     @staticmethod
     def hash_prompt(model: str, messages: list[dict]) -> str:
@@ -88,17 +131,25 @@ class LLMClient:
         if response_format:
             kwargs["response_format"] = response_format
 
-        response = await self.client.chat.completions.create(**kwargs)
+        response, lost_hedges = await self._create_with_policy(model, kwargs)
 
         input_tokens = response.usage.prompt_tokens
         output_tokens = response.usage.completion_tokens
-        cost = self.calculate_cost(model, input_tokens, output_tokens)
+        details = response.usage.prompt_tokens_details
+        cached_tokens = (details.cached_tokens or 0) if details else 0
+        cost = self.calculate_cost(model, input_tokens, output_tokens, cached_tokens)
+        if lost_hedges:
+            # A cancelled hedge has already sent the same prompt: bill it at the uncached
+            # input rate (its partial output is unknown and not counted)
+            cost += lost_hedges * self.calculate_cost(model, input_tokens, 0)
 
         logger.info(
             "llm_call_complete",
             model=model,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            lost_hedges=lost_hedges,
             cost_usd=f"${cost:.6f}",
         )
 
@@ -109,7 +160,65 @@ class LLMClient:
             output_tokens=output_tokens,
             cost_usd=cost,
             prompt_hash=prompt_hash,
+            cached_tokens=cached_tokens,
+        )
+
+    async def embed(self, text: str) -> list[float]:
+        """Unit-length embedding of ``text`` (used by the semantic cache layer)."""
+        response = await self.client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=text,
+            dimensions=settings.llm_semantic_cache_dimensions,
         )
+        return response.data[0].embedding
+
+    async def _create_with_policy(self, model: str, kwargs: dict) -> tuple[Any, int]:
+        """Run a completion under the model's retry policy and concurrency limit.
+
+        Each attempt is bounded by the policy timeout, which is also passed to the SDK
+        so the shared HTTP client's default timeout does not cut a slower model short.
+        Retryable failures back off with jitter (and any Retry-After pause the limiter
+        applies). SDK-level retries are disabled so every attempt is visible to the
+        policy and limiter.
+
+        Returns the response and the number of other copies (a cancelled or failed
+        hedge) started in the successful round, whose prompts the caller still pays for.
+        """
+        policy = RetryPolicy.for_model(model)
+        client = self.client.with_options(max_retries=0)
+        launched = 0
+
+        async def attempt():
+            nonlocal launched
+            launched += 1
+            async with self.limiter.slot(model):
+                started = time.monotonic()
+                async with asyncio.timeout(policy.timeout):
+                    response = await client.chat.completions.create(
+                        **kwargs, timeout=policy.timeout
+                    )
+            self.latencies.record(model, time.monotonic() - started)
+            return response
+
+        hedge_after = self.latencies.hedge_delay(model) if policy.hedge else None
+        for retry in range(policy.max_retries + 1):
+            launched = 0
+            try:
+                response = await run_hedged(attempt, hedge_after)
+                return response, launched - 1
+            except Exception as e:
+                if not is_retryable_error(e) or retry == policy.max_retries:
+                    raise
+                delay = policy.backoff(retry)
+                logger.warning(
+                    "llm_call_retry",
+                    model=model,
+                    error=type(e).__name__,
+                    attempt=retry + 1,
+                    delay=round(delay, 3),
+                    limit=self.limiter.limit(model),
+                )
+                await asyncio.sleep(delay)
 
 
 # Lazy singleton
@@ -0,0 +1,84 @@
+import time
+from dataclasses import dataclass
+
+import structlog
+from redis.asyncio import Redis
+
+from app.config import settings
+from app.orchestrator.llm_client import MODEL_PRICING
+
+logger = structlog.get_logger()
+
+KEY_PREFIX = "mh"
+BUCKET_SECONDS = 60
+
+
+@dataclass
+class ModelStats:
+    """Rolling call statistics for one model, aggregated across all workers."""
+
+    calls: int = 0
+    errors: int = 0
+    latency_sum: float = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        successes = self.calls - self.errors
+        return self.latency_sum / successes if successes else 0.0
+
+    def is_degraded(self, model: str) -> bool:
+        if self.calls < settings.model_health_min_calls:
+            return False
+        slo = settings.model_latency_slo.get(model)
+        return self.error_rate > settings.model_max_error_rate or (
+            slo is not None and self.avg_latency > slo
+        )
+
+
+class ModelHealthStore:
+    """Per-minute call/error/latency counters per model in Redis."""
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    @staticmethod
+    def _key(model: str, bucket: int) -> str:
+        return f"{KEY_PREFIX}:{model}:{bucket}"
+
+    async def record(self, model: str, latency: float, ok: bool) -> None:
+        key = self._key(model, int(time.time() // BUCKET_SECONDS))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(key, "calls", 1)
+        if ok:
+            pipe.hincrbyfloat(key, "latency_sum", latency)
+        else:
+            pipe.hincrby(key, "errors", 1)
+        pipe.expire(key, (settings.model_health_window_minutes + 1) * BUCKET_SECONDS)
+        await pipe.execute()
+
+    async def snapshot(self, models: list[str] | None = None) -> dict[str, ModelStats]:
+        """Stats over the last ``model_health_window_minutes`` for each model."""
+        models = models or list(MODEL_PRICING)
+        current = int(time.time() // BUCKET_SECONDS)
+        buckets = range(current - settings.model_health_window_minutes + 1, current + 1)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for model in models:
+            for bucket in buckets:
+                pipe.hmget(self._key(model, bucket), "calls", "errors", "latency_sum")
+        rows = iter(await pipe.execute())
+
+        stats = {}
+        for model in models:
+            model_stats = ModelStats()
+            for _ in buckets:
+                calls, errors, latency_sum = next(rows)
+                model_stats.calls += int(calls or 0)
+                model_stats.errors += int(errors or 0)
+                model_stats.latency_sum += float(latency_sum or 0)
+            stats[model] = model_stats
+        return stats
@@ -0,0 +1,181 @@
+"""Multi-item prompt packing for small classify/extract steps in batches.
+
+Concurrent batch items that reach the same packable step (same model and same
+rendered system messages) are grouped, and one request asks the model for a JSON
+array with one result per item. Each item gets its own result and an equal
+share of the request's tokens and cost. An item whose result is missing or
+malformed gets a ``PackingError`` and the engine retries it as a single call.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+
+import structlog
+
+from app.orchestrator.llm_client import LLMClient, LLMResponse
+
+logger = structlog.get_logger()
+
+PACKABLE_COMPLEXITIES = {"classify", "extract"}
+
+# Upper bound on the completion budget of one packed request
+MAX_PACKED_OUTPUT_TOKENS = 4096
+
+PACKED_INSTRUCTIONS = (
+    "You will receive {count} independent items, each introduced by a line "
+    '"### Item <id>". Handle every item exactly as if it had been sent alone, following '
+    'the instructions above. Respond with a JSON object {{"results": [...]}} containing one '
+    'entry {{"id": <id>, "result": <the response for that item alone>}} per item, '
+    "in the same order."
+)
+
+
+class PackingError(Exception):
+    """The packed response had no usable result for this item."""
+
+
+def is_packable(step: dict) -> bool:
+    return (
+        bool(step.get("pack"))
+        and step.get("complexity") in PACKABLE_COMPLEXITIES
+        and step.get("type", "llm_call") == "llm_call"
+        and not step.get("vision")
+    )
+
+
+@dataclass
+class _Group:
+    step: dict
+    model: str
+    prefix: list[dict]
+    # (user message, prompt hash of the item's own unpacked request, result future)
+    items: list[tuple[str, str, asyncio.Future]] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class PromptPacker:
+    """Collects single-item requests and sends them as packed requests.
+
+    A group is sent as soon as it holds ``pack_size`` items, or ``linger`` seconds
+    after its first item arrived.
+    """
+
+    def __init__(self, client: LLMClient, pack_size: int, linger: float):
+        self.client = client
+        self.pack_size = pack_size
+        self.linger = linger
+        self._groups: dict[tuple, _Group] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, step: dict, model: str, messages: list[dict]) -> LLMResponse:
+        """Queue one item's request and wait for its share of a packed response."""
+        prefix, user = messages[:-1], messages[-1]["content"]
+        key = (step["id"], model, json.dumps(prefix, sort_keys=True))
+        loop = asyncio.get_running_loop()
+
+        group = self._groups.get(key)
+        if group is None:
+            group = _Group(step=step, model=model, prefix=prefix)
+            self._groups[key] = group
+            group.timer = loop.call_later(self.linger, self._dispatch, key)
+
+        future = loop.create_future()
+        # Recorded as the item's prompt_hash: the hash of its own, unpacked request
+        group.items.append((user, LLMClient.hash_prompt(model, messages), future))
+        if len(group.items) >= self.pack_size:
+            self._dispatch(key)
+        return await future
+
+    def _dispatch(self, key: tuple) -> None:
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        if group.timer:
+            group.timer.cancel()
+        task = asyncio.create_task(self._send(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, group: _Group) -> None:
+        if len(group.items) == 1:
+            # Nothing to share the request with: let the engine make a normal call
+            group.items[0][2].set_exception(PackingError("Single item, not packed"))
+            return
+
+        count = len(group.items)
+        body = "\n\n".join(f"### Item {i}\n{user}" for i, (user, _, _) in enumerate(group.items))
+        messages = group.prefix + [
+            {"role": "user", "content": PACKED_INSTRUCTIONS.format(count=count) + "\n\n" + body}
+        ]
+        max_tokens = min(group.step.get("max_tokens", 500) * count, MAX_PACKED_OUTPUT_TOKENS)
+
+        try:
+            response = await self.client.complete(
+                model=group.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=group.step.get("temperature", 0.2),
+                response_format={"type": "json_object"},
+            )
+            results = self.parse_results(response.content, count)
+        except Exception as e:
+            logger.warning("packed_call_failed", step=group.step["id"], items=count, error=str(e))
+            for _, _, future in group.items:
+                if not future.done():
+                    future.set_exception(PackingError(str(e)))
+            return
+
+        json_step = group.step.get("response_format") == "json_object"
+        valid = 0
+        for i, (_, prompt_hash, future) in enumerate(group.items):
+            if future.done():
+                continue
+            result = results.get(i)
+            if result is None or (json_step and not isinstance(result, dict)):
+                future.set_exception(PackingError(f"No valid result for item {i}"))
+                continue
+            valid += 1
+            future.set_result(
+                LLMResponse(
+                    content=json.dumps(result) if json_step else str(result),
+                    model=group.model,
+                    input_tokens=self._share(response.input_tokens, count, i),
+                    output_tokens=self._share(response.output_tokens, count, i),
+                    cost_usd=response.cost_usd / count,
+                    prompt_hash=prompt_hash,
+                    cached_tokens=self._share(response.cached_tokens, count, i),
+                )
+            )
+
+        logger.info(
+            "packed_call_complete",
+            step=group.step["id"],
+            items=count,
+            valid=valid,
+            input_tokens=response.input_tokens,
+        )
+
+    @staticmethod
+    def _share(total: int, count: int, index: int) -> int:
+        """Split ``total`` into ``count`` integer parts; the first parts get the remainder."""
+        return total // count + (1 if index < total % count else 0)
+
+    @staticmethod
+    def parse_results(content: str, count: int) -> dict[int, object]:
+        """Map item index -> result from a packed response, ignoring malformed entries."""
+        data = json.loads(content)
+        entries = data.get("results") if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            raise ValueError("Packed response has no results array")
+
+        results: dict[int, object] = {}
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict) or "result" not in entry:
+                continue
+            index = entry.get("id", position)
+            if isinstance(index, str) and index.isdigit():
+                index = int(index)
+            if isinstance(index, int) and 0 <= index < count and index not in results:
+                results[index] = entry["result"]
+        return results
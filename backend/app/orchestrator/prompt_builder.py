@@ -1,5 +1,13 @@
 import re
 
+PLACEHOLDER = re.compile(r"\{\{(.+?)\}\}")
+# A line ending like this closes its sentence, so the prompt can be split after it
+SENTENCE_END = re.compile(r"[.!?:]\s*$")
+
+# Message layouts for build_messages
+LAYOUT_DEFAULT = "default"
+LAYOUT_PREFIX_CACHE = "prefix_cache"
+
 
 class PromptBuilder:
     """Builds optimized prompts from recipe step templates."""
@@ -27,7 +35,7 @@ class PromptBuilder:
             value = PromptBuilder._resolve_path(path, variables)
             return str(value) if not isinstance(value, (dict, list)) else str(value)
 
-        return re.sub(r"\{\{(.+?)\}\}", replacer, template)
+        return PLACEHOLDER.sub(replacer, template)
 
     @staticmethod
     def render_value(template, variables: dict):
@@ -42,16 +50,56 @@ class PromptBuilder:
 
         return PromptBuilder.render_template(template, variables)
 
+    @staticmethod
+    def split_static(template: str) -> tuple[str, str]:
+        """Split a template into a variable-free prefix and the rest, in order.
+
+        The prefix ends at the last line break before the first placeholder that
+        follows a blank line or the end of a sentence, so no sentence is cut in two.
+        Without such a break the whole template is the dynamic part.
+        """
+        match = PLACEHOLDER.search(template)
+        if not match:
+            return template.strip(), ""
+
+        # Complete lines before the one holding the first placeholder
+        lines = template[: match.start()].split("\n")[:-1]
+        for end in range(len(lines), 0, -1):
+            line = lines[end - 1]
+            if not line.strip() or SENTENCE_END.search(line):
+                cut = sum(len(text) + 1 for text in lines[:end])
+                static = template[:cut].strip()
+                if static:
+                    return static, template[cut:].strip()
+                break
+        return "", template.strip()
+
     def build_messages(
         self,
         system_prompt: str,
         user_prompt: str,
         variables: dict,
+        layout: str = LAYOUT_DEFAULT,
     ) -> list[dict]:
-        """Build the messages array for an LLM call."""
-        rendered_system = self.render_template(system_prompt, variables)
+        """Build the messages array for an LLM call.
+
+        With ``layout="prefix_cache"`` the system prompt's variable-free prefix (see
+        ``split_static``) forms the first message, identical on every call, and the
+        rest follows unchanged in a second system message. The provider can then reuse
+        its cached prefix.
+        """
         rendered_user = self.render_template(user_prompt, variables)
 
+        if layout == LAYOUT_PREFIX_CACHE:
+            static, dynamic = self.split_static(system_prompt)
+            if static and dynamic:
+                return [
+                    {"role": "system", "content": static},
+                    {"role": "system", "content": self.render_template(dynamic, variables)},
+                    {"role": "user", "content": rendered_user},
+                ]
+
+        rendered_system = self.render_template(system_prompt, variables)
         return [
             {"role": "system", "content": rendered_system},
             {"role": "user", "content": rendered_user},
@@ -0,0 +1,108 @@
+import asyncio
+import random
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from openai import APIConnectionError, APITimeoutError
+
+from app.config import settings
+from app.orchestrator.concurrency import is_overload_error
+
+# Latency samples kept per model for the hedging percentile
+LATENCY_WINDOW = 200
+# Samples required before hedging kicks in (p95 of a handful of calls is noise)
+MIN_HEDGE_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Errors worth another attempt: overload (429 / 5xx), timeouts, dropped connections."""
+    return isinstance(error, (TimeoutError, APITimeoutError, APIConnectionError)) or (
+        is_overload_error(error)
+    )
+
+
+@dataclass
+class RetryPolicy:
+    """Timeout, retry and hedging settings for one model's completions."""
+
+    timeout: float
+    max_retries: int
+    backoff_base: float
+    backoff_max: float
+    hedge: bool
+
+    @classmethod
+    def for_model(cls, model: str) -> "RetryPolicy":
+        return cls(
+            timeout=settings.llm_timeouts.get(model, settings.llm_timeout_default),
+            max_retries=settings.llm_max_retries,
+            backoff_base=settings.llm_backoff_base,
+            backoff_max=settings.llm_backoff_max,
+            hedge=settings.llm_hedge_enabled,
+        )
+
+    def worst_case_seconds(self) -> float:
+        """Longest a call can take: every attempt timing out after the longest backoffs."""
+        backoffs = sum(
+            min(self.backoff_max, self.backoff_base * 2**attempt)
+            for attempt in range(self.max_retries)
+        )
+        return (self.max_retries + 1) * self.timeout + backoffs
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (0-based): exponential with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per model."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, model: str, seconds: float) -> None:
+        self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, q: float, min_samples: int = 1) -> float | None:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self, model: str) -> float | None:
+        return self.percentile(model, HEDGE_PERCENTILE, MIN_HEDGE_SAMPLES)
+
+
+async def run_hedged[T](attempt: Callable[[], Awaitable[T]], hedge_after: float | None) -> T:
+    """Run ``attempt``; if it has not finished after ``hedge_after`` seconds, start a
+    second copy and return whichever succeeds first. The loser is cancelled.
+
+    If both fail, the error of the last one to finish is raised. A cancelled request
+    may still be billed by the provider, so ``attempt`` must be idempotent and callers
+    account for the extra copy (see ``LLMClient.complete``).
+    """
+    first = asyncio.ensure_future(attempt())
+    if hedge_after is None:
+        return await first
+
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.add(asyncio.ensure_future(attempt()))
+
+        while True:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+            if not tasks:
+                # Every attempt failed: surface the last error
+                return done.pop().result()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,5 +1,10 @@
+import time
+
 import structlog
 
+from app.config import settings
+from app.orchestrator.model_health import ModelStats
+
 logger = structlog.get_logger()
 
 # Step complexity -> default model mapping
@@ -26,7 +31,23 @@ PLAN_MODEL_LIMITS = {
 
 
 class ModelRouter:
-    """Selects the optimal model based on task complexity and org plan."""
+    """Selects the optimal model based on task complexity, org plan and model health."""
+
+    def __init__(self):
+        self.health: dict[str, ModelStats] = {}
+        self._health_updated_at = 0.0
+
+    def health_is_stale(self) -> bool:
+        return time.monotonic() - self._health_updated_at >= settings.model_health_refresh_seconds
+
+    def update_health(self, health: dict[str, ModelStats]) -> None:
+        """Replace the rolling per-model stats used to route around degraded models."""
+        self.health = health
+        self._health_updated_at = time.monotonic()
+
+    def is_degraded(self, model: str) -> bool:
+        stats = self.health.get(model)
+        return stats is not None and stats.is_degraded(model)
 
     def select(
         self,
@@ -60,6 +81,22 @@ class ModelRouter:
                     base_model = fallback
                     break
 
+        # Route around a degraded model along its fallback chain
+        if self.is_degraded(base_model):
+            for fallback in settings.model_fallback_chain.get(base_model, []):
+                if fallback in allowed and not self.is_degraded(fallback):
+                    stats = self.health[base_model]
+                    logger.warning(
+                        "model_downgraded",
+                        original=base_model,
+                        downgraded_to=fallback,
+                        reason="degraded",
+                        error_rate=round(stats.error_rate, 3),
+                        avg_latency=round(stats.avg_latency, 3),
+                    )
+                    base_model = fallback
+                    break
+
         return base_model
 
 
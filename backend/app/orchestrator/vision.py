@@ -89,11 +89,12 @@ async def analyze_image(
 
     try:
         # Use vision-capable model
-        response = await client.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=max_tokens,
-        )
+        async with client.limiter.slot(model):
+            response = await client.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+            )
 
         content = response.choices[0].message.content or ""
         input_tokens = response.usage.prompt_tokens
@@ -13,6 +13,7 @@ from langchain_core.runnables import RunnablePassthrough
 from langchain_openai import ChatOpenAI
 
 from app.config import settings
+from app.http_client import get_http_client
 from app.rag.retriever import PgVectorRetriever
 
 # Prompt système pour l'expert « agents IA » (RAG spécialiste).
@@ -63,6 +64,7 @@ def create_rag_chain(k: int = 4):
     llm = ChatOpenAI(
         model="gpt-4.1-mini",
         api_key=settings.openai_api_key,
+        http_async_client=get_http_client(),
         temperature=0.2,
         max_tokens=500,
     )
@@ -118,6 +120,7 @@ async def query_rag(
     llm = ChatOpenAI(
         model="gpt-4.1-mini",
         api_key=settings.openai_api_key,
+        http_async_client=get_http_client(),
         temperature=0.2,
         max_tokens=500,
     )
@@ -13,6 +13,7 @@ from langchain_core.runnables import RunnableConfig
 from langchain_openai import OpenAIEmbeddings
 
 from app.config import settings
+from app.http_client import get_http_client
 from app.rag.store import similarity_search
 
 
@@ -36,6 +37,7 @@ class PgVectorRetriever(BaseRetriever):
             self.embeddings = OpenAIEmbeddings(
                 model="text-embedding-3-small",
                 api_key=settings.openai_api_key,
+                http_async_client=get_http_client(),
             )
 
     def _get_relevant_documents(self, query: str) -> list[Document]:
@@ -14,6 +14,7 @@ import structlog
 from langchain_openai import OpenAIEmbeddings
 
 from app.config import settings
+from app.http_client import get_http_client
 
 logger = structlog.get_logger()
 
@@ -54,7 +55,11 @@ async def add_documents(documents: list[tuple[str, dict]]) -> int:
     """
     if not documents:
         return 0
-    embeddings_client = OpenAIEmbeddings(model="text-embedding-3-small", api_key=settings.openai_api_key)
+    embeddings_client = OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        api_key=settings.openai_api_key,
+        http_async_client=get_http_client(),
+    )
     texts = [d[0] for d in documents]
     metadatas = [d[1] for d in documents]
     vectors = await embeddings_client.aembed_documents(texts)
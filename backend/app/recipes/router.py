@@ -1,16 +1,24 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from typing import Annotated, Optional
 
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user, get_optional_user
-from app.auth.models import User
 from app.db.engine import get_db
+from app.executions.router import get_redis
+from app.orchestrator.budget import BudgetMonitor
+from app.orchestrator.cache import LLMCache
+from app.orchestrator.rate_limiter import RateLimiter, RateLimitExceededError
 from app.recipes import registry, service
 from app.recipes.builder import RecipeBuilder
 from app.recipes.schemas import (
+    CacheStepStats,
+    CacheWarmResponse,
+    RecipeCacheStatsResponse,
     RecipeCreateRequest,
     RecipeDetail,
     RecipeGenerationRequest,
@@ -20,6 +28,7 @@ from app.recipes.schemas import (
     RecipeValidationRequest,
     RecipeValidationResponse,
 )
+from app.worker.queues import BATCH_QUEUE
 
 router = APIRouter(prefix="/api/recipes", tags=["recipes"])
 
@@ -31,7 +40,7 @@ async def list_recipes():
 
 @router.get("/my", response_model=list[RecipeResponse])
 async def list_my_recipes(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Liste les recipes personnalisées de l'utilisateur."""
@@ -57,7 +66,7 @@ async def list_my_recipes(
 @router.get("/{slug}", response_model=RecipeDetail)
 async def get_recipe(
     slug: str,
-    user: Annotated[Optional[User], Depends(get_optional_user)] = None,
+    user: Annotated[Optional[CurrentUser], Depends(get_optional_user)] = None,
     db: Annotated[AsyncSession, Depends(get_db)] = None,
 ):
     """Récupère une recipe par slug (publique ou personnalisée)."""
@@ -111,10 +120,66 @@ async def get_recipe(
     raise HTTPException(status_code=404, detail=f"Recipe '{slug}' not found")
 
 
+@router.get("/{slug}/cache", response_model=RecipeCacheStatsResponse)
+async def get_recipe_cache_stats(
+    slug: str,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
+):
+    """Statistiques du cache LLM d'une recipe : hits/misses/octets par step et mémoire Redis."""
+    if not await service.resolve_recipe_config(db, slug, user.id):
+        raise HTTPException(status_code=404, detail=f"Recipe '{slug}' not found")
+
+    cache = LLMCache(redis)
+    steps = await cache.stats(slug)
+    return RecipeCacheStatsResponse(
+        recipe_slug=slug,
+        steps=[CacheStepStats(step_id=step_id, **values) for step_id, values in steps.items()],
+        memory=await cache.memory_usage(slug),
+    )
+
+
+@router.post("/{slug}/cache/warm", response_model=CacheWarmResponse, status_code=202)
+async def warm_recipe_cache(
+    slug: str,
+    user: Annotated[CurrentUser, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    redis: Annotated[Redis, Depends(get_redis)],
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Rejoue en arrière-plan les inputs les plus fréquents de la recipe pour réchauffer le cache.
+
+    Réservé au propriétaire d'une recipe personnalisée ; le cache des recipes publiques est
+    partagé par tous les utilisateurs, seuls les admins peuvent le réchauffer. Les appels
+    rejoués comptent dans les limites de débit de l'utilisateur et dans le budget global.
+    """
+    from arq.connections import ArqRedis
+
+    if not await service.resolve_recipe_config(db, slug, user.id):
+        raise HTTPException(status_code=404, detail=f"Recipe '{slug}' not found")
+    if registry.get_recipe(slug) and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can warm a public recipe")
+
+    try:
+        await RateLimiter(redis).check(str(user.id), user.plan)
+    except RateLimitExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    budget = BudgetMonitor(redis)
+    if await budget.get_global_spent() >= budget.max_budget:
+        raise HTTPException(status_code=402, detail="Global budget exhausted")
+
+    job = await ArqRedis(redis.connection_pool).enqueue_job(
+        "warm_recipe_cache_task", slug, str(user.id), limit, _queue_name=BATCH_QUEUE
+    )
+    return CacheWarmResponse(recipe_slug=slug, job_id=job.job_id if job else None, limit=limit)
+
+
 @router.post("/builder/generate", response_model=RecipeGenerationResponse)
 async def generate_recipe_from_requirement(
     body: RecipeGenerationRequest,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
 ):
     """Génère une recipe à partir d'un besoin métier décrit en langage naturel."""
     builder = RecipeBuilder()
@@ -138,7 +203,7 @@ async def generate_recipe_from_requirement(
 @router.post("/builder/validate", response_model=RecipeValidationResponse)
 async def validate_recipe(
     body: RecipeValidationRequest,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
 ):
     """Valide une recipe avant de la sauvegarder."""
     builder = RecipeBuilder()
@@ -154,7 +219,7 @@ async def validate_recipe(
 @router.post("", response_model=RecipeResponse, status_code=201)
 async def create_custom_recipe(
     body: RecipeCreateRequest,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Sauvegarde une recipe personnalisée."""
@@ -56,3 +56,29 @@ class RecipeResponse(BaseModel):
     version: str
     is_custom: bool
     created_at: datetime
+
+
+class CacheStepStats(BaseModel):
+    step_id: str
+    hits: int
+    misses: int
+    hit_rate: float
+    bytes: int
+    layers: dict[str, int]
+
+
+class CacheLayerUsage(BaseModel):
+    bytes: int
+    entries: int
+
+
+class RecipeCacheStatsResponse(BaseModel):
+    recipe_slug: str
+    steps: list[CacheStepStats]
+    memory: dict[str, CacheLayerUsage]
+
+
+class CacheWarmResponse(BaseModel):
+    recipe_slug: str
+    job_id: str | None
+    limit: int
@@ -1,10 +1,18 @@
+import asyncio
+import json
 import uuid
 from decimal import Decimal
 
 import structlog
-from sqlalchemy import select
+from redis.asyncio import Redis
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.models import Agent
+from app.config import settings
+from app.executions.models import Execution, ExecutionStep
+from app.orchestrator.engine import OrchestrationEngine
+from app.recipes import registry
 from app.recipes.models import Recipe
 
 logger = structlog.get_logger()
@@ -132,3 +140,128 @@ async def get_custom_recipe_by_slug(
     
     recipe = await db.scalar(query)
     return recipe
+
+
+async def resolve_recipe_config(db: AsyncSession, slug: str, user_id: uuid.UUID) -> dict | None:
+    """Config d'une recipe publique (registry) ou personnalisée de l'utilisateur."""
+    recipe = registry.get_recipe(slug)
+    if recipe:
+        return recipe
+    recipe_db = await get_custom_recipe_by_slug(db=db, slug=slug, user_id=user_id)
+    return recipe_db.config if recipe_db else None
+
+
+async def frequent_inputs(
+    db: AsyncSession,
+    slug: str,
+    limit: int,
+    user_id: uuid.UUID | None = None,
+) -> list[dict]:
+    """
+    Inputs d'exécution les plus fréquents d'une recipe, classés par nombre d'exécutions
+    partageant le même prompt_hash (une entrée représentative par prompt).
+
+    Un prompt_hash vu avec plusieurs inputs différents (requête packée de plusieurs items)
+    ne représente aucun input en particulier : il est ignoré.
+    """
+    scope = [
+        Agent.recipe_slug == slug,
+        Execution.status == "completed",
+        Execution.input_data.is_not(None),
+    ]
+    if user_id:
+        scope.append(Agent.created_by == user_id)
+
+    uses = func.count(Execution.id.distinct()).label("uses")
+    top = (
+        select(ExecutionStep.prompt_hash, uses)
+        .join(Execution, ExecutionStep.execution_id == Execution.id)
+        .join(Agent, Execution.agent_id == Agent.id)
+        .where(*scope, ExecutionStep.prompt_hash.is_not(None))
+        .group_by(ExecutionStep.prompt_hash)
+        .having(func.count(Execution.input_data.distinct()) == 1)
+        .order_by(uses.desc())
+        .limit(limit)
+        .subquery()
+    )
+
+    rows = await db.execute(
+        select(top.c.uses, Execution.input_data)
+        .select_from(top)
+        .distinct(top.c.prompt_hash)
+        .join(ExecutionStep, ExecutionStep.prompt_hash == top.c.prompt_hash)
+        .join(Execution, ExecutionStep.execution_id == Execution.id)
+        .join(Agent, Execution.agent_id == Agent.id)
+        .where(*scope)
+        .order_by(top.c.prompt_hash, Execution.created_at.desc())
+    )
+
+    inputs: dict[str, dict] = {}
+    for _, input_data in sorted(rows.all(), key=lambda r: r.uses, reverse=True):
+        inputs.setdefault(json.dumps(input_data, sort_keys=True), input_data)
+    return list(inputs.values())
+
+
+async def warm_cache(
+    db: AsyncSession,
+    redis: Redis,
+    slug: str,
+    user_id: uuid.UUID,
+    limit: int = 20,
+) -> dict:
+    """
+    Rejoue les inputs les plus fréquents d'une recipe pour remplir le cache LLM
+    (après un déploiement ou une modification de prompt). Les appels rejoués comptent
+    dans les limites de débit de ``user_id`` et dans le budget global.
+    """
+    recipe = await resolve_recipe_config(db, slug, user_id)
+    if not recipe:
+        raise ValueError(f"Recipe '{slug}' not found")
+
+    # Custom recipes are private: only replay the owner's executions
+    owner = None if registry.get_recipe(slug) else user_id
+    inputs = await frequent_inputs(db, slug, limit, user_id=owner)
+
+    engine = OrchestrationEngine(redis, synthetic=True)
+    semaphore = asyncio.Semaphore(settings.batch_chunk_concurrency)
+
+    async def _replay(input_data: dict):
+        async with semaphore:
+            # Default "trial" plan, as in run_execution, so real traffic hits the same keys
+            return await engine.execute(
+                recipe_config=recipe,
+                input_data=input_data,
+                user_id=str(user_id),
+                recipe_id=slug,
+            )
+
+    results = await asyncio.gather(*(_replay(i) for i in inputs), return_exceptions=True)
+
+    warmed = failed = cache_hits = 0
+    cost_usd = 0.0
+    for result in results:
+        if isinstance(result, Exception):
+            failed += 1
+            logger.warning("cache_warm_input_failed", recipe_slug=slug, error=str(result))
+            continue
+        warmed += 1
+        cache_hits += result.cache_hits
+        cost_usd += result.total_cost_usd
+
+    logger.info(
+        "cache_warmed",
+        recipe_slug=slug,
+        inputs=len(inputs),
+        warmed=warmed,
+        failed=failed,
+        cache_hits=cache_hits,
+        cost_usd=round(cost_usd, 6),
+    )
+    return {
+        "recipe_slug": slug,
+        "inputs": len(inputs),
+        "warmed": warmed,
+        "failed": failed,
+        "cache_hits": cache_hits,
+        "cost_usd": cost_usd,
+    }
@@ -4,8 +4,8 @@ from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.db.engine import get_db
 from app.recommendations import service
 
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/api/recommendations", tags=["recommendations"])
 
 @router.get("/recipes")
 async def get_recipe_recommendations(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     domain: Optional[str] = Query(None),
 ):
@@ -29,7 +29,7 @@ async def get_recipe_recommendations(
 
 @router.get("/optimizations")
 async def get_optimization_recommendations(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     agent_id: uuid.UUID = Query(...),
 ):
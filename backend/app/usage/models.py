@@ -2,7 +2,17 @@ import uuid
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import BigInteger, Boolean, Date, ForeignKey, Integer, Numeric, String, text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    ForeignKey,
+    Integer,
+    Numeric,
+    String,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -11,6 +21,8 @@ from app.db.base import Base, UUIDMixin
 
 class UsageDaily(Base, UUIDMixin):
     __tablename__ = "usage_daily"
+    # Conflict target of the write-behind flush upsert (see usage.service.flush_usage)
+    __table_args__ = (UniqueConstraint("user_id", "date", name="uq_usage_daily_user_date"),)
 
     organization_id: Mapped[uuid.UUID | None] = mapped_column(
         ForeignKey("organizations.id"), nullable=True
@@ -43,6 +55,17 @@ class UsageDaily(Base, UUIDMixin):
     cache_hits: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
 
 
+class UsageFlush(Base):
+    """Flush ids of write-behind usage batches already applied to usage_daily."""
+
+    __tablename__ = "usage_flushes"
+
+    flush_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow, server_default=text("NOW()"), index=True
+    )
+
+
 class ApiKey(Base, UUIDMixin):
     __tablename__ = "api_keys"
 
@@ -0,0 +1,172 @@
+"""Write-behind aggregation of daily usage counters.
+
+Executions add their deltas to one Redis hash (``HINCRBY`` on ``{user_id}:{date}:{metric}``
+fields) once they are committed (see ``app.db.hooks``), instead of updating
+``usage_daily`` directly. A periodic ARQ cron job moves the hash aside under a flush id
+and applies it to ``usage_daily`` in one upsert.
+
+Flushes are crash-safe: the pending hash is renamed (never read and then deleted), a
+half-flushed hash is retried on the next run, and the flush id is recorded in
+``usage_flushes`` in the same transaction as the upsert, so a hash that was already
+applied is only deleted, never counted twice.
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import structlog
+from redis.asyncio import Redis
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.executions.models import Execution
+from app.usage.models import UsageDaily, UsageFlush
+
+logger = structlog.get_logger()
+
+PENDING_KEY = "usage:pending"
+FLUSHING_KEY = "usage:flushing"
+FLUSH_ID_FIELD = "__flush_id__"
+
+# Costs are accumulated as integer ten-thousandths of a cent (Numeric(12, 4) in the table)
+COST_SCALE = 10_000
+
+# Applied flush ids are kept this long to recognise replays of a crashed flush
+FLUSH_ID_RETENTION = timedelta(days=7)
+
+COUNTERS = (
+    "total_executions",
+    "successful_executions",
+    "failed_executions",
+    "total_input_tokens",
+    "total_output_tokens",
+    "total_cost_cents",
+    "nano_calls",
+    "mini_calls",
+    "full_calls",
+    "cache_hits",
+)
+
+# Resume an interrupted flush, or move the pending hash aside under a new flush id
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return nil
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# Delete the flushing hash only if it still belongs to this flush
+RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def usage_deltas(execution: Execution) -> dict[str, int]:
+    """Counter increments contributed by one finished execution."""
+    models = execution.models_used or []
+    cost_cents = execution.total_cost_cents or Decimal(0)
+    return {
+        "total_executions": 1,
+        "successful_executions": int(execution.status == "completed"),
+        "failed_executions": int(execution.status == "failed"),
+        "total_input_tokens": execution.total_input_tokens or 0,
+        "total_output_tokens": execution.total_output_tokens or 0,
+        "total_cost_cents": int(Decimal(cost_cents) * COST_SCALE),
+        "nano_calls": sum(1 for m in models if "nano" in m),
+        "mini_calls": sum(1 for m in models if "mini" in m),
+        "full_calls": sum(1 for m in models if m == "gpt-4.1"),
+        "cache_hits": execution.cache_hits or 0,
+    }
+
+
+async def record_execution_usage(redis: Redis, execution: Execution) -> None:
+    """Accumulate an execution's usage in Redis until the next flush."""
+    exec_date = (execution.completed_at or execution.created_at).date()
+    prefix = f"{execution.user_id}:{exec_date.isoformat()}"
+
+    pipe = redis.pipeline(transaction=False)
+    for metric, value in usage_deltas(execution).items():
+        if value:
+            pipe.hincrby(PENDING_KEY, f"{prefix}:{metric}", value)
+    await pipe.execute()
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def aggregate(fields: dict[str, str]) -> dict[tuple[uuid.UUID, date], dict[str, int]]:
+    """Group ``{user_id}:{date}:{metric}`` hash fields into per-row counters."""
+    rows: dict[tuple[uuid.UUID, date], dict[str, int]] = defaultdict(dict)
+    for field, value in fields.items():
+        try:
+            user_id, day, metric = field.split(":")
+            key = (uuid.UUID(user_id), date.fromisoformat(day))
+        except ValueError:
+            continue
+        if metric in COUNTERS:
+            rows[key][metric] = rows[key].get(metric, 0) + int(value)
+    return rows
+
+
+async def flush_usage(db: AsyncSession, redis: Redis) -> int:
+    """Apply accumulated usage to ``usage_daily``. Returns the number of rows upserted."""
+    raw = await redis.eval(
+        CLAIM_SCRIPT, 2, PENDING_KEY, FLUSHING_KEY, FLUSH_ID_FIELD, str(uuid.uuid4())
+    )
+    if not raw:
+        return 0
+
+    pairs = [_decode(v) for v in raw]
+    fields = dict(zip(pairs[::2], pairs[1::2]))
+    flush_id = fields.pop(FLUSH_ID_FIELD)
+    rows = aggregate(fields)
+
+    applied = await db.scalar(
+        pg_insert(UsageFlush)
+        .values(flush_id=flush_id)
+        .on_conflict_do_nothing()
+        .returning(UsageFlush.flush_id)
+    )
+    if applied is None:
+        logger.warning("usage_flush_replayed", flush_id=flush_id)
+    elif rows:
+        values = [
+            {
+                "user_id": user_id,
+                "date": day,
+                **{metric: counters.get(metric, 0) for metric in COUNTERS},
+                "total_cost_cents": Decimal(counters.get("total_cost_cents", 0)) / COST_SCALE,
+            }
+            for (user_id, day), counters in rows.items()
+        ]
+        stmt = pg_insert(UsageDaily).values(values)
+        columns = UsageDaily.__table__.c
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[columns.user_id, columns.date],
+                set_={name: columns[name] + stmt.excluded[name] for name in COUNTERS},
+            )
+        )
+    await db.execute(
+        delete(UsageFlush).where(UsageFlush.applied_at < datetime.utcnow() - FLUSH_ID_RETENTION)
+    )
+    await db.commit()
+
+    # Only once the upsert is durable; a crash before this replays the same flush id
+    await redis.eval(RELEASE_SCRIPT, 1, FLUSHING_KEY, FLUSH_ID_FIELD, flush_id)
+
+    if applied is None:
+        return 0
+    logger.info("usage_flushed", flush_id=flush_id, rows=len(rows))
+    return len(rows)
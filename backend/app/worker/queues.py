@@ -0,0 +1,7 @@
+from arq.constants import default_queue_name
+
+# Single executions. Kept on ARQ's default queue so existing producers still land here.
+INTERACTIVE_QUEUE = default_queue_name
+
+# Batch work. Served by its own worker pool so large batches never delay interactive jobs.
+BATCH_QUEUE = f"{default_queue_name}:batch"
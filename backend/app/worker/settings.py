@@ -1,6 +1,10 @@
 from arq.connections import RedisSettings
+from arq.cron import cron
+from arq.worker import Function, func
 
 from app.config import settings
+from app.http_client import close_http_client, get_http_client
+from app.worker.queues import BATCH_QUEUE, INTERACTIVE_QUEUE
 
 
 def parse_redis_url(url: str) -> RedisSettings:
@@ -23,13 +27,69 @@ def parse_redis_url(url: str) -> RedisSettings:
     )
 
 
+def _task(name: str, **options) -> Function:
+    """Register ``app.worker.tasks.<name>`` under its short name, as enqueue_job uses."""
+    return func(f"app.worker.tasks.{name}", name=name, **options)
+
+
+async def on_startup(ctx: dict) -> None:
+    get_http_client()
+
+
+async def on_shutdown(ctx: dict) -> None:
+    await close_http_client()
+
+
 class WorkerSettings:
+    """Interactive queue: single agent executions."""
+
     redis_settings = parse_redis_url(settings.redis_url)
+    queue_name = INTERACTIVE_QUEUE
+    on_startup = on_startup
+    on_shutdown = on_shutdown
     functions = [
         "app.worker.tasks.execute_agent_task",
-        "app.worker.tasks.process_batch_item_task",
     ]
-    max_jobs = 10
+    max_jobs = settings.worker_interactive_max_jobs
     job_timeout = 300  # 5 minutes max per job
     max_tries = 3
     retry_after = 60  # seconds before retry
+
+
+class BatchWorkerSettings:
+    """Batch queue: online batch slots, offline batch polling and maintenance crons."""
+
+    redis_settings = parse_redis_url(settings.redis_url)
+    queue_name = BATCH_QUEUE
+    on_startup = on_startup
+    on_shutdown = on_shutdown
+    functions = [
+        _task("run_batch_slot_task"),
+        _task("process_batch_item_task"),
+        _task("process_batch_chunk_task"),
+        # Retried with backoff by the task itself, then the batch is marked failed
+        _task("advance_offline_batch_task", max_tries=settings.batch_offline_max_tries),
+        _task("warm_recipe_cache_task"),
+    ]
+    cron_jobs = [
+        cron("app.worker.tasks.reap_batch_leases_task", second={0}),
+        cron(
+            "app.worker.tasks.flush_usage_task",
+            second=set(range(0, 60, max(1, min(settings.usage_flush_interval_seconds, 60)))),
+        ),
+        cron(
+            "app.worker.tasks.refresh_analytics_rollups_task",
+            minute=set(range(0, 60, max(1, min(settings.analytics_rollup_interval_minutes, 60)))),
+        ),
+        cron(
+            "app.worker.tasks.maintain_execution_partitions_task",
+            hour={3},
+            minute={30},
+            run_at_startup=True,
+            timeout=3600,
+        ),
+    ]
+    max_jobs = settings.worker_batch_max_jobs
+    job_timeout = 300
+    max_tries = 3
+    retry_after = 60
@@ -1,6 +1,9 @@
 import uuid
 
 import structlog
+from arq import Retry
+
+from app.worker.queues import BATCH_QUEUE
 
 logger = structlog.get_logger()
 
@@ -10,6 +13,7 @@ async def execute_agent_task(ctx: dict, execution_id: str) -> dict:
     from redis.asyncio import Redis
 
     from app.db.engine import get_session_maker
+    from app.db.hooks import commit
     from app.executions.service import run_execution
 
     logger.info("worker_executing", execution_id=execution_id)
@@ -20,7 +24,7 @@ async def execute_agent_task(ctx: dict, execution_id: str) -> dict:
     async with session_maker() as db:
         try:
             execution = await run_execution(db, redis, uuid.UUID(execution_id))
-            await db.commit()
+            await commit(db)
             return {"status": execution.status, "execution_id": execution_id}
         except Exception as e:
             await db.rollback()
@@ -34,6 +38,7 @@ async def process_batch_item_task(ctx: dict, batch_id: str, item_id: str) -> dic
 
     from app.batches.service import process_batch_item
     from app.db.engine import get_session_maker
+    from app.db.hooks import commit
 
     logger.info("worker_batch_item", batch_id=batch_id, item_id=item_id)
 
@@ -45,7 +50,7 @@ async def process_batch_item_task(ctx: dict, batch_id: str, item_id: str) -> dic
             await process_batch_item(
                 db, redis, uuid.UUID(batch_id), uuid.UUID(item_id)
             )
-            await db.commit()
+            await commit(db)
             return {"status": "ok", "batch_id": batch_id, "item_id": item_id}
         except Exception as e:
             await db.rollback()
@@ -56,3 +61,234 @@ async def process_batch_item_task(ctx: dict, batch_id: str, item_id: str) -> dic
                 error=str(e),
             )
             return {"status": "failed", "error": str(e)}
+
+
+async def process_batch_chunk_task(ctx: dict, batch_id: str) -> dict:
+    """ARQ task: claim and process a chunk of pending batch items."""
+    from redis.asyncio import Redis
+
+    from app.batches.service import process_batch_chunk
+    from app.db.engine import get_session_maker
+    from app.db.hooks import commit
+
+    logger.info("worker_batch_chunk", batch_id=batch_id)
+
+    redis: Redis = ctx.get("redis")
+    session_maker = get_session_maker()
+
+    async with session_maker() as db:
+        try:
+            processed = await process_batch_chunk(db, redis, uuid.UUID(batch_id))
+            await commit(db)
+            return {"status": "ok", "batch_id": batch_id, "processed": processed}
+        except Exception as e:
+            await db.rollback()
+            logger.error("worker_batch_chunk_failed", batch_id=batch_id, error=str(e))
+            return {"status": "failed", "error": str(e)}
+
+
+async def advance_offline_batch_task(ctx: dict, batch_id: str) -> dict:
+    """ARQ task: advance an offline batch, re-enqueueing itself until it finishes.
+
+    Errors (provider, network, budget) are retried with exponential backoff; after
+    ``batch_offline_max_tries`` attempts the batch is marked failed.
+    """
+    from redis.asyncio import Redis
+
+    from app.batches.offline import advance_offline_batch, fail_offline_batch
+    from app.config import settings
+    from app.db.engine import get_session_maker
+    from app.db.hooks import commit
+
+    logger.info("worker_offline_batch", batch_id=batch_id)
+
+    redis: Redis = ctx.get("redis")
+    session_maker = get_session_maker()
+
+    async with session_maker() as db:
+        try:
+            poll_after = await advance_offline_batch(db, redis, uuid.UUID(batch_id))
+            await commit(db)
+        except Exception as e:
+            await db.rollback()
+            job_try = ctx.get("job_try", 1)
+            if job_try < settings.batch_offline_max_tries:
+                defer = settings.batch_offline_retry_base_seconds * 2 ** (job_try - 1)
+                logger.warning(
+                    "worker_offline_batch_retry",
+                    batch_id=batch_id,
+                    job_try=job_try,
+                    defer=defer,
+                    error=str(e),
+                )
+                raise Retry(defer=defer) from e
+
+            logger.error("worker_offline_batch_failed", batch_id=batch_id, error=str(e))
+            try:
+                await fail_offline_batch(db, redis, uuid.UUID(batch_id), str(e))
+                await commit(db)
+            except Exception as fail_error:
+                await db.rollback()
+                logger.error(
+                    "worker_offline_batch_fail_failed", batch_id=batch_id, error=str(fail_error)
+                )
+            return {"status": "failed", "error": str(e)}
+
+    if poll_after is not None:
+        await redis.enqueue_job(
+            "advance_offline_batch_task",
+            batch_id,
+            _defer_by=poll_after,
+            _queue_name=BATCH_QUEUE,
+        )
+        return {"status": "waiting", "batch_id": batch_id, "poll_after": poll_after}
+    return {"status": "ok", "batch_id": batch_id}
+
+
+async def run_batch_slot_task(ctx: dict) -> dict:
+    """ARQ task: run the next batch work unit in fair-share order.
+
+    Slot jobs carry no payload; the unit is chosen when the slot runs, so users
+    with smaller batches are interleaved with one long batch instead of waiting
+    behind it. The unit stays leased until its work is committed; a failed unit is
+    requeued (see ``_retry_unit``).
+    """
+    from app.batches.scheduler import CHUNK_UNIT, FairBatchScheduler
+    from app.config import settings
+
+    scheduler = FairBatchScheduler(ctx["redis"])
+    lease = await scheduler.pop(settings.batch_unit_lease_seconds)
+    if lease is None:
+        return {"status": "idle"}
+
+    if lease.unit == CHUNK_UNIT:
+        result = await process_batch_chunk_task(ctx, lease.batch_id)
+    else:
+        result = await process_batch_item_task(ctx, lease.batch_id, lease.unit)
+
+    if result["status"] == "failed":
+        await _retry_unit(ctx, scheduler, lease, result["error"])
+    else:
+        await scheduler.ack(lease)
+    return result
+
+
+async def _retry_unit(ctx: dict, scheduler, lease, error: str) -> None:
+    """Requeue a failed or abandoned unit with backoff, or fail its items for good."""
+    from app.batches.service import fail_batch_unit
+    from app.config import settings
+    from app.db.engine import get_session_maker
+    from app.db.hooks import commit
+
+    if lease.attempt + 1 < settings.batch_unit_max_tries:
+        if await scheduler.requeue(lease):
+            defer = settings.batch_unit_retry_base_seconds * 2**lease.attempt
+            await ctx["redis"].enqueue_job(
+                "run_batch_slot_task", _defer_by=defer, _queue_name=BATCH_QUEUE
+            )
+            logger.warning(
+                "batch_unit_requeued",
+                batch_id=lease.batch_id,
+                unit=lease.unit,
+                attempt=lease.attempt + 1,
+                defer=defer,
+            )
+        return
+
+    async with get_session_maker()() as db:
+        try:
+            await fail_batch_unit(db, ctx["redis"], uuid.UUID(lease.batch_id), lease.unit, error)
+            await commit(db)
+        except Exception as e:
+            await db.rollback()
+            # Keep the lease: the reaper retries once it expires
+            logger.error("batch_unit_fail_failed", batch_id=lease.batch_id, error=str(e))
+            return
+    await scheduler.ack(lease)
+
+
+async def reap_batch_leases_task(ctx: dict) -> dict:
+    """ARQ cron: requeue the units of slots whose worker died before acknowledging."""
+    from app.batches.scheduler import FairBatchScheduler
+
+    scheduler = FairBatchScheduler(ctx["redis"])
+    leases = await scheduler.expired_leases()
+    for lease in leases:
+        logger.warning("batch_unit_lease_expired", batch_id=lease.batch_id, unit=lease.unit)
+        await _retry_unit(ctx, scheduler, lease, "Batch worker lost the work unit")
+    return {"status": "ok", "reaped": len(leases)}
+
+
+async def warm_recipe_cache_task(ctx: dict, recipe_slug: str, user_id: str, limit: int) -> dict:
+    """ARQ task: replay a recipe's most frequent inputs to warm the LLM cache."""
+    from redis.asyncio import Redis
+
+    from app.db.engine import get_session_maker
+    from app.recipes.service import warm_cache
+
+    logger.info("worker_cache_warm", recipe_slug=recipe_slug, limit=limit)
+
+    redis: Redis = ctx.get("redis")
+    session_maker = get_session_maker()
+
+    async with session_maker() as db:
+        try:
+            return await warm_cache(db, redis, recipe_slug, uuid.UUID(user_id), limit)
+        except Exception as e:
+            logger.error("worker_cache_warm_failed", recipe_slug=recipe_slug, error=str(e))
+            return {"status": "failed", "error": str(e)}
+
+
+async def flush_usage_task(ctx: dict) -> dict:
+    """ARQ cron: apply write-behind usage counters from Redis to usage_daily."""
+    from redis.asyncio import Redis
+
+    from app.db.engine import get_session_maker
+    from app.usage.service import flush_usage
+
+    redis: Redis = ctx.get("redis")
+    session_maker = get_session_maker()
+
+    async with session_maker() as db:
+        try:
+            rows = await flush_usage(db, redis)
+            return {"status": "ok", "rows": rows}
+        except Exception as e:
+            await db.rollback()
+            logger.error("worker_usage_flush_failed", error=str(e))
+            return {"status": "failed", "error": str(e)}
+
+
+async def refresh_analytics_rollups_task(ctx: dict) -> dict:
+    """ARQ cron: rebuild recent execution rollups and advance the watermark."""
+    from app.analytics.rollups import refresh_rollups
+    from app.db.engine import get_session_maker
+
+    session_maker = get_session_maker()
+
+    async with session_maker() as db:
+        try:
+            return await refresh_rollups(db)
+        except Exception as e:
+            await db.rollback()
+            logger.error("worker_rollup_refresh_failed", error=str(e))
+            return {"status": "failed", "error": str(e)}
+
+
+async def maintain_execution_partitions_task(ctx: dict) -> dict:
+    """ARQ cron: create upcoming execution partitions and archive old payloads."""
+    from app.db.engine import get_session_maker
+    from app.executions.partitions import archive_old_executions, ensure_partitions
+
+    session_maker = get_session_maker()
+
+    async with session_maker() as db:
+        try:
+            created = await ensure_partitions(db)
+            await db.commit()
+            archived = await archive_old_executions(db)
+            return {"status": "ok", "partitions_created": len(created), "archived": archived}
+        except Exception as e:
+            await db.rollback()
+            logger.error("worker_partition_maintenance_failed", error=str(e))
+            return {"status": "failed", "error": str(e)}
@@ -4,8 +4,8 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.cache import CurrentUser
 from app.auth.dependencies import get_current_user
-from app.auth.models import User
 from app.db.engine import get_db
 from app.workflows.automations import BusinessWorkflow
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api/workflows", tags=["workflows"])
 @router.post("/leads/{lead_id}/on-created")
 async def trigger_lead_created_workflow(
     lead_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Déclenche le workflow quand un lead est créé."""
@@ -28,7 +28,7 @@ async def trigger_lead_created_workflow(
 @router.post("/clients/{client_id}/check-health")
 async def check_client_health_workflow(
     client_id: uuid.UUID,
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Vérifie la santé d'un client."""
@@ -40,7 +40,7 @@ async def check_client_health_workflow(
 
 @router.post("/leads/check-inactive")
 async def check_inactive_leads_workflow(
-    user: Annotated[User, Depends(get_current_user)],
+    user: Annotated[CurrentUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     days: int = 30,
 ):
@@ -0,0 +1,35 @@
+import uuid
+
+from app.analytics.cache import AnalyticsCache, invalidate_user_analytics
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+
+async def test_cached_until_user_is_invalidated():
+    redis, user_id = FakeRedis(), uuid.uuid4()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"total": len(calls)}
+
+    assert await AnalyticsCache(redis, user_id).get_or_set("overview", compute) == {"total": 1}
+    assert await AnalyticsCache(redis, user_id).get_or_set("overview", compute) == {"total": 1}
+
+    await invalidate_user_analytics(redis, user_id)
+    assert await AnalyticsCache(redis, user_id).get_or_set("overview", compute) == {"total": 2}
+    # Other users are unaffected
+    await AnalyticsCache(redis, uuid.uuid4()).get_or_set("overview", compute)
+    assert len(calls) == 3
@@ -0,0 +1,141 @@
+"""EXPLAIN-based regression test: user-scoped execution queries must use indexes.
+
+Runs against a real PostgreSQL (``TEST_DATABASE_URL``) in a throwaway schema seeded
+with enough rows for the planner to prefer indexes; skipped when no database is set.
+"""
+
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.agents.models import Agent
+from app.analytics import service as analytics_service
+from app.analytics.models import ExecutionRollupDaily, RollupWatermark
+from app.auth.models import User
+from app.batches import service as batch_service
+from app.batches.models import BatchExecution
+from app.db.base import Base
+from app.executions import service as execution_service
+from app.executions.models import Execution
+from app.executions.partitions import ensure_partitions
+from app.organizations.models import Organization
+from app.recipes.models import Recipe
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+TABLES = [
+    model.__table__
+    for model in (
+        User,
+        Organization,
+        Recipe,
+        Agent,
+        Execution,
+        BatchExecution,
+        ExecutionRollupDaily,
+        RollupWatermark,
+    )
+]
+WATCHED_TABLES = {"executions", "batch_executions"}
+
+USERS = 200
+EXECUTIONS_PER_USER = 100
+
+SEED = [
+    f"""
+    INSERT INTO users (clerk_user_id, email)
+    SELECT 'user_' || g, 'user_' || g || '@example.com' FROM generate_series(1, {USERS}) g
+    """,
+    "INSERT INTO agents (name, created_by) SELECT 'agent', id FROM users",
+    f"""
+    INSERT INTO executions (agent_id, user_id, input_data, status, created_at, duration_ms)
+    SELECT a.id, a.created_by, '{{}}'::jsonb, 'completed',
+           NOW() - g * INTERVAL '17 minutes', 1000
+    FROM agents a, generate_series(1, {EXECUTIONS_PER_USER}) g
+    """,
+    """
+    INSERT INTO batch_executions (agent_id, user_id, name, total_items, created_at)
+    SELECT a.id, a.created_by, 'batch', 10, NOW() - g * INTERVAL '1 day'
+    FROM agents a, generate_series(1, 20) g
+    """,
+    "ANALYZE",
+]
+
+
+@pytest.fixture
+async def session():
+    schema = f"plan_test_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(DATABASE_URL)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+
+    engine = create_async_engine(
+        DATABASE_URL, connect_args={"server_settings": {"search_path": schema}}
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=TABLES)
+            # Seeded executions go back ~29 hours; cover the previous month too
+            await ensure_partitions(conn, start=datetime.utcnow() - timedelta(days=31))
+            for statement in SEED:
+                await conn.execute(text(statement))
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            yield db
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await admin.dispose()
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    scans = []
+    # executions is partitioned: its scans name the monthly partitions (executions_pYYYYMM)
+    relation = re.sub(r"_p\d{6}$", "", plan.get("Relation Name") or "")
+    if plan.get("Node Type") == "Seq Scan" and relation in WATCHED_TABLES:
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(_seq_scans(child))
+    return scans
+
+
+async def test_user_scoped_queries_use_indexes(session: AsyncSession):
+    user_id = await session.scalar(text("SELECT id FROM users LIMIT 1"))
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await execution_service.list_executions(session, user_id)
+        await batch_service.list_batches(session, user_id)
+        await analytics_service.get_overview(session, user_id)
+        await analytics_service.get_timeline(session, user_id, days=30)
+        await analytics_service.get_agent_stats(session, user_id)
+        await analytics_service.get_dashboard_stats(session, user_id)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    offenders = []
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        if _seq_scans(plan[0]["Plan"]):
+            offenders.append(statement)
+
+    assert statements
+    assert offenders == []
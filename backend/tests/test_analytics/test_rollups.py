@@ -0,0 +1,73 @@
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app.analytics.rollups import refresh_rollups
+from app.analytics.service import _usage
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_usage_reads_rollups_and_raw_rows_after_watermark():
+    sql = _sql(_usage(uuid.uuid4(), by="day", start=date(2026, 10, 1)))
+
+    assert "FROM execution_rollups_daily" in sql
+    assert "executions.created_at >= coalesce((SELECT rollup_watermarks.rolled_until" in sql
+    # Raw rows are filtered on the bare column so the created_at index applies
+    assert "CAST(executions.created_at AS DATE) >=" not in sql
+
+
+def test_usage_groups_by_agent():
+    sql = _sql(_usage(uuid.uuid4(), by="agent"))
+
+    assert "execution_rollups_daily.agent_id AS key" in sql
+    assert "GROUP BY executions.agent_id" in sql
+
+
+class _RecordingSession:
+    """Answers the watermark and late-hour reads, records every other statement."""
+
+    def __init__(self, watermark, late_hours):
+        self.watermark = watermark
+        self.late_hours = late_hours
+        self.statements = []
+
+    async def scalar(self, query):
+        return self.watermark
+
+    async def scalars(self, query):
+        self.late_query = query
+        late_hours = self.late_hours
+
+        class _Result:
+            def all(self):
+                return late_hours
+
+        return _Result()
+
+    async def execute(self, query):
+        self.statements.append(query)
+
+    async def commit(self):
+        pass
+
+
+async def test_refresh_rebuilds_hours_of_late_completions():
+    late = datetime(2026, 10, 17, 9)
+    db = _RecordingSession(datetime(2026, 10, 19, 11), [late])
+
+    result = await refresh_rollups(db, now=datetime(2026, 10, 19, 12, 5))
+
+    assert result["late_hours"] == 1
+    assert "executions.completed_at >=" in _sql(db.late_query)
+    hourly_insert = next(
+        _sql(s) for s in db.statements if "INSERT INTO execution_rollups_hourly" in _sql(s)
+    )
+    assert "executions.created_at) IN" in hourly_insert
+    daily_delete = next(
+        _sql(s) for s in db.statements if "DELETE FROM execution_rollups_daily" in _sql(s)
+    )
+    assert "execution_rollups_daily.day IN" in daily_delete
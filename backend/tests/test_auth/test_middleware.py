@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jwt.algorithms import RSAAlgorithm
+
+from app.auth import middleware
+from app.auth.cache import TTLCache
+from app.auth.middleware import JWKSStore, verify_clerk_token
+from app.config import settings
+
+DOMAIN = "clerk.example.com"
+
+
+class _FakeResponse:
+    def __init__(self, body: dict):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class _FakeHTTPClient:
+    def __init__(self, jwks: dict):
+        self.jwks = jwks
+        self.requests = 0
+
+    async def get(self, url, timeout=None):
+        self.requests += 1
+        await asyncio.sleep(0)
+        return _FakeResponse(self.jwks)
+
+
+@pytest.fixture
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def http_client(monkeypatch, private_key):
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    client = _FakeHTTPClient({"keys": [{**jwk, "kid": "key-1", "use": "sig", "alg": "RS256"}]})
+    monkeypatch.setattr(middleware, "get_http_client", lambda: client)
+    monkeypatch.setattr(settings, "clerk_domain", DOMAIN)
+    monkeypatch.setattr(middleware, "_jwks_store", JWKSStore("https://clerk.example.com/jwks"))
+    monkeypatch.setattr(middleware, "_token_cache", TTLCache(100, 300))
+    return client
+
+
+def _token(private_key, kid: str = "key-1", **claims) -> HTTPAuthorizationCredentials:
+    payload = {"sub": "user_1", "iss": f"https://{DOMAIN}", "exp": int(time.time()) + 60, **claims}
+    token = jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def test_verified_token_is_cached(http_client, private_key, monkeypatch):
+    credentials = _token(private_key)
+    assert (await verify_clerk_token(credentials))["sub"] == "user_1"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("token verified twice")
+
+    monkeypatch.setattr(middleware.jwt, "decode", fail)
+    assert (await verify_clerk_token(credentials))["sub"] == "user_1"
+    assert http_client.requests == 1
+
+
+async def test_concurrent_requests_share_one_jwks_fetch(http_client, private_key):
+    tokens = [_token(private_key, jti=str(i)) for i in range(5)]
+
+    payloads = await asyncio.gather(*(verify_clerk_token(t) for t in tokens))
+
+    assert [p["jti"] for p in payloads] == [str(i) for i in range(5)]
+    assert http_client.requests == 1
+
+
+async def test_unknown_key_id_refreshes_at_most_once_per_interval(http_client, private_key):
+    await verify_clerk_token(_token(private_key))
+
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc:
+            await verify_clerk_token(_token(private_key, kid="rotated"))
+        assert exc.value.status_code == 401
+    assert http_client.requests == 1
+
+
+async def test_expired_token_is_rejected(http_client, private_key):
+    with pytest.raises(HTTPException) as exc:
+        await verify_clerk_token(_token(private_key, exp=int(time.time()) - 10))
+    assert exc.value.detail == "Token has expired"
@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth import cache as user_cache_module
+from app.auth.cache import CurrentUser, TTLCache
+from app.auth.dependencies import get_current_user
+
+
+def _user(clerk_user_id: str) -> CurrentUser:
+    return CurrentUser(id=uuid.uuid4(), clerk_user_id=clerk_user_id)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    a, b, c = _user("a"), _user("b"), _user("c")
+    cache.set("a", a)
+    cache.set("b", b)
+    assert cache.get("a") == a  # a is now the most recently used
+
+    cache.set("c", c)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == a and cache.get("c") == c
+
+
+def test_ttl_cache_entries_expire(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(user_cache_module.time, "monotonic", lambda: now)
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    user = _user("a")
+    cache.set("a", user)
+
+    now += 59
+    assert cache.get("a") == user
+    now += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+class _FakeSession:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queries = 0
+
+    async def scalar(self, statement):
+        self.queries += 1
+        return self.user_id
+
+
+async def test_get_current_user_queries_the_database_once(monkeypatch):
+    monkeypatch.setattr(
+        "app.auth.dependencies.user_cache", TTLCache(max_entries=10, ttl_seconds=60)
+    )
+    db = _FakeSession(uuid.uuid4())
+
+    first = await get_current_user({"sub": "user_1"}, db)
+    second = await get_current_user({"sub": "user_1"}, db)
+
+    assert first == second == CurrentUser(id=db.user_id, clerk_user_id="user_1", plan="trial")
+    assert db.queries == 1
+
+
+async def test_get_current_user_requires_sub():
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user({}, _FakeSession(None))
+    assert exc.value.status_code == 401
+
+
+def test_ttl_cache_entry_ttl_is_capped_by_the_cache_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(user_cache_module.time, "monotonic", lambda: now)
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    cache.set("short", 1, ttl_seconds=5)
+    cache.set("long", 2, ttl_seconds=3600)
+
+    now += 30
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    now += 31
+    assert cache.get("long") is None
+
+
+def test_admins_come_from_settings(monkeypatch):
+    monkeypatch.setattr(user_cache_module.settings, "admin_clerk_user_ids", "user_a, user_b")
+    assert _user("user_b").is_admin
+    assert not _user("user_c").is_admin
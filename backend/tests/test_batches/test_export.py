@@ -0,0 +1,69 @@
+import io
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.batches import export
+
+INPUT_FIELDS = {"ticket_text": {"type": "string"}}
+OUTPUT_FIELDS = {
+    "priority": {"type": "string"},
+    "requires_escalation": {"type": "boolean"},
+    "key_issues": {"type": "array", "items": {"type": "string"}},
+}
+
+
+def _row(index, output):
+    return SimpleNamespace(
+        item_index=index,
+        status="completed",
+        input_data={"ticket_text": f"ticket {index}"},
+        output_data=output,
+        error_data=None,
+        cost_cents=Decimal("0.0125"),
+        duration_ms=120,
+    )
+
+
+@pytest.fixture
+def fake_rows(monkeypatch):
+    partitions = [
+        [_row(0, {"priority": "high", "requires_escalation": True, "key_issues": ["a"]})],
+        [_row(1, {"priority": "low", "requires_escalation": "false", "key_issues": "oops"})],
+    ]
+
+    async def _iter(batch_id):
+        for rows in partitions:
+            yield rows
+
+    monkeypatch.setattr(export, "iter_item_rows", _iter)
+
+
+async def test_stream_csv(fake_rows):
+    chunks = [c async for c in export.stream_csv(None, list(INPUT_FIELDS), ["priority"])]
+    lines = "".join(chunks).splitlines()
+    assert lines[0] == "item_index,status,input_ticket_text,output_priority,cost_cents,duration_ms"
+    assert lines[1] == "0,completed,ticket 0,high,0.0125,120"
+    assert len(lines) == 3
+
+
+async def test_stream_parquet_typed_columns(fake_rows):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    chunks = [c async for c in export.stream_parquet(None, INPUT_FIELDS, OUTPUT_FIELDS)]
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+
+    assert table.num_rows == 2
+    assert str(table.schema.field("output_requires_escalation").type) == "bool"
+    assert table.column("output_requires_escalation").to_pylist() == [True, False]
+    assert table.column("output_key_issues").to_pylist() == [["a"], None]
+    assert pq.ParquetFile(io.BytesIO(b"".join(chunks))).num_row_groups == 2
+
+
+async def test_stream_arrow(fake_rows):
+    pa = pytest.importorskip("pyarrow")
+
+    chunks = [c async for c in export.stream_arrow(None, INPUT_FIELDS, OUTPUT_FIELDS)]
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+    assert table.column("output_priority").to_pylist() == ["high", "low"]
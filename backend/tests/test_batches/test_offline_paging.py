@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from app.batches import offline
+from app.config import settings
+
+
+class _PagedSession:
+    """Serves ``items`` by keyset pages and records what was committed."""
+
+    def __init__(self, items):
+        self.info = {}
+        self.items = items
+        self.handled = []
+        self.committed = []
+
+    async def scalars(self, query):
+        after = query.whereclause.compile().params["item_index_1"]
+        page = [item for item in self.items if item.item_index > after]
+        return SimpleNamespace(all=lambda: page[: settings.batch_offline_page_size])
+
+    async def commit(self):
+        self.committed = list(self.handled)
+
+
+def _items(count):
+    return [SimpleNamespace(item_index=index) for index in range(count)]
+
+
+async def test_every_page_is_handled_and_committed(monkeypatch):
+    monkeypatch.setattr(settings, "batch_offline_page_size", 2)
+    db = _PagedSession(_items(5))
+
+    async def handle(page):
+        db.handled.extend(item.item_index for item in page)
+
+    done = await offline._each_page(db, None, (), handle, deadline=float("inf"))
+
+    assert done
+    assert db.committed == [0, 1, 2, 3, 4]
+
+
+async def test_pages_stop_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "batch_offline_page_size", 2)
+    db = _PagedSession(_items(5))
+    clock = iter([0.0, 5.0, 11.0])
+    monkeypatch.setattr(offline, "time", SimpleNamespace(monotonic=lambda: next(clock)))
+
+    async def handle(page):
+        db.handled.extend(item.item_index for item in page)
+
+    done = await offline._each_page(db, None, (), handle, deadline=10.0)
+
+    assert not done
+    assert db.committed == [0, 1, 2, 3]
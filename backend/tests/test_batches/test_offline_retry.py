@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+from arq import Retry
+
+from app.batches import offline
+from app.config import settings
+from app.worker import tasks
+
+
+class _FakeSession:
+    def __init__(self):
+        self.info = {}
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = _FakeSession()
+    monkeypatch.setattr("app.db.engine.get_session_maker", lambda: lambda: session)
+
+    async def advance(db, redis, batch_id):
+        raise ConnectionError("provider unreachable")
+
+    monkeypatch.setattr(offline, "advance_offline_batch", advance)
+    return session
+
+
+async def test_failed_advance_is_retried_with_backoff(session, monkeypatch):
+    failed = []
+    monkeypatch.setattr(offline, "fail_offline_batch", lambda *args: failed.append(args))
+
+    with pytest.raises(Retry) as exc:
+        await tasks.advance_offline_batch_task({"redis": None, "job_try": 2}, str(uuid.uuid4()))
+
+    assert exc.value.defer_score == settings.batch_offline_retry_base_seconds * 2 * 1000
+    assert session.rollbacks == 1
+    assert failed == []
+
+
+async def test_batch_is_marked_failed_when_retries_run_out(session, monkeypatch):
+    batch_id = uuid.uuid4()
+    failed = []
+
+    async def fail(db, redis, failed_batch_id, error):
+        failed.append((failed_batch_id, error))
+
+    monkeypatch.setattr(offline, "fail_offline_batch", fail)
+
+    result = await tasks.advance_offline_batch_task(
+        {"redis": None, "job_try": settings.batch_offline_max_tries}, str(batch_id)
+    )
+
+    assert result == {"status": "failed", "error": "provider unreachable"}
+    assert failed == [(batch_id, "provider unreachable")]
+    assert session.commits == 1
@@ -0,0 +1,109 @@
+import uuid
+
+import pytest
+
+from app.batches.scheduler import CHUNK_UNIT, Lease
+from app.config import settings
+from app.worker import tasks
+
+
+class _FakeScheduler:
+    def __init__(self, lease: Lease | None):
+        self.lease = lease
+        self.acked: list[Lease] = []
+        self.requeued: list[Lease] = []
+
+    async def pop(self, lease_seconds):
+        return self.lease
+
+    async def ack(self, lease):
+        self.acked.append(lease)
+
+    async def requeue(self, lease):
+        self.requeued.append(lease)
+        return True
+
+
+class _FakeArqRedis:
+    def __init__(self):
+        self.jobs = []
+
+    async def enqueue_job(self, name, **kwargs):
+        self.jobs.append((name, kwargs))
+
+
+class _FakeSession:
+    def __init__(self):
+        self.info = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+def _lease(attempt: int = 0) -> Lease:
+    return Lease("lease-1", "user-1", str(uuid.uuid4()), CHUNK_UNIT, attempt)
+
+
+@pytest.fixture
+def run_slot(monkeypatch):
+    def run(lease: Lease, status: str):
+        scheduler = _FakeScheduler(lease)
+        monkeypatch.setattr(
+            "app.batches.scheduler.FairBatchScheduler", lambda redis: scheduler
+        )
+
+        async def chunk_task(ctx, batch_id):
+            return {"status": status, "error": "database unavailable"}
+
+        monkeypatch.setattr(tasks, "process_batch_chunk_task", chunk_task)
+        return scheduler
+
+    return run
+
+
+async def test_successful_unit_is_acknowledged(run_slot):
+    scheduler = run_slot(_lease(), "ok")
+    redis = _FakeArqRedis()
+
+    await tasks.run_batch_slot_task({"redis": redis})
+
+    assert scheduler.acked == [scheduler.lease]
+    assert scheduler.requeued == [] and redis.jobs == []
+
+
+async def test_failed_unit_is_requeued_with_a_deferred_slot(run_slot):
+    scheduler = run_slot(_lease(attempt=1), "failed")
+    redis = _FakeArqRedis()
+
+    await tasks.run_batch_slot_task({"redis": redis})
+
+    assert scheduler.requeued == [scheduler.lease] and scheduler.acked == []
+    [(name, options)] = redis.jobs
+    assert name == "run_batch_slot_task"
+    assert options["_defer_by"] == settings.batch_unit_retry_base_seconds * 2
+
+
+async def test_unit_items_fail_once_attempts_run_out(run_slot, monkeypatch):
+    lease = _lease(attempt=settings.batch_unit_max_tries - 1)
+    scheduler = run_slot(lease, "failed")
+    failed = []
+
+    async def fail_batch_unit(db, redis, batch_id, unit, error):
+        failed.append((str(batch_id), unit, error))
+
+    monkeypatch.setattr("app.batches.service.fail_batch_unit", fail_batch_unit)
+    monkeypatch.setattr("app.db.engine.get_session_maker", lambda: _FakeSession)
+
+    await tasks.run_batch_slot_task({"redis": _FakeArqRedis()})
+
+    assert failed == [(lease.batch_id, CHUNK_UNIT, "database unavailable")]
+    assert scheduler.acked == [lease] and scheduler.requeued == []
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.db.hooks import after_commit, commit
+
+
+class FakeSession:
+    def __init__(self, calls: list):
+        self.calls = calls
+        self.info = {}
+
+    async def commit(self):
+        self.calls.append("commit")
+
+
+async def test_callbacks_run_after_the_commit():
+    calls = []
+    db = FakeSession(calls)
+
+    async def record(name):
+        calls.append(name)
+
+    async def broken():
+        raise RuntimeError("redis down")
+
+    after_commit(db, record, "usage")
+    after_commit(db, broken)
+    after_commit(db, record, "analytics")
+    assert calls == []
+
+    await commit(db)
+    assert calls == ["commit", "usage", "analytics"]
+
+    await commit(db)
+    assert calls == ["commit", "usage", "analytics", "commit"]
+
+
+def test_rollback_discards_callbacks():
+    with Session(create_engine("sqlite://")) as session:
+        session.execute(text("SELECT 1"))
+
+        async def record():
+            pass
+
+        after_commit(session, record)
+        session.rollback()
+        assert "after_commit" not in session.info
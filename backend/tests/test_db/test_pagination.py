@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    split_page,
+)
+from app.executions.models import Execution
+
+
+def test_cursor_round_trip():
+    created_at, row_id = datetime(2026, 10, 19, 8, 30, 15, 123456), uuid.uuid4()
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+TRUNCATED_CURSOR = encode_cursor(datetime(2026, 1, 1), uuid.uuid4())[:-4]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", TRUNCATED_CURSOR])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_split_page_returns_cursor_of_last_row_only_when_more_follow():
+    rows = [
+        SimpleNamespace(created_at=datetime(2026, 10, 19 - i), id=uuid.uuid4()) for i in range(3)
+    ]
+
+    assert split_page(rows, 3) == (rows, None)
+
+    page, cursor = split_page(rows, 2)
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == (rows[1].created_at, rows[1].id)
+
+
+def test_keyset_page_filters_after_cursor_and_fetches_one_extra_row():
+    cursor = encode_cursor(datetime(2026, 10, 19), uuid.uuid4())
+    query = keyset_page(select(Execution.id), Execution, limit=20, cursor=cursor)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "(executions.created_at, executions.id) < (" in sql
+    assert "ORDER BY executions.created_at DESC, executions.id DESC" in sql
+    assert query._limit_clause.value == 21
@@ -0,0 +1,26 @@
+import uuid
+from datetime import date, datetime
+
+from app.executions.models import Execution, ExecutionStep
+from app.executions.partitions import add_months, month_start, partition_name
+
+
+def test_add_months_rolls_over_years():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+
+def test_partition_name_uses_the_month():
+    month = month_start(datetime(2026, 10, 19, 12, 30))
+    assert month == date(2026, 10, 1)
+    assert partition_name("executions", month) == "executions_p202610"
+
+
+def test_executions_are_identified_by_id_alone():
+    # The table key is (id, created_at); the ORM identity stays id
+    assert [c.name for c in Execution.__table__.primary_key] == ["id", "created_at"]
+    assert [c.name for c in Execution.__mapper__.primary_key] == ["id"]
+    assert [c.name for c in ExecutionStep.__mapper__.primary_key] == ["id"]
+
+    execution = Execution(id=uuid.uuid4())
+    assert Execution.__mapper__.identity_key_from_instance(execution)[1] == (execution.id,)
@@ -0,0 +1,143 @@
+import json
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.orchestrator.batch_api import BatchRequest, OpenAIBatchClient
+
+
+class BatchAPIStub:
+    """In-memory stand-in for the provider's files + batches endpoints.
+
+    Each batch reports ``in_progress`` on its first poll and ``completed`` on the
+    next; every request is answered with a canned chat completion (or an error
+    when its prompt contains "FAIL").
+    """
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/v1")
+        if request.method == "POST" and path == "/files":
+            content = self._uploaded_file(request)
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+            return httpx.Response(200, json=self._file(file_id, "batch"))
+        if request.method == "POST" and path == "/batches":
+            body = json.loads(request.content)
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": body["endpoint"],
+                "input_file_id": body["input_file_id"],
+                "completion_window": body["completion_window"],
+                "created_at": int(time.time()),
+                "status": "validating",
+                "metadata": body.get("metadata"),
+            }
+            return httpx.Response(200, json=self.batches[batch_id])
+        if request.method == "GET" and path.startswith("/batches/"):
+            batch = self.batches[path.split("/")[2]]
+            if batch["status"] == "validating":
+                batch["status"] = "in_progress"
+            elif batch["status"] == "in_progress":
+                batch["output_file_id"] = self._run(batch["input_file_id"])
+                batch["status"] = "completed"
+            return httpx.Response(200, json=batch)
+        if request.method == "GET" and path.endswith("/content"):
+            return httpx.Response(200, content=self.files[path.split("/")[2]])
+        return httpx.Response(404, json={"error": {"message": "not found"}})
+
+    @staticmethod
+    def _uploaded_file(request: httpx.Request) -> bytes:
+        boundary = request.headers["content-type"].split("boundary=")[1].encode()
+        for part in request.content.split(b"--" + boundary):
+            headers, _, body = part.partition(b"\r\n\r\n")
+            if b"filename=" in headers:
+                return body.removesuffix(b"\r\n")
+        raise AssertionError("no file in upload")
+
+    def _file(self, file_id: str, purpose: str) -> dict:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self.files[file_id]),
+            "created_at": int(time.time()),
+            "filename": "batch.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def _run(self, input_file_id: str) -> str:
+        lines = []
+        for line in self.files[input_file_id].decode().splitlines():
+            request = json.loads(line)
+            prompt = request["body"]["messages"][-1]["content"]
+            if "FAIL" in prompt:
+                response = {
+                    "status_code": 400,
+                    "body": {"error": {"message": "bad request"}},
+                }
+            else:
+                response = {
+                    "status_code": 200,
+                    "body": {
+                        "choices": [{"message": {"content": f"echo: {prompt}"}}],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+                    },
+                }
+            lines.append(json.dumps({"custom_id": request["custom_id"], "response": response}))
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = ("\n".join(lines) + "\n").encode()
+        return file_id
+
+
+def _client(stub: BatchAPIStub) -> OpenAIBatchClient:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(stub.handler))
+    return OpenAIBatchClient(
+        AsyncOpenAI(api_key="test", base_url="http://stub/v1", http_client=http_client)
+    )
+
+
+def _request(custom_id: str, prompt: str) -> BatchRequest:
+    return BatchRequest(
+        custom_id=custom_id,
+        body={"model": "gpt-4.1-nano", "messages": [{"role": "user", "content": prompt}]},
+    )
+
+
+async def test_submit_poll_and_fetch_results():
+    stub = BatchAPIStub()
+    client = _client(stub)
+
+    batch_id = await client.submit([_request("a", "hello"), _request("b", "FAIL")])
+    assert (await client.retrieve(batch_id)).status == "in_progress"
+    batch = await client.retrieve(batch_id)
+    assert batch.status == "completed"
+
+    results = await client.fetch_results(batch)
+    assert results["a"].content == "echo: hello"
+    assert results["a"].input_tokens == 10
+    assert results["a"].error is None
+    assert results["b"].error == "bad request"
+
+
+def test_batch_cost_is_discounted():
+    full = OpenAIBatchClient.calculate_cost("gpt-4.1-mini", 1_000_000, 0) * 2
+    assert full == 0.40
+
+
+def test_cached_prompt_tokens_use_cached_rate():
+    results = OpenAIBatchClient.parse_results(
+        '{"custom_id": "a", "response": {"status_code": 200, "body": {"choices": '
+        '[{"message": {"content": "ok"}}], "usage": {"prompt_tokens": 2000, '
+        '"completion_tokens": 0, "prompt_tokens_details": {"cached_tokens": 1000}}}}}\n'
+    )
+    assert results[0].cached_tokens == 1000
+
+    cost = OpenAIBatchClient.calculate_cost("gpt-4.1", 2_000_000, 0, cached_tokens=1_000_000)
+    assert cost == (2.00 + 0.50) * 0.5
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from app.orchestrator import cache_codec
+
+
+def test_small_values_are_not_compressed():
+    data = {"priority": "high", "category": "billing"}
+    encoded = cache_codec.encode(data)
+    assert encoded[:2] == bytes((cache_codec.VERSION, cache_codec.CODEC_NONE))
+    assert cache_codec.decode(encoded) == data
+
+
+def test_large_values_are_compressed():
+    data = {"text": "The quick brown fox jumps over the lazy dog. " * 200}
+    encoded = cache_codec.encode(data)
+    assert encoded[1] in (cache_codec.CODEC_ZSTD, cache_codec.CODEC_ZLIB)
+    assert len(encoded) < len(json.dumps(data)) / 5
+    assert cache_codec.decode(encoded) == data
+
+
+def test_zlib_fallback(monkeypatch):
+    monkeypatch.setattr(cache_codec, "zstandard", None)
+    data = {"text": "lorem ipsum " * 500}
+    encoded = cache_codec.encode(data)
+    assert encoded[1] == cache_codec.CODEC_ZLIB
+    assert cache_codec.decode(encoded) == data
+
+
+@pytest.mark.parametrize("legacy", ['{"a": 1}', b'{"a": 1}'])
+def test_legacy_json_values_still_decode(legacy):
+    assert cache_codec.decode(legacy) == {"a": 1}
+
+
+def test_plain_string_outputs_round_trip():
+    assert cache_codec.decode(cache_codec.encode("plain text output")) == "plain text output"
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.orchestrator.cache import LLMCache
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class _FakeRedis:
+    """Just enough of redis.asyncio.Redis for the flight lock scripts."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.extensions = 0
+        self.connection_pool = type("Pool", (), {"connection_kwargs": {}})()
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.values.get(key) != token:
+            return 0
+        if "expire" in script:
+            self.extensions += 1
+            return 1
+        del self.values[key]
+        return 1
+
+
+async def test_owner_extends_the_flight_while_computing(monkeypatch):
+    monkeypatch.setattr(LLMCache, "FLIGHT_HEARTBEAT", 0.01)
+    redis = _FakeRedis()
+    cache = LLMCache(redis)
+
+    token = await cache.acquire_flight("gpt-4.1", MESSAGES)
+    assert await cache.acquire_flight("gpt-4.1", MESSAGES) is None
+
+    async with cache.hold_flight("gpt-4.1", MESSAGES, token):
+        await asyncio.sleep(0.05)
+
+    assert redis.extensions >= 2
+    assert redis.values == {}  # released
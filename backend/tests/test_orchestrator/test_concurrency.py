@@ -0,0 +1,87 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError, RateLimitError
+
+from app.orchestrator.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    is_overload_error,
+    retry_after_seconds,
+)
+
+MODEL = "gpt-4.1-nano"
+
+
+def _error(cls, status: int, headers: dict | None = None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls("error", response=response, body=None)
+
+
+def test_overload_errors():
+    assert is_overload_error(_error(RateLimitError, 429))
+    assert is_overload_error(_error(InternalServerError, 503))
+    assert not is_overload_error(_error(BadRequestError, 400))
+    assert not is_overload_error(ValueError("boom"))
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds(_error(RateLimitError, 429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(_error(RateLimitError, 429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_error(RateLimitError, 429)) is None
+
+
+async def _hold(limiter: AdaptiveConcurrencyLimiter, seconds: float):
+    async with limiter.slot(MODEL):
+        await asyncio.sleep(seconds)
+
+
+async def test_limit_grows_while_healthy():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=4)
+
+    for _ in range(20):
+        await asyncio.gather(*(_hold(limiter, 0.01) for _ in range(limiter.limit(MODEL))))
+
+    assert limiter.limit(MODEL) == 4
+
+
+async def test_limit_caps_in_flight_calls():
+    limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot(MODEL):
+            peak = max(peak, limiter.in_flight(MODEL))
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call() for _ in range(8)))
+    assert peak == 2
+    assert limiter.in_flight(MODEL) == 0
+
+
+async def test_rate_limit_halves_limit_and_honors_retry_after():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, minimum=1, maximum=16)
+
+    with pytest.raises(RateLimitError):
+        async with limiter.slot(MODEL):
+            raise _error(RateLimitError, 429, {"retry-after-ms": "100"})
+
+    assert limiter.limit(MODEL) == 4
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    async with limiter.slot(MODEL):
+        pass
+    assert loop.time() - started >= 0.09
+
+
+async def test_client_errors_do_not_back_off():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, minimum=1, maximum=16)
+
+    with pytest.raises(BadRequestError):
+        async with limiter.slot(MODEL):
+            raise _error(BadRequestError, 400)
+
+    assert limiter.limit(MODEL) == 8
@@ -0,0 +1,60 @@
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.http_client import close_http_client, get_http_client
+from app.orchestrator.llm_client import LLMClient
+from app.orchestrator.retry_policy import RetryPolicy
+
+
+async def test_sdk_client_follows_the_shared_http_client():
+    client = LLMClient()
+    first = client.client
+    assert client.client is first
+
+    await close_http_client()
+    rebuilt = client.client
+
+    assert rebuilt is not first
+    assert client._http_client is get_http_client()
+    assert not client._http_client.is_closed
+    await close_http_client()
+
+
+async def test_completion_uses_the_model_timeout_not_the_pool_default(monkeypatch):
+    timeouts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"]["read"])
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4.1",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "ok"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+            },
+        )
+
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        timeout=httpx.Timeout(settings.llm_timeout_default, connect=10.0),
+    )
+    sdk = AsyncOpenAI(api_key="test", http_client=http_client)
+    monkeypatch.setattr(LLMClient, "client", sdk)
+    client = LLMClient()
+    monkeypatch.setattr(client, "count_messages_tokens", lambda messages: 0)
+
+    await client.complete("gpt-4.1", [{"role": "user", "content": "hi"}])
+
+    assert RetryPolicy.for_model("gpt-4.1").timeout == 120.0
+    assert timeouts == [120.0]
+    await http_client.aclose()
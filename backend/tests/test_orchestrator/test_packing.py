@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from app.orchestrator.llm_client import LLMClient, LLMResponse
+from app.orchestrator.packing import PackingError, PromptPacker, is_packable
+
+STEP = {
+    "id": "classify",
+    "type": "llm_call",
+    "complexity": "classify",
+    "response_format": "json_object",
+    "max_tokens": 100,
+    "pack": True,
+}
+
+
+class FakeClient:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    async def complete(self, **kwargs):
+        self.calls.append(kwargs)
+        return LLMResponse(
+            content=json.dumps({"results": self.results}),
+            model=kwargs["model"],
+            input_tokens=301,
+            output_tokens=90,
+            cost_usd=0.003,
+            prompt_hash="h",
+        )
+
+
+def _messages(text: str) -> list[dict]:
+    return [{"role": "system", "content": "Classify."}, {"role": "user", "content": text}]
+
+
+def test_only_flagged_small_steps_are_packable():
+    assert is_packable(STEP)
+    assert not is_packable({**STEP, "pack": False})
+    assert not is_packable({**STEP, "complexity": "generate"})
+
+
+async def test_items_share_one_request():
+    client = FakeClient([{"id": i, "result": {"label": f"l{i}"}} for i in range(3)])
+    packer = PromptPacker(client, pack_size=3, linger=1.0)
+
+    responses = await asyncio.gather(
+        *(packer.submit(STEP, "gpt-4.1-nano", _messages(f"t{i}")) for i in range(3))
+    )
+
+    assert len(client.calls) == 1
+    assert [json.loads(r.content) for r in responses] == [{"label": f"l{i}"} for i in range(3)]
+    assert sum(r.input_tokens for r in responses) == 301
+    assert client.calls[0]["max_tokens"] == 300
+    assert [r.prompt_hash for r in responses] == [
+        LLMClient.hash_prompt("gpt-4.1-nano", _messages(f"t{i}")) for i in range(3)
+    ]
+
+
+async def test_invalid_item_falls_back():
+    client = FakeClient([{"id": 0, "result": {"label": "a"}}, {"id": 1, "result": "oops"}])
+    packer = PromptPacker(client, pack_size=2, linger=1.0)
+
+    first, second = await asyncio.gather(
+        packer.submit(STEP, "gpt-4.1-nano", _messages("a")),
+        packer.submit(STEP, "gpt-4.1-nano", _messages("b")),
+        return_exceptions=True,
+    )
+
+    assert json.loads(first.content) == {"label": "a"}
+    assert isinstance(second, PackingError)
+
+
+async def test_lone_item_is_not_packed():
+    client = FakeClient([])
+    packer = PromptPacker(client, pack_size=8, linger=0.01)
+
+    with pytest.raises(PackingError):
+        await packer.submit(STEP, "gpt-4.1-nano", _messages("alone"))
+    assert client.calls == []
@@ -42,3 +42,50 @@ def test_build_messages():
     assert messages[0]["content"] == "You are a classifier"
     assert messages[1]["role"] == "user"
     assert messages[1]["content"] == "Analyze: Great product!"
+
+
+def test_prefix_cache_layout_keeps_static_prefix_first():
+    builder = PromptBuilder()
+    system_prompt = "You are a support assistant.\nBrand voice: {{brand_voice}}\nAnswer in JSON."
+    first = builder.build_messages(
+        system_prompt, "Ticket: {{text}}", {"brand_voice": "warm", "text": "a"}, "prefix_cache"
+    )
+    second = builder.build_messages(
+        system_prompt, "Ticket: {{text}}", {"brand_voice": "formal", "text": "b"}, "prefix_cache"
+    )
+    assert first[0] == second[0] == {"role": "system", "content": "You are a support assistant."}
+    assert first[1] == {"role": "system", "content": "Brand voice: warm\nAnswer in JSON."}
+    assert first[2] == {"role": "user", "content": "Ticket: a"}
+
+
+def test_prefix_cache_layout_does_not_split_a_sentence_spanning_lines():
+    builder = PromptBuilder()
+    system_prompt = (
+        "You are a support agent.\n"
+        "Write a brief response\n"
+        "to this {{priority}} ticket.\n"
+        "Be empathetic."
+    )
+    messages = builder.build_messages(
+        system_prompt, "Ticket: {{text}}", {"priority": "high", "text": "a"}, "prefix_cache"
+    )
+    assert messages[0] == {"role": "system", "content": "You are a support agent."}
+    assert messages[1] == {
+        "role": "system",
+        "content": "Write a brief response\nto this high ticket.\nBe empathetic.",
+    }
+
+
+def test_prefix_cache_layout_without_a_sentence_break_keeps_one_message():
+    builder = PromptBuilder()
+    system_prompt = "Write a brief response\nto this {{priority}} ticket."
+    default = builder.build_messages(system_prompt, "Hi", {"priority": "high"})
+    layout = builder.build_messages(system_prompt, "Hi", {"priority": "high"}, "prefix_cache")
+    assert layout == default
+
+
+def test_prefix_cache_layout_without_variables_matches_default():
+    builder = PromptBuilder()
+    default = builder.build_messages("Static rules.", "Hi {{name}}", {"name": "Ana"})
+    layout = builder.build_messages("Static rules.", "Hi {{name}}", {"name": "Ana"}, "prefix_cache")
+    assert layout == default
@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.orchestrator.llm_client import LLMClient
+from app.orchestrator.retry_policy import (
+    MIN_HEDGE_SAMPLES,
+    LatencyTracker,
+    RetryPolicy,
+    is_retryable_error,
+    run_hedged,
+)
+
+
+def _policy(**overrides) -> RetryPolicy:
+    values = dict(timeout=1.0, max_retries=3, backoff_base=0.5, backoff_max=4.0, hedge=True)
+    return RetryPolicy(**{**values, **overrides})
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = _policy()
+    for attempt in range(10):
+        delay = policy.backoff(attempt)
+        assert 0 <= delay <= min(4.0, 0.5 * 2**attempt)
+
+
+def test_worst_case_covers_every_attempt_and_backoff():
+    # 4 attempts of 1s + backoffs capped at 0.5, 1.0, 2.0
+    assert _policy().worst_case_seconds() == 4 * 1.0 + 3.5
+    assert _policy(max_retries=0).worst_case_seconds() == 1.0
+
+
+def test_timeouts_are_retryable():
+    assert is_retryable_error(TimeoutError())
+    assert not is_retryable_error(ValueError("bad request"))
+
+
+def test_hedge_delay_needs_enough_samples():
+    tracker = LatencyTracker()
+    for _ in range(MIN_HEDGE_SAMPLES - 1):
+        tracker.record("m", 0.1)
+    assert tracker.hedge_delay("m") is None
+
+    for i in range(100):
+        tracker.record("m", i / 100)
+    assert 0.9 <= tracker.hedge_delay("m") <= 1.0
+
+
+async def test_hedge_returns_faster_attempt():
+    delays = iter([1.0, 0.01])
+
+    async def attempt():
+        delay = next(delays)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert await run_hedged(attempt, hedge_after=0.02) == 0.01
+
+
+async def test_no_hedge_when_first_attempt_is_fast():
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        return "ok"
+
+    assert await run_hedged(attempt, hedge_after=0.5) == "ok"
+    assert calls == 1
+
+
+async def test_hedge_survives_one_failed_attempt():
+    outcomes = iter(["fail", "ok"])
+
+    async def attempt():
+        outcome = next(outcomes)
+        await asyncio.sleep(0.05 if outcome == "fail" else 0.1)
+        if outcome == "fail":
+            raise TimeoutError()
+        return outcome
+
+    assert await run_hedged(attempt, hedge_after=0.01) == "ok"
+
+
+async def test_hedge_raises_when_all_attempts_fail():
+    async def attempt():
+        await asyncio.sleep(0.02)
+        raise TimeoutError()
+
+    with pytest.raises(TimeoutError):
+        await run_hedged(attempt, hedge_after=0.01)
+
+
+async def test_lost_hedge_prompt_is_billed(monkeypatch):
+    delays = iter([1.0, 0.01])
+    usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=10, prompt_tokens_details=None)
+    message = SimpleNamespace(content="ok")
+
+    async def create(**kwargs):
+        await asyncio.sleep(next(delays))
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+    completions = SimpleNamespace(create=create)
+    sdk = SimpleNamespace(
+        with_options=lambda **_: SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    monkeypatch.setattr(LLMClient, "client", sdk)
+    client = LLMClient()
+    monkeypatch.setattr(settings, "llm_hedge_enabled", True)
+    monkeypatch.setattr(client.latencies, "hedge_delay", lambda model: 0.02)
+    monkeypatch.setattr(client, "count_messages_tokens", lambda messages: 0)
+
+    response = await client.complete("gpt-4.1-mini", [{"role": "user", "content": "hi"}])
+
+    single = LLMClient.calculate_cost("gpt-4.1-mini", 1000, 10)
+    prompt = LLMClient.calculate_cost("gpt-4.1-mini", 1000, 0)
+    assert response.cost_usd == pytest.approx(single + prompt)
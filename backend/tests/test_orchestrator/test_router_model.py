@@ -1,3 +1,4 @@
+from app.orchestrator.model_health import ModelStats
 from app.orchestrator.router_model import ModelRouter
 
 
@@ -49,3 +50,41 @@ def test_long_input_downgrades_full():
     router = ModelRouter()
     model = router.select(complexity="reason", org_plan="pro", input_tokens=5000)
     assert model == "gpt-4.1-mini"
+
+
+def test_degraded_model_falls_back():
+    router = ModelRouter()
+    router.update_health({"gpt-4.1": ModelStats(calls=50, errors=20, latency_sum=30.0)})
+    model = router.select(complexity="reason", org_plan="pro")
+    assert model == "gpt-4.1-mini"
+
+
+def test_slow_model_falls_back():
+    router = ModelRouter()
+    router.update_health({"gpt-4.1": ModelStats(calls=50, errors=0, latency_sum=50 * 60.0)})
+    model = router.select(complexity="reason", org_plan="pro")
+    assert model == "gpt-4.1-mini"
+
+
+def test_fallback_skips_degraded_and_disallowed_models():
+    router = ModelRouter()
+    router.update_health(
+        {
+            "gpt-4.1": ModelStats(calls=50, errors=50),
+            "gpt-4.1-mini": ModelStats(calls=50, errors=50),
+        }
+    )
+    model = router.select(complexity="reason", org_plan="pro")
+    assert model == "gpt-4.1-nano"
+
+    # Trial plans only allow nano, which has no allowed healthy fallback: keep it
+    router.update_health({"gpt-4.1-nano": ModelStats(calls=50, errors=50)})
+    model = router.select(complexity="classify", org_plan="trial")
+    assert model == "gpt-4.1-nano"
+
+
+def test_few_calls_are_not_degraded():
+    router = ModelRouter()
+    router.update_health({"gpt-4.1": ModelStats(calls=3, errors=3)})
+    model = router.select(complexity="reason", org_plan="pro")
+    assert model == "gpt-4.1"
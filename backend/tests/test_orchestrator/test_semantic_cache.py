@@ -0,0 +1,21 @@
+from array import array
+
+from app.orchestrator import cache_codec
+from app.orchestrator.cache import _nearest
+
+
+def _entry(embedding: list[float], data) -> bytes:
+    return cache_codec.encode({"e": array("f", embedding).tobytes(), "d": data})
+
+
+def test_nearest_picks_the_most_similar_entry():
+    entries = [_entry([1.0, 0.0], "east"), _entry([0.0, 1.0], "north")]
+    score, data = _nearest([0.6, 0.8], entries)
+    assert data == "north"
+    assert abs(score - 0.8) < 1e-6
+
+
+def test_nearest_skips_entries_of_another_dimension():
+    entries = [_entry([1.0, 0.0, 0.0], "old"), _entry([1.0, 0.0], "current")]
+    assert _nearest([1.0, 0.0], entries)[1] == "current"
+    assert _nearest([0.0, 0.0, 0.0, 1.0], entries) == (0.0, None)
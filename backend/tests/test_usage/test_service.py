@@ -0,0 +1,43 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.executions.models import Execution
+from app.usage.service import COST_SCALE, aggregate, usage_deltas
+
+
+def test_usage_deltas_use_integer_cost_units():
+    execution = Execution(
+        user_id=uuid.uuid4(),
+        status="completed",
+        total_input_tokens=120,
+        total_output_tokens=30,
+        total_cost_cents=Decimal("0.0123"),
+        models_used=["gpt-4.1-nano", "gpt-4.1"],
+        cache_hits=1,
+        completed_at=datetime(2026, 10, 19),
+    )
+
+    deltas = usage_deltas(execution)
+
+    assert deltas["total_cost_cents"] == 123
+    assert deltas["successful_executions"] == 1 and deltas["failed_executions"] == 0
+    assert (deltas["nano_calls"], deltas["mini_calls"], deltas["full_calls"]) == (1, 0, 1)
+
+
+def test_aggregate_groups_fields_by_user_and_day():
+    user = uuid.uuid4()
+    fields = {
+        f"{user}:2026-10-19:total_executions": "3",
+        f"{user}:2026-10-19:total_cost_cents": str(2 * COST_SCALE),
+        f"{user}:2026-10-20:total_executions": "1",
+        f"{user}:2026-10-20:unknown_metric": "9",
+        "garbage": "1",
+    }
+
+    rows = aggregate(fields)
+
+    assert rows == {
+        (user, date(2026, 10, 19)): {"total_executions": 3, "total_cost_cents": 20000},
+        (user, date(2026, 10, 20)): {"total_executions": 1},
+    }
@@ -119,7 +119,8 @@ export async function createExecution(token: string, data: {
 }
 
 export async function listExecutions(token: string) {
-  return fetchAPI("/api/executions", {
+  // The list omits JSONB payloads unless requested; the page renders outputs and errors
+  return fetchAPI("/api/executions?fields=output_data,error_data", {
     headers: { Authorization: `Bearer ${token}` },
   });
 }